@@ -1,7 +1,81 @@
-from .actions import *
-from .buffs import *
-from .character import *
-from .effects import *
-from .equipments import *
-from .gameplay import *
-from .rand import *
+"""
+the package namespace loads lazily: a name is imported from its submodule on first access,
+so `import basics` stays cheap and `from basics import run_batch` only loads what run_batch needs.
+`from basics import *` still loads everything and binds the names the submodules define, not what they import.
+"""
+import sys as _sys
+
+_SUBMODULES = ("KEYWORDS", "actions", "baton", "buffs", "character", "csv_reader", "effects", "equipments", "events",
+               "gameplay", "instrument", "mcts", "outcomes", "rand", "remote", "replay", "reqirements", "scheduler",
+               "simulation", "singleton", "solver", "timing", "tournament")
+
+# every public name a submodule defines, under that submodule; what it imports from elsewhere is not exported
+_EXPORTS = {
+    "KEYWORDS": ("ATTACK", "ATTACKER", "BUFF", "COMBO", "CRITTED", "DEFENDER", "IGNORE_BLOCK", "IGNORE_EVADE",
+                 "MAX_HP", "MISLEAD_TARGET", "MISSED", "SPEED", "TARGET_POSITION", "THIS"),
+    "timing": ("Timing",),
+    "singleton": ("SingletonMixIn",),
+    "baton": ("Baton",),
+    "events": ("AttackEvent", "BattleEndEvent", "BuffAppliedEvent", "ConsoleSink", "CritEvent", "DamageEvent",
+               "DeathEvent", "DecisionEvent", "Event", "EventSink", "MisleadEvent", "MissEvent", "MoveEvent",
+               "NullSink", "RingBufferSink", "TurnStartEvent"),
+    "scheduler": ("ATBScheduler", "TurnScheduler"),
+    "instrument": ("ACTION", "AFTER_AFFECT", "DECIDE", "EFFECT", "FACTOR", "Instruments", "MODIFY", "Stat",
+                   "instruments"),
+    "rand": ("BattleRandom", "RandomStub", "SeedSequence", "game_random", "random_stub"),
+    "gameplay": ("ARENA_WIDTH", "Action", "ActionRegistry", "Amulet", "Arena", "ArenaSnapshot", "Attack", "Belief",
+                 "BelieverMixIn", "Buff", "Buffs", "CacheStats", "CombatantMixIn", "Decision", "EXCEPT_SELF",
+                 "Effect", "Equipage", "EquipageMixIn", "Equipment", "FactorIndex", "FactorMixIn", "IndBuff",
+                 "ONLY_SELF", "OffHand", "OneHandWeapon", "Position", "PostReqm", "PreReqm", "RefBuff",
+                 "Requirement", "Resolver", "Slot", "TARGETING_CACHE_SIZE", "Targeting", "TargetingError", "Timer",
+                 "TwoHandWeapon", "Weapon", "action_registry", "next_version", "shared_action", "stat_cache_stats"),
+    "reqirements": ("DistanceLimitReqm", "PosReqm", "SelfPositionalRequirement", "TargetAliveReqm",
+                    "TargetHasBuffReqm", "TargetHasComboReqm", "ValidTargetRequirement"),
+    "buffs": ("Block", "Combo", "Dodge", "Protected", "Strength"),
+    "effects": ("AddProtected", "AddSelfBuff", "ApplyTargetBuff", "ComboConditionEffect", "ConditionalEffect",
+                "Damage", "HealTarget", "MoveTo", "ProtectTarget"),
+    "actions": ("Aiming", "Bash", "Bite", "Defend", "Heal", "Move", "Protect", "Shot", "Skip", "Slash"),
+    "equipments": ("Bow", "MagicBook", "Shield", "Sword"),
+    "character": ("AIBrain", "Brain", "Character", "Faith", "Monster", "PlayerBrain", "Race", "Robber", "WildDog",
+                  "consult"),
+    "simulation": ("BatchResult", "BattleResult", "LEFT", "RIGHT", "TeamFactory", "battle_seeds", "play",
+                   "run_batch", "run_battles"),
+    "mcts": ("DecisionKey", "MCTSBrain", "decision_key"),
+    "outcomes": ("Distribution", "NUMPY_CONVOLVE_SIZE", "Outcome", "OutcomeError", "action_outcome", "action_paths",
+                 "damage_distribution", "decision_outcome"),
+    "remote": ("DecisionRequest", "QueueBrain", "serve_players", "serve_stream"),
+    "replay": ("CombatantRecord", "DecisionRecord", "DesyncError", "REPLAY_MAGIC", "REPLAY_VERSION", "Replay",
+               "ReplayBrain", "ReplayError", "ReplayRecorder", "record_battle", "replay_battle", "state_hash"),
+    "solver": ("SOLVER_CACHE_SIZE", "Solver", "SolverBrain", "SolverError"),
+    "tournament": ("Cell", "Roster", "TOURNAMENT_FORMAT", "Tournament", "TournamentError", "character_rosters",
+                   "loadouts", "pack", "wilson_interval"),
+    "csv_reader": ("ActionSpec", "BuffSpec", "CONTENT_DIR", "CONTENT_FORMAT", "CONTENT_TABLES", "CombatantSpec",
+                   "Content", "ContentError", "EffectSpec", "EquipmentSpec", "TableAction", "TableEquipment",
+                   "TableIndBuff", "TableMonster", "TableRefBuff", "TargetSpec", "compile_tables", "load_content"),
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = [*_MODULES, *_SUBMODULES]
+
+
+def _load(module: str):
+    # the builtin goes through the same path as an import statement, so it shows up in -X importtime
+    __import__(f"{__name__}.{module}")
+    return _sys.modules[f"{__name__}.{module}"]
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return _load(name)
+    try:
+        module = _MODULES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(_load(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from typing import Any, Iterator, Mapping, Optional
+
+from .KEYWORDS import *
+
+KEYWORDS = (MISSED, CRITTED, DEFENDER, ATTACKER, ATTACK, IGNORE_EVADE, IGNORE_BLOCK, SPEED, MAX_HP, THIS,
+            TARGET_POSITION, BUFF, MISLEAD_TARGET, COMBO)
+_KEYWORDS = frozenset(KEYWORDS)
+_UNSET = object()
+
+
+class Baton:
+    """
+    what effects and factors pass along during an action, one slot per keyword, read as baton.attack.
+    it also reads and writes like the dict it replaces, baton[ATTACK], so content written for dicts keeps working.
+    a keyword holding None counts as missing, other keys are kept in an extra dict.
+    """
+    __slots__ = KEYWORDS + ("_extra",)
+
+    def __init__(self):
+        self.missed = self.critted = self.defender = self.attacker = self.attack = self.ignore_evade = \
+            self.ignore_block = self.speed = self.max_hp = self.this = self.target_position = self.buff = \
+            self.mislead_target = self.combo = self._extra = None
+
+    @classmethod
+    def of(cls, baton: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> Baton:
+        """
+        the baton itself, or a new one holding the items of a dict and the keywords
+        """
+        if isinstance(baton, Baton) and not kwargs:
+            return baton
+        new = cls()
+        if baton:
+            new.update(baton)
+        for key, value in kwargs.items():
+            if key in _KEYWORDS:
+                setattr(new, key, value)
+            else:
+                new[key] = value
+        return new
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _KEYWORDS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _KEYWORDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        if key in _KEYWORDS:
+            setattr(self, key, None)
+        else:
+            del self._extra[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _KEYWORDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default if self._extra is None else self._extra.get(key, default)
+
+    def pop(self, key: str, default: Any = _UNSET) -> Any:
+        if key not in self:
+            if default is _UNSET:
+                raise KeyError(key)
+            return default
+        value = self[key]
+        del self[key]
+        return value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self.get(key)
+
+    def update(self, items: Mapping[str, Any] = (), **kwargs: Any):
+        for key, value in (items.items() if hasattr(items, "items") else items):
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def keys(self) -> list[str]:
+        keys = [key for key in KEYWORDS if getattr(self, key) is not None]
+        return keys + list(self._extra) if self._extra else keys
+
+    def values(self) -> list[Any]:
+        return [self[key] for key in self.keys()]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def copy(self) -> Baton:
+        new = Baton()
+        new.update(self)
+        return new
+
+    def __contains__(self, key: str) -> bool:
+        if key in _KEYWORDS:
+            return getattr(self, key) is not None
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (Baton, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Baton({dict(self.items())!r})"
@@ -4,6 +4,9 @@ from .gameplay import *
 
 
 class Dodge(IndBuff):
+    __slots__ = ()
+    timings = Timing.Defend
+
     def may_affect(self, timing: Timing, baton) -> bool:
         if timing == Timing.Defend:
             return True
@@ -27,6 +30,9 @@ class Dodge(IndBuff):
 
 
 class Strength(IndBuff):
+    __slots__ = ()
+    timings = Timing.Attack
+
     def may_affect(self, timing: Timing, baton) -> bool:
         if timing == Timing.Attack:
             return True
@@ -47,6 +53,9 @@ class Strength(IndBuff):
 
 
 class Protected(IndBuff):
+    __slots__ = ("protector",)
+    timings = Timing.Mislead | Timing.Death
+
     @property
     def name(self) -> str:
         return 'Protected'
@@ -66,11 +75,13 @@ class Protected(IndBuff):
         if timing == Timing.Mislead:
             defender = baton[DEFENDER]
             assert isinstance(defender, CombatantMixIn)
-            pos = Arena().find_position(defender)
+            pos = defender.position
             another_pos = Targeting(True, True, 0)
             another = defender.find_target(another_pos)
             baton[MISLEAD_TARGET] = self.protector
-            print(f"mislead to {self.protector}")
+            sink = defender.sink
+            if sink.enabled:
+                sink.emit(MisleadEvent(defender, self.protector))
 
     def __repr__(self):
         return "P"
@@ -84,10 +95,12 @@ class Protected(IndBuff):
 
 
 class Combo(RefBuff):
+    __slots__ = ()
     stackable = False
+    timings = Timing.Defend
 
     def may_affect(self, timing: Timing, baton) -> bool:
-        if timing == Timing.Defend and COMBO in baton.keys():
+        if timing == Timing.Defend and COMBO in baton:
             return True
         return False
 
@@ -103,6 +116,9 @@ class Combo(RefBuff):
 
 
 class Block(IndBuff):
+    __slots__ = ()
+    timings = Timing.Defend
+
     def may_affect(self, timing: Timing, baton) -> bool:
         if timing == Timing.Defend:
             return True
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import time
+from collections.abc import Awaitable
+
 from .actions import *
 
 
@@ -25,8 +28,55 @@ class Brain(ABC):
     def get_castable_targets(caster: CombatantMixIn, action: Action, targeting: Optional[Targeting]) -> Targeting:
         return action.check_target(caster, targeting)
 
+    @staticmethod
+    def legal_decisions(caster: CombatantMixIn) -> list[Decision]:
+        """
+        every decision the caster can take right now, one per target of selective actions
+        """
+        decisions = []
+        for action in Brain.get_castable_actions(caster):
+            if action.post_reqm in (None, ()):
+                decisions.append(Decision([action, None]))
+                continue
+            try:
+                targets = action.check_target(caster)
+            except TargetingError:
+                continue
+            if targets.selective:
+                width = caster.arena.width
+                decisions.extend(Decision([action, targets.choose(pos, width)]) for pos in targets.positions)
+            else:
+                decisions.append(Decision([action, targets]))
+        return decisions
+
+
+async def consult(brain: Brain, caster: CombatantMixIn, arena: Arena) -> Optional[Decision]:
+    """
+    ask the brain for a decision, whether its decide is sync or async
+    """
+    if instruments.enabled:
+        start = time.perf_counter()
+        decision = brain.decide(caster, arena)
+        if isinstance(decision, Awaitable):
+            decision = await decision
+        instruments.record(DECIDE, brain.__class__.__name__, time.perf_counter() - start)
+        return decision
+    decision = brain.decide(caster, arena)
+    if isinstance(decision, Awaitable):
+        decision = await decision
+    return decision
+
 
 class PlayerBrain(Brain, SingletonMixIn):
+    @staticmethod
+    async def read(prompt: str) -> str:
+        """
+        console input on the default executor, so the event loop keeps running while the player thinks
+        """
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(None, input, prompt)
+
     async def decide(self, caster: CombatantMixIn, arena: Arena) -> Optional[Decision]:
         while True:
             try:
@@ -34,7 +84,7 @@ class PlayerBrain(Brain, SingletonMixIn):
                 if len(actions) == 0:
                     print("no action available")
                     return None
-                action_index = int(input("choose action:"))
+                action_index = int(await self.read("choose action:"))
                 action = actions[action_index]
                 if action.post_reqm in (None, ()):
                     return Decision([action, None])
@@ -44,9 +94,9 @@ class PlayerBrain(Brain, SingletonMixIn):
                     continue
                 print(f"legal targets: {legal_targets}")
                 if legal_targets.selective:
-                    target_index = int(input("choose target:"))
+                    target_index = int(await self.read("choose target:"))
                     if target_index in legal_targets:
-                        targeting = legal_targets.choose(target_index)
+                        targeting = legal_targets.choose(target_index, caster.arena.width)
                         return Decision([action, targeting])
                     else:
                         print("target index out of range, try again")
@@ -65,11 +115,26 @@ class PlayerBrain(Brain, SingletonMixIn):
 
 
 class AIBrain(Brain, SingletonMixIn):
+    _rand: Optional[Random] = None
+
     def __init__(self, rand: Random = None):
         if rand is None:
             return
         self.rand = rand
 
+    @property
+    def rand(self) -> Random:
+        """
+        the generator used outside seeded arenas, created on first use
+        """
+        if self._rand is None:
+            self._rand = Random()
+        return self._rand
+
+    @rand.setter
+    def rand(self, rand: Random):
+        self._rand = rand
+
     def decide(self, caster: CombatantMixIn, arena: Arena) -> Optional[Decision]:
         actions = self.get_castable_actions(caster)
 
@@ -77,58 +142,84 @@ class AIBrain(Brain, SingletonMixIn):
             if len(actions) == 0:
                 return None
             action = self.choose_preferred_action(actions, caster)
-            if action.pre_reqm in (None, ()):
-                return Decision([Action, None])
+            if action.post_reqm in (None, ()):
+                return Decision([action, None])
             try:
                 targeting = self.choose_preferred_target(caster, action)
                 return Decision([action, targeting])
             except TargetingError:
                 actions.remove(action)
 
+    def random_source(self, caster: CombatantMixIn) -> Random:
+        """
+        the arena's AI stream when it has one, so seeded battles are reproducible
+        """
+        ai_rand = caster.arena.ai_rand
+        return ai_rand if ai_rand is not None else self.rand
+
     def choose_preferred_action(self, actions: Sequence[Action, ...], caster: CombatantMixIn) -> Action:
         """
         temporary random choose
         """
-        return self.rand.choice(actions)
+        return self.random_source(caster).choice(actions)
 
     def choose_preferred_target(self, caster: CombatantMixIn, action: Action) -> Optional[Targeting]:
         """
         temporary random choose
         """
-        if action.pre_reqm in (None, ()):
+        if action.post_reqm in (None, ()):
             return None
         targets = self.get_castable_targets(caster, action, None)
-        return targets.random_choose(self.rand)
-
-
-AIBrain(Random())
-
-PlayerBrain()
+        return targets.random_choose(self.random_source(caster))
 
 
 class Character(CombatantMixIn, EquipageMixIn):
     async def get_decision(self) -> Decision:
-        return await PlayerBrain().decide(self, Arena())
+        return await consult(self.brain or PlayerBrain(), self, self.arena)
 
     def factors(self, timing: Timing, baton) -> Sequence[FactorMixIn, ...]:
-        return list(filter(lambda x: x.may_affect(timing, baton), self.buffs + self.equipage.factors))
+        registered = self.registered_factors(timing)
+        return [x for x in registered if x.may_affect(timing, baton)] if registered else registered
+
+    def factor_sources(self) -> Sequence[FactorMixIn, ...]:
+        return self.buffs + self.equipage.factors
+
+    @property
+    def factor_version(self) -> tuple[int, ...]:
+        return self.buffs.version, self.equipage.version
 
     def __init__(self, name: str, cur_hp: int, base_max_hp: int, base_speed: int, buffs: Buffs = None,
                  *equipment: Equipment):
         CombatantMixIn.__init__(self, name, cur_hp, base_max_hp, base_speed, buffs)
         EquipageMixIn.__init__(self, *equipment)
+        self._actions: tuple[Action, ...] = ()
+        self._actions_version = None
 
     def get_actions(self) -> tuple[Action, ...]:
-        return self.equipage.get_actions() + self.basic_actions()
+        """
+        cached until the equipment changes
+        """
+        if self._actions_version != self.equipage.version:
+            self._actions = self.equipage.get_actions() + self.basic_actions()
+            self._actions_version = self.equipage.version
+        return self._actions
+
+    def snapshot(self) -> tuple:
+        return super().snapshot() + (self.equipage.snapshot(),)
+
+    def restore(self, state: tuple):
+        super().restore(state)
+        self.equipage.restore(state[3])
 
     @staticmethod
     def basic_actions() -> tuple[Action, ...]:
-        return Move(2), Skip()
+        return shared_action(Move, 2), shared_action(Skip)
 
 
 class Monster(CombatantMixIn):
     def factors(self, timing: Timing, baton) -> Sequence[FactorMixIn, ...]:
-        return list(filter(lambda x: x.may_affect(timing, baton), self.buffs))
+        registered = self.registered_factors(timing)
+        return [x for x in registered if x.may_affect(timing, baton)] if registered else registered
 
     def __init__(self, name: str, cur_hp: int, base_max_hp: int, base_speed: int, buffs: Buffs = None):
         CombatantMixIn.__init__(self, name, cur_hp, base_max_hp, base_speed, buffs)
@@ -139,8 +230,8 @@ class Monster(CombatantMixIn):
         pass
 
     async def get_decision(self) -> Decision:
-        return AIBrain().decide(self, Arena())
-        # return await PlayerBrain().decide(self, Arena())
+        return await consult(self.brain or AIBrain(), self, self.arena)
+        # return await PlayerBrain().decide(self, self.arena)
 
 
 # endregion
@@ -157,7 +248,7 @@ class WildDog(Monster):
         self.buffs = Buffs(Dodge())
 
     def get_actions(self) -> (Action, ...):
-        return (Bite(),)
+        return (shared_action(Bite),)
 
 
 class Robber(Monster):
@@ -171,4 +262,4 @@ class Robber(Monster):
         self.buffs = Buffs()
 
     def get_actions(self) -> (Action, ...):
-        return (Bite(),)
\ No newline at end of file
+        return (shared_action(Bite),)
\ No newline at end of file
@@ -0,0 +1,552 @@
+from __future__ import annotations
+
+import gc
+import hashlib
+import io
+import os
+import pickle
+from typing import NamedTuple
+
+from .character import *
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), "content")
+CONTENT_TABLES = ("buffs", "actions", "effects", "equipment", "combatants")
+CONTENT_FORMAT = 1
+
+TargetSpec = tuple[bool, bool, tuple[int, ...]]
+
+
+class ContentError(ValueError):
+    pass
+
+
+# region specs
+class BuffSpec(NamedTuple):
+    name: str
+    kind: str  # ind or ref
+    timing: Timing
+    mag: float  # added to the attack's magnification
+    acc: float  # multiplies the attack's accuracy
+    crit: float  # multiplies the attack's crit chance
+    evadable: bool  # ignore_evade skips the accuracy change
+    combo_only: bool  # only affects combo attacks
+    duration: int
+    stack: int
+    stackable: bool
+
+
+class EffectSpec(NamedTuple):
+    kind: str
+    target: TargetSpec
+    amount: Optional[tuple[int, int]]
+    alt_amount: Optional[tuple[int, int]]
+    buff: str
+    duration: Optional[int]
+    stack: Optional[int]
+    ignore_evade: bool
+
+
+class ActionSpec(NamedTuple):
+    name: str
+    self_positions: tuple[int, ...]
+    target: Optional[TargetSpec]
+    alive: bool
+    valid_target: Optional[TargetSpec]
+    distance: Optional[int]
+    ignore_evade: bool
+    effects: tuple[EffectSpec, ...]
+
+
+class EquipmentSpec(NamedTuple):
+    name: str
+    slot: str
+    atk: int
+    band: tuple[int, int]
+    actions: tuple[str, ...]
+    crit_taken: float  # multiplies the crit chance of attacks on the wearer
+    max_hp_bonus: float  # part of the base max hp added
+
+
+class CombatantSpec(NamedTuple):
+    name: str
+    kind: str  # character or monster
+    hp: int
+    max_hp: int
+    speed: int
+    buffs: tuple[str, ...]
+    equipment: tuple[str, ...]
+    actions: tuple[str, ...]
+
+
+# endregion
+
+
+# region parsing
+_SLOTS = {
+    "one_hand": (Slot.MainHand,),
+    "two_hand": (Slot.MainHand, Slot.OffHand),
+    "off_hand": (Slot.OffHand,),
+    "amulet": (Slot.Amulet,),
+}
+_POSITIONS = {"self": ONLY_SELF, "others": EXCEPT_SELF}
+_EFFECTS = ("damage", "combo_damage", "heal", "buff", "self_buff", "protect", "move")
+
+
+class _Row:
+    """
+    a csv row, cells read by column and converted, errors name the table and line
+    """
+
+    def __init__(self, table: str, line: int, cells: dict[str, str]):
+        self.table = table
+        self.line = line
+        self.cells = cells
+
+    def error(self, message: str) -> ContentError:
+        return ContentError(f"{self.table}.csv line {self.line}: {message}")
+
+    def text(self, column: str, required: bool = False) -> str:
+        value = (self.cells.get(column) or "").strip()
+        if required and not value:
+            raise self.error(f"{column} is required")
+        return value
+
+    def int(self, column: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.text(column, default is None)
+        try:
+            return int(value) if value else default
+        except ValueError:
+            raise self.error(f"{column} is not an integer: {value}") from None
+
+    def optional_int(self, column: str) -> Optional[int]:
+        value = self.text(column)
+        return self.int(column) if value else None
+
+    def float(self, column: str, default: float) -> float:
+        value = self.text(column)
+        try:
+            return float(value) if value else default
+        except ValueError:
+            raise self.error(f"{column} is not a number: {value}") from None
+
+    def bool(self, column: str) -> bool:
+        return self.text(column).lower() in ("1", "true", "yes", "y")
+
+    def names(self, column: str) -> tuple[str, ...]:
+        return tuple(self.text(column).split())
+
+    def range(self, column: str) -> Optional[tuple[int, int]]:
+        """
+        4-9, or a single number for both ends
+        """
+        value = self.text(column)
+        if not value:
+            return None
+        low, _, high = value.partition("-")
+        try:
+            return int(low), int(high or low)
+        except ValueError:
+            raise self.error(f"{column} is not a range: {value}") from None
+
+    def positions(self, words: list[str], column: str) -> tuple[int, ...]:
+        try:
+            return tuple(_POSITIONS[word] if word in _POSITIONS else int(word) for word in words)
+        except ValueError:
+            raise self.error(f"{column} has an invalid position: {' '.join(words)}") from None
+
+    def target(self, column: str) -> Optional[TargetSpec]:
+        """
+        side, mode and positions: enemy single 0 1 2, ally aoe self, ally single others
+        """
+        words = self.text(column).split()
+        if not words:
+            return None
+        if len(words) < 2 or words[0] not in ("ally", "enemy") or words[1] not in ("single", "aoe"):
+            raise self.error(f"{column} must start with ally or enemy, then single or aoe")
+        return words[0] == "ally", words[1] == "single", self.positions(words[2:], column)
+
+    def timing(self, column: str) -> Timing:
+        timing = Timing(0)
+        for name in self.text(column, True).split("|"):
+            try:
+                timing |= Timing[name.strip()]
+            except KeyError:
+                raise self.error(f"unknown timing {name}") from None
+        return timing
+
+
+def _rows(table: str, data: bytes) -> Iterator[_Row]:
+    import csv  # only parsing needs it, and it pulls in re: a load from the cache goes without
+
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    for line, cells in enumerate(reader, 2):
+        if any(cells.values()):
+            yield _Row(table, line, cells)
+
+
+def _parse_buff(row: _Row) -> BuffSpec:
+    kind = row.text("kind") or "ind"
+    if kind not in ("ind", "ref"):
+        raise row.error(f"kind must be ind or ref, not {kind}")
+    return BuffSpec(row.text("name", True), kind, row.timing("timing"), row.float("mag", 0.0),
+                    row.float("acc", 1.0), row.float("crit", 1.0), row.bool("evadable"), row.bool("combo_only"),
+                    row.int("duration", 3), row.int("stack", 1), row.text("stackable") == "" or row.bool("stackable"))
+
+
+def _parse_effect(row: _Row) -> tuple[str, EffectSpec]:
+    kind = row.text("kind", True)
+    if kind not in _EFFECTS:
+        raise row.error(f"unknown effect {kind}, expected one of {', '.join(_EFFECTS)}")
+    target = row.target("target")
+    if target is None:
+        raise row.error("target is required")
+    effect = EffectSpec(kind, target, row.range("amount"), row.range("alt_amount"), row.text("buff"),
+                        row.optional_int("duration"), row.optional_int("stack"), row.bool("ignore_evade"))
+    if kind in ("damage", "combo_damage", "heal") and effect.amount is None:
+        raise row.error(f"{kind} needs an amount")
+    if kind == "combo_damage" and effect.alt_amount is None:
+        raise row.error("combo_damage needs an alt_amount")
+    if kind in ("buff", "self_buff") and not effect.buff:
+        raise row.error(f"{kind} needs a buff")
+    return row.text("action", True), effect
+
+
+def _parse_action(row: _Row, effects: dict[str, list[EffectSpec]]) -> ActionSpec:
+    name = row.text("name", True)
+    return ActionSpec(name, row.positions(row.text("self_positions").split(), "self_positions"), row.target("target"),
+                      row.bool("alive"), row.target("valid_target"), row.optional_int("distance"),
+                      row.bool("ignore_evade"), tuple(effects.pop(name, ())))
+
+
+def _parse_equipment(row: _Row) -> EquipmentSpec:
+    slot = row.text("slot", True)
+    if slot not in _SLOTS:
+        raise row.error(f"slot must be one of {', '.join(_SLOTS)}, not {slot}")
+    return EquipmentSpec(row.text("name", True), slot, row.int("atk", 0), row.range("band") or (0, 0),
+                         row.names("actions"), row.float("crit_taken", 1.0), row.float("max_hp_bonus", 0.0))
+
+
+def _parse_combatant(row: _Row) -> CombatantSpec:
+    kind = row.text("kind") or "character"
+    if kind not in ("character", "monster"):
+        raise row.error(f"kind must be character or monster, not {kind}")
+    max_hp = row.int("max_hp")
+    return CombatantSpec(row.text("name", True), kind, row.int("hp", max_hp), max_hp, row.int("speed"),
+                         row.names("buffs"), row.names("equipment"), row.names("actions"))
+
+
+def _unique(table: str, specs: list) -> dict[str, Any]:
+    named = {}
+    for spec in specs:
+        if spec.name in named:
+            raise ContentError(f"{table}.csv: {spec.name} is defined twice")
+        named[spec.name] = spec
+    return named
+
+
+def compile_tables(tables: dict[str, bytes]) -> tuple[dict[str, BuffSpec], dict[str, ActionSpec],
+                                                      dict[str, EquipmentSpec], dict[str, CombatantSpec]]:
+    """
+    parse the tables and check every name they refer to
+    @param tables: the bytes of each csv by table name, missing tables are empty
+    """
+    buffs = _unique("buffs", [_parse_buff(row) for row in _rows("buffs", tables.get("buffs", b""))])
+    effects: dict[str, list[EffectSpec]] = {}
+    for row in _rows("effects", tables.get("effects", b"")):
+        action, effect = _parse_effect(row)
+        if effect.buff and effect.buff not in buffs:
+            raise row.error(f"unknown buff {effect.buff}")
+        effects.setdefault(action, []).append(effect)
+    actions = _unique("actions", [_parse_action(row, effects) for row in _rows("actions", tables.get("actions", b""))])
+    if effects:
+        raise ContentError(f"effects.csv: effects of unknown actions {', '.join(effects)}")
+    equipment = _unique("equipment",
+                        [_parse_equipment(row) for row in _rows("equipment", tables.get("equipment", b""))])
+    combatants = _unique("combatants",
+                         [_parse_combatant(row) for row in _rows("combatants", tables.get("combatants", b""))])
+    for table, specs, column, known in (("equipment", equipment, "actions", actions),
+                                        ("combatants", combatants, "actions", actions),
+                                        ("combatants", combatants, "buffs", buffs),
+                                        ("combatants", combatants, "equipment", equipment)):
+        for spec in specs.values():
+            for name in getattr(spec, column):
+                if name not in known:
+                    raise ContentError(f"{table}.csv: {spec.name} refers to an unknown {column[:-1]} {name}")
+    return buffs, actions, equipment, combatants
+
+
+# endregion
+
+
+# region content types
+class _TableBuffMixIn:
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def timings(self) -> Timing:
+        return self.spec.timing
+
+    @property
+    def stackable(self) -> bool:
+        return self.spec.stackable
+
+    def may_affect(self, timing: Timing, baton) -> bool:
+        spec = self.spec
+        return bool(timing & spec.timing) and (not spec.combo_only or COMBO in baton)
+
+    def affect(self, timing: Timing, baton):
+        spec = self.spec
+        attack = baton.get(ATTACK)
+        if attack is None:
+            return
+        if spec.acc != 1.0 and not (spec.evadable and baton.get(IGNORE_EVADE, False)):
+            attack.acc *= spec.acc
+        attack.mag += spec.mag
+        attack.crit *= spec.crit
+
+
+class TableIndBuff(_TableBuffMixIn, IndBuff):
+    __slots__ = ("spec",)
+
+    def __init__(self, spec: BuffSpec, duration: Optional[int] = None, stack: Optional[int] = None):
+        super().__init__(spec.duration if duration is None else duration, spec.stack if stack is None else stack)
+        self.spec = spec
+
+
+class TableRefBuff(_TableBuffMixIn, RefBuff):
+    __slots__ = ("spec",)
+
+    def __init__(self, spec: BuffSpec, duration: Optional[int] = None, stack: Optional[int] = None):
+        super().__init__(spec.duration if duration is None else duration, spec.stack if stack is None else stack)
+        self.spec = spec
+
+
+class TableAction(Action):
+    def __init__(self, name: str, pre_reqm: tuple[PreReqm, ...], post_reqm: tuple[PostReqm, ...],
+                 effects: tuple[tuple[Targeting, Effect], ...], baton=None):
+        super().__init__(pre_reqm, post_reqm, effects, baton)
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+class TableEquipment(Equipment):
+    __slots__ = ("spec", "actions", "atk", "band")
+
+    def __init__(self, spec: EquipmentSpec, actions: tuple[Action, ...]):
+        self.spec = spec
+        self.actions = actions
+        self.atk = spec.atk
+        self.band = spec.band
+
+    @property
+    def occupation(self) -> tuple[Slot, ...]:
+        return _SLOTS[self.spec.slot]
+
+    @property
+    def timings(self) -> Timing:
+        timings = Timing(0)
+        if self.spec.crit_taken != 1.0:
+            timings |= Timing.Defend
+        if self.spec.max_hp_bonus:
+            timings |= Timing.GetMaxHp
+        return timings
+
+    def action(self) -> tuple[Action, ...]:
+        return self.actions
+
+    def may_affect(self, timing: Timing, baton) -> bool:
+        return bool(timing & self.timings)
+
+    def affect(self, timing: Timing, baton):
+        if timing == Timing.Defend:
+            baton[ATTACK].crit *= self.spec.crit_taken
+        elif timing == Timing.GetMaxHp:
+            this = baton[THIS]
+            this.cache_max_hp += int(this.base_max_hp * self.spec.max_hp_bonus)
+
+    def __repr__(self):
+        return self.spec.name
+
+
+class TableMonster(Monster):
+    def __init__(self, name: str, cur_hp: int, base_max_hp: int, base_speed: int, buffs: Buffs,
+                 actions: tuple[Action, ...]):
+        super().__init__(name, cur_hp, base_max_hp, base_speed, buffs)
+        self.actions = actions
+
+    @property
+    def preference(self) -> tuple[str, ...]:
+        return ()
+
+    def get_actions(self) -> tuple[Action, ...]:
+        return self.actions
+
+
+# endregion
+
+
+class Content:
+    """
+    combatants, equipment, actions and buffs defined by tables.
+    actions are built once on first use and shared, like shared_action does for the built-in ones,
+    combatants, equipment and buffs are new every time.
+    """
+
+    def __init__(self, buffs: dict[str, BuffSpec], actions: dict[str, ActionSpec],
+                 equipment: dict[str, EquipmentSpec], combatants: dict[str, CombatantSpec]):
+        self.buffs = buffs
+        self.actions = actions
+        self.equipment = equipment
+        self.combatants = combatants
+        self._built: dict[str, Action] = {}
+
+    def _spec(self, specs: dict[str, Any], kind: str, name: str):
+        try:
+            return specs[name]
+        except KeyError:
+            raise ContentError(f"unknown {kind} {name}") from None
+
+    def buff(self, name: str, duration: Optional[int] = None, stack: Optional[int] = None) -> Buff:
+        spec = self._spec(self.buffs, "buff", name)
+        return (TableIndBuff if spec.kind == "ind" else TableRefBuff)(spec, duration, stack)
+
+    def action(self, name: str) -> Action:
+        action = self._built.get(name)
+        if action is None:
+            action = self._built[name] = self._build_action(self._spec(self.actions, "action", name))
+        return action
+
+    def _build_action(self, spec: ActionSpec) -> Action:
+        pre_reqm, post_reqm = [], []
+        if spec.self_positions:
+            pre_reqm.append(SelfPositionalRequirement(Position([True, *spec.self_positions])))
+        if spec.valid_target is not None:
+            pre_reqm.append(ValidTargetRequirement(_targeting(spec.valid_target)))
+        if spec.target is not None:
+            post_reqm.append(PosReqm(_targeting(spec.target)))
+        if spec.distance is not None:
+            post_reqm.append(DistanceLimitReqm(spec.distance))
+        if spec.alive:
+            post_reqm.append(TargetAliveReqm())
+        effects = tuple((_targeting(effect.target), self._build_effect(effect, spec)) for effect in spec.effects)
+        return TableAction(spec.name, tuple(pre_reqm), tuple(post_reqm), effects,
+                           {IGNORE_EVADE: True} if spec.ignore_evade else None)
+
+    def _build_effect(self, effect: EffectSpec, action: ActionSpec) -> Effect:
+        baton = {IGNORE_EVADE: True} if effect.ignore_evade else None
+        if effect.kind == "damage":
+            return Damage(effect.amount, baton)
+        if effect.kind == "combo_damage":
+            return ComboConditionEffect(Damage(effect.amount), Damage(effect.alt_amount, baton))
+        if effect.kind == "heal":
+            return HealTarget(effect.amount)
+        if effect.kind == "buff":
+            return ApplyTargetBuff(self.buff(effect.buff, effect.duration, effect.stack))
+        if effect.kind == "self_buff":
+            return AddSelfBuff(self.buff(effect.buff, effect.duration, effect.stack))
+        if effect.kind == "protect":
+            return ProtectTarget(3 if effect.stack is None else effect.stack)
+        return MoveTo(action.distance if action.distance is not None else ARENA_WIDTH)
+
+    def item(self, name: str) -> TableEquipment:
+        spec = self._spec(self.equipment, "equipment", name)
+        return TableEquipment(spec, tuple(self.action(action) for action in spec.actions))
+
+    def combatant(self, name: str, display_name: Optional[str] = None) -> CombatantMixIn:
+        """
+        @param name: row of the combatants table
+        @param display_name: name of the combatant in battle, the row name by default
+        """
+        spec = self._spec(self.combatants, "combatant", name)
+        buffs = Buffs(*(self.buff(buff) for buff in spec.buffs))
+        display_name = display_name or spec.name
+        if spec.kind == "monster":
+            return TableMonster(display_name, spec.hp, spec.max_hp, spec.speed, buffs,
+                                tuple(self.action(action) for action in spec.actions))
+        return Character(display_name, spec.hp, spec.max_hp, spec.speed, buffs,
+                         *(self.item(item) for item in spec.equipment))
+
+    def team(self, *names: str) -> list[CombatantMixIn]:
+        return [self.combatant(name) for name in names]
+
+    def __repr__(self):
+        return f"Content({len(self.buffs)} buffs, {len(self.actions)} actions, " \
+               f"{len(self.equipment)} equipment, {len(self.combatants)} combatants)"
+
+
+def _targeting(spec: TargetSpec) -> Targeting:
+    friendly, selective, positions = spec
+    return Targeting(friendly, selective, *positions)
+
+
+def load_content(directory: str = CONTENT_DIR, cache: bool = True) -> Content:
+    """
+    load the tables of a directory: buffs.csv, actions.csv, effects.csv, equipment.csv and combatants.csv.
+    the compiled tables are cached in the user's cache directory, $XDG_CACHE_HOME or ~/.cache,
+    keyed by the hash of the files, so later loads of the same files skip parsing.
+    a cache that cannot be read is parsed again, one that cannot be written is skipped.
+    @param cache: read and write the compiled cache
+    """
+    tables = {}
+    digest = hashlib.sha256(str(CONTENT_FORMAT).encode())
+    for table in CONTENT_TABLES:
+        path = os.path.join(directory, f"{table}.csv")
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                tables[table] = file.read()
+            digest.update(table.encode() + b"\0" + tables[table] + b"\0")
+    cache_dir = _cache_dir(directory)
+    cache_path = os.path.join(cache_dir, f"content-{digest.hexdigest()[:32]}.pickle")
+    if cache and os.path.exists(cache_path):
+        try:
+            return Content(*_read_cache(cache_path))
+        except Exception:
+            pass  # stale, truncated or written by an incompatible version: parse the tables again
+    compiled = compile_tables(tables)
+    if cache:
+        _write_cache(cache_dir, cache_path, compiled)
+    return Content(*compiled)
+
+
+def _cache_dir(directory: str) -> str:
+    """
+    the cache of a content directory, one per directory under the user's cache directory,
+    as the package directory may be read-only or shared between users
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    key = hashlib.sha256(os.path.abspath(directory).encode()).hexdigest()[:16]
+    return os.path.join(base, "basics", f"content-{key}")
+
+
+def _read_cache(cache_path: str) -> tuple:
+    # the tables unpickle into many thousands of small acyclic objects, collections while they load are wasted
+    # work and take about a third of the load: pause the collector, and put back whatever state it had
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(cache_path, "rb") as file:
+            return pickle.load(file)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _write_cache(cache_dir: str, cache_path: str, compiled: tuple):
+    import glob
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(cache_dir, "content-*.pickle")):
+            os.remove(stale)
+        temp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as file:
+            pickle.dump(compiled, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, cache_path)
+    except OSError:
+        pass  # an unwritable cache directory only costs the parsing next time
@@ -5,6 +5,8 @@ from .reqirements import *
 
 
 class HealTarget(Effect):
+    __slots__ = ("amount",)
+
     def __init__(self, amount: tuple[int, int]):
         super().__init__()
         self.amount = amount
@@ -17,6 +19,8 @@ class HealTarget(Effect):
 
 
 class Damage(Effect):
+    __slots__ = ("amount", "baton")
+
     def __init__(self, amount: tuple[int, int], baton: dict[str, Any] = None):
         super().__init__()
         self.amount = amount
@@ -32,13 +36,15 @@ class Damage(Effect):
 
 
 class MoveTo(Effect):
+    __slots__ = ("distance",)
+
     def __init__(self, distance: int):
         super().__init__()
         self.distance = distance
 
     def execute(self, receiver: CombatantMixIn, target: Optional[Targeting], baton):
         position = target[0]
-        if position < 0 or position > 5:
+        if position < 0 or position >= receiver.arena.width:
             raise ValueError("Invalid position")
         if receiver.index - position > self.distance:
             raise ValueError("Too far")
@@ -46,6 +52,8 @@ class MoveTo(Effect):
 
 
 class AddSelfBuff(Effect):
+    __slots__ = ("buff",)
+
     def __init__(self, buff: Buff):
         super().__init__()
         self.buff = buff
@@ -55,6 +63,8 @@ class AddSelfBuff(Effect):
 
 
 class AddProtected(Effect):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
@@ -64,6 +74,8 @@ class AddProtected(Effect):
 
 
 class ApplyTargetBuff(Effect):
+    __slots__ = ("buff",)
+
     def __init__(self, buff: Buff):
         super().__init__()
         self.buff = buff
@@ -76,6 +88,8 @@ class ApplyTargetBuff(Effect):
 
 
 class ProtectTarget(Effect):
+    __slots__ = ("stack",)
+
     def __init__(self, stack: int = 3):
         super().__init__()
         self.stack = stack
@@ -88,6 +102,8 @@ class ProtectTarget(Effect):
 
 
 class ConditionalEffect(Effect):
+    __slots__ = ("condition", "effect1", "effect2")
+
     def __init__(self, condition: PreReqm, effect1: Effect, effect2: Effect):
         super().__init__()
         self.condition = condition
@@ -102,6 +118,8 @@ class ConditionalEffect(Effect):
 
 
 class ComboConditionEffect(ConditionalEffect):
+    __slots__ = ()
+
     def __init__(self, effect1: Effect, effect2: Effect):
         super().__init__(TargetHasComboReqm(), effect1, effect2)
 
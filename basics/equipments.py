@@ -4,19 +4,24 @@ from .actions import *
 
 
 class Sword(OneHandWeapon):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(10, (1, 2))
 
     def action(self) -> tuple[Action, ...]:
-        return Bash(), Slash()
+        return shared_action(Bash), shared_action(Slash)
 
 
 class Shield(OffHand):
+    __slots__ = ()
+    timings = Timing.Defend | Timing.GetMaxHp
+
     def __init__(self):
         super().__init__()
 
     def action(self) -> tuple[Action, ...]:
-        return Defend(), Protect()
+        return shared_action(Defend), shared_action(Protect)
 
     def may_affect(self, timing: Timing, baton) -> bool:
         if timing == Timing.Defend:
@@ -37,16 +42,20 @@ class Shield(OffHand):
 
 
 class Bow(TwoHandWeapon):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(10, (0, 7))
 
     def action(self) -> tuple[Action, ...]:
-        return Aiming(), Shot()
+        return shared_action(Aiming), shared_action(Shot)
 
 
 class MagicBook(OffHand):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
     def action(self) -> tuple[Action, ...]:
-        return (Heal((4, 9)),)
\ No newline at end of file
+        return (shared_action(Heal, (4, 9)),)
\ No newline at end of file
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Iterator, Optional, TextIO
+
+
+class Event:
+    """
+    something that happened in a battle, sinks receive them in order.
+    events hold references to live objects, read what you need when the event is emitted.
+    """
+    __slots__ = ()
+
+    @property
+    def kind(self) -> str:
+        return self.__class__.__name__
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"kind": self.kind, **{name: getattr(self, name) for name in self.__slots__}}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.kind}({fields})"
+
+
+class TurnStartEvent(Event):
+    __slots__ = ("round", "combatant", "arena")
+
+    def __init__(self, round: int, combatant, arena):
+        self.round = round
+        self.combatant = combatant
+        self.arena = arena
+
+
+class DecisionEvent(Event):
+    __slots__ = ("combatant", "decision")
+
+    def __init__(self, combatant, decision):
+        self.combatant = combatant
+        self.decision = decision
+
+
+class AttackEvent(Event):
+    __slots__ = ("attacker", "defender", "attack")
+
+    def __init__(self, attacker, defender, attack):
+        self.attacker = attacker
+        self.defender = defender
+        self.attack = attack
+
+
+class MissEvent(Event):
+    __slots__ = ("defender",)
+
+    def __init__(self, defender):
+        self.defender = defender
+
+
+class CritEvent(Event):
+    __slots__ = ("defender", "damage")
+
+    def __init__(self, defender, damage: int):
+        self.defender = defender
+        self.damage = damage
+
+
+class DamageEvent(Event):
+    __slots__ = ("defender", "damage", "critted")
+
+    def __init__(self, defender, damage: int, critted: bool):
+        self.defender = defender
+        self.damage = damage
+        self.critted = critted
+
+
+class MisleadEvent(Event):
+    __slots__ = ("defender", "protector")
+
+    def __init__(self, defender, protector):
+        self.defender = defender
+        self.protector = protector
+
+
+class MoveEvent(Event):
+    __slots__ = ("combatant", "source", "target")
+
+    def __init__(self, combatant, source: int, target: int):
+        self.combatant = combatant
+        self.source = source
+        self.target = target
+
+
+class BuffAppliedEvent(Event):
+    __slots__ = ("combatant", "buff")
+
+    def __init__(self, combatant, buff):
+        self.combatant = combatant
+        self.buff = buff
+
+
+class DeathEvent(Event):
+    __slots__ = ("combatant",)
+
+    def __init__(self, combatant):
+        self.combatant = combatant
+
+
+class BattleEndEvent(Event):
+    __slots__ = ("round",)
+
+    def __init__(self, round: int):
+        self.round = round
+
+
+class EventSink:
+    """
+    receiver of battle events.
+    the hot path checks enabled before building an event, so a disabled sink costs one attribute read.
+    """
+    enabled = True
+
+    def emit(self, event: Event):
+        pass
+
+
+class NullSink(EventSink):
+    enabled = False
+
+
+class RingBufferSink(EventSink):
+    """
+    keep the latest events in memory
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.events: deque[Event] = deque(maxlen=capacity)
+
+    def emit(self, event: Event):
+        self.events.append(event)
+
+    def of_type(self, *kinds: type[Event]) -> list[Event]:
+        return [event for event in self.events if isinstance(event, kinds)]
+
+    def clear(self):
+        self.events.clear()
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+
+class ConsoleSink(EventSink):
+    """
+    print the battle the way the arena always did
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def emit(self, event: Event):
+        if isinstance(event, TurnStartEvent):
+            self.turn_start(event)
+        elif isinstance(event, DamageEvent):
+            critted_str = "critted" if event.critted else ""
+            self.print(f"{event.defender.name} suffer {event.damage} damage, {event.defender.hp} left {critted_str}")
+        elif isinstance(event, MissEvent):
+            self.print(f"{event.defender.name} missed")
+        elif isinstance(event, DecisionEvent):
+            self.print(f"{event.combatant} decided to {event.decision}\n")
+        elif isinstance(event, MisleadEvent):
+            self.print(f"mislead to {event.protector}")
+        elif isinstance(event, BattleEndEvent):
+            self.print("End")
+
+    def turn_start(self, event: TurnStartEvent):
+        combatant, arena = event.combatant, event.arena
+        self.print(f"{combatant}".ljust(143, '-'))
+        if not combatant.dead and combatant in arena.left:
+            self.print(arena.get_arena_info())
+            self.print(arena.get_current_actions_description())
+
+    def print(self, text: str):
+        print(text, file=self.stream)
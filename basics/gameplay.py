@@ -1,21 +1,40 @@
 from __future__ import annotations
 
 import copy
+import heapq
+import itertools
 from abc import abstractmethod, ABC
+from contextvars import ContextVar
 from enum import Enum
 from functools import singledispatchmethod
 from random import Random
-from typing import Optional, NoReturn, Sequence, Any, Callable
+from typing import Optional, NoReturn, Sequence, Any, Callable, Iterator, Union
 
 from .KEYWORDS import *
+from .baton import *
+from .events import *
+from .instrument import *
 from .rand import *
+from .scheduler import *
 from .singleton import *
 from .timing import *
 
 ARENA_WIDTH = 4
 
+_versions = itertools.count(1)
+
+
+def next_version() -> int:
+    """
+    versions are unique across all containers, so a new container never looks unchanged
+    """
+    return next(_versions)
+
 
 class FactorMixIn(ABC):
+    __slots__ = ()
+    timings: Timing = ~Timing(0)  # the timings may_affect can return True for
+
     def affect(self, timing: Timing, baton) -> NoReturn:
         pass
 
@@ -36,6 +55,39 @@ class FactorMixIn(ABC):
         pass
 
 
+class FactorIndex(dict[Timing, tuple[FactorMixIn, ...]]):
+    """
+    factors grouped by the timings they registered for, keeping the order they were given in
+    """
+
+    def __init__(self, factors: Sequence[FactorMixIn, ...], version: tuple[int, ...]):
+        super().__init__()
+        self.version = version
+        grouped: dict[Timing, list[FactorMixIn]] = {}
+        for factor in factors:
+            if type(factor).may_affect is FactorMixIn.may_affect:
+                continue
+            for timing in self.split(factor.timings):
+                grouped.setdefault(timing, []).append(factor)
+        for timing, registered in grouped.items():
+            self[timing] = tuple(registered)
+
+    def __missing__(self, timing: Timing) -> tuple[FactorMixIn, ...]:
+        return ()
+
+    _members: dict[int, tuple[Timing, ...]] = {}
+
+    @classmethod
+    def split(cls, timings: Timing) -> tuple[Timing, ...]:
+        """
+        the single timings of a combination, cached since flag arithmetic is slow
+        """
+        members = cls._members.get(timings)
+        if members is None:
+            members = cls._members[timings] = tuple(timing for timing in Timing if timing & timings)
+        return members
+
+
 ONLY_SELF = -1
 EXCEPT_SELF = -2
 
@@ -47,6 +99,7 @@ class Position(tuple[bool, int, ...]):
     -1 means the caster itself
     -2 means everywhere but the caster itself
     """
+    __slots__ = ()
 
     def include(self, pos: int) -> bool:
         return pos in self[1:]
@@ -60,6 +113,10 @@ class TargetingError(ValueError):
     pass
 
 
+TARGETING_CACHE_SIZE = 4096
+_targetings: dict[tuple[bool, bool, tuple[int, ...]], Targeting] = {}
+
+
 class Targeting:
     """
     first element is a bool, indicating whether its ally or enemy
@@ -67,12 +124,48 @@ class Targeting:
     rest elements are int, indicating the positions of the targets
         -1 means the caster itself
     -2 means everywhere but the caster itself
+    targetings are immutable, the same values give the same instance while the cache has room
     """
+    __slots__ = ("friendly", "selective", "positions")
+
+    def __new__(cls, friendly: bool = True, selective: bool = False, *args: int) -> Targeting:
+        key = (friendly, selective, args)
+        targeting = _targetings.get(key)
+        if targeting is not None and cls is Targeting:
+            return targeting
+        targeting = object.__new__(cls)
+        object.__setattr__(targeting, "friendly", friendly)
+        object.__setattr__(targeting, "selective", selective)
+        object.__setattr__(targeting, "positions", args)
+        if cls is Targeting and len(_targetings) < TARGETING_CACHE_SIZE:
+            _targetings[key] = targeting
+        return targeting
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Targeting):
+            return (self.friendly, self.selective, self.positions) == \
+                (other.friendly, other.selective, other.positions)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.friendly, self.selective, self.positions))
+
+    def __reduce__(self):
+        return self.__class__, (self.friendly, self.selective, *self.positions)
+
+    def __copy__(self):
+        return self
 
-    def __init__(self, friendly: bool = True, selective: bool = False, *args: int) -> None:
-        self.friendly = friendly
-        self.selective = selective
-        self.positions = args
+    def __deepcopy__(self, memo):
+        return self
 
     def __index__(self):
         return self.positions
@@ -104,17 +197,18 @@ class Targeting:
     def selfless(self) -> bool:
         return len(self) == 1 and self[0] == EXCEPT_SELF
 
-    def alt(self, position: Position) -> Targeting:
+    def alt(self, position: Position, width: int = ARENA_WIDTH) -> Targeting:
         """
         interpret the position and return a new Targeting
         @rtype: Targeting
         @param position:
+        @param width: slots of a team, Arena.width for the arena the position is in
         @return:
         """
         if self.selfhood:
             return Targeting(self.friendly, self.selective, position[1])
         elif self.selfless:
-            others = list(range(ARENA_WIDTH))
+            others = list(range(width))
             others.remove(position[1])
             return Targeting(self.friendly, self.friendly, *others)
         else:
@@ -126,8 +220,8 @@ class Targeting:
         else:
             return Targeting(self.friendly, self.selective, rand.choice(self))
 
-    def choose(self, pos: int) -> Targeting:
-        if pos >= ARENA_WIDTH:
+    def choose(self, pos: int, width: int = ARENA_WIDTH) -> Targeting:
+        if pos >= width:
             raise TargetingError("position out of range")
         if not self.selective:
             return self
@@ -135,16 +229,13 @@ class Targeting:
             return Targeting(self.friendly, self.selective, pos)
 
     def set_friendliness(self, friendly: bool) -> Targeting:
-        self.friendly = friendly
-        return self
+        return Targeting(friendly, self.selective, *self.positions)
 
     def set_selectiveness(self, selective: bool) -> Targeting:
-        self.selective = selective
-        return self
+        return Targeting(self.friendly, selective, *self.positions)
 
     def set_positions(self, *args: int) -> Targeting:
-        self.positions = args
-        return self
+        return Targeting(self.friendly, self.selective, *args)
 
     @staticmethod
     def only_self() -> Targeting:
@@ -155,12 +246,12 @@ class Targeting:
         return Targeting(True, True, EXCEPT_SELF)
 
     @staticmethod
-    def all_ally() -> Targeting:
-        return Targeting(True, False, *range(ARENA_WIDTH))
+    def all_ally(width: int = ARENA_WIDTH) -> Targeting:
+        return Targeting(True, False, *range(width))
 
     @staticmethod
-    def all_enemy() -> Targeting:
-        return Targeting(False, False, *range(ARENA_WIDTH))
+    def all_enemy(width: int = ARENA_WIDTH) -> Targeting:
+        return Targeting(False, False, *range(width))
 
     @staticmethod
     def selective_ally(*args: int) -> Targeting:
@@ -181,6 +272,8 @@ class Targeting:
 
 # region Buffs
 class Buff(FactorMixIn, ABC):
+    __slots__ = ("owner",)  # the Buffs holding it, told when the buff may have expired
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -204,13 +297,31 @@ class Buff(FactorMixIn, ABC):
         pass
 
     def on_expire(self):
-        pass
+        owner = getattr(self, "owner", None)
+        if owner is not None:
+            owner._expiring(self)
 
     def clone(self):
-        return copy.deepcopy(self)
+        owner = getattr(self, "owner", None)
+        self.owner = None
+        try:
+            return copy.deepcopy(self)
+        finally:
+            self.owner = owner
+
+    def get_state(self) -> Any:
+        """
+        the mutable part of the buff, as a value
+        """
+        return None
+
+    def set_state(self, state: Any):
+        pass
 
 
 class Timer(list[int, int]):
+    __slots__ = ()
+
     def __init__(self, duration: int, stack: int = 1):
         super().__init__([duration, stack])
 
@@ -219,35 +330,62 @@ class Timer(list[int, int]):
 
 
 class IndBuff(Buff, ABC):  # independent refresh time buff
+    """
+    every stack keeps its own time, stored as a min heap of (expiry round, order, stack).
+    the expiry round is absolute on the buff's own clock, so a turn end only advances the clock
+    and pops what has run out, the shortest timer is always on top.
+    """
+    __slots__ = ("clock", "_order", "_heap")
+
     def __init__(self, duration: int = 3, stack: int = 1):
-        self.timers = [Timer(duration, stack)]
+        self.owner = None
+        self.clock = 0
+        self._order = 1
+        self._heap: list[tuple[int, int, int]] = [(duration, 0, stack)]
+
+    def push(self, duration: int, stack: int = 1):
+        heapq.heappush(self._heap, (self.clock + duration, self._order, stack))
+        self._order += 1
 
     def add(self, ind_buff: IndBuff):
-        self.timers.append(ind_buff.timers[0])
+        for timer in ind_buff.timers:
+            self.push(*timer)
+
+    @property
+    def timers(self) -> list[Timer]:
+        """
+        remaining duration and stack of every timer, shortest first
+        """
+        return [Timer(expiry - self.clock, stack) for expiry, _, stack in sorted(self._heap)]
 
     def on_turn_end(self):
-        for timer in self.timers:
-            timer.tick()
-        filter(lambda t: t[0] > 0, self.timers)
+        self.clock += 1
+        heap = self._heap
+        while heap and heap[0][0] <= self.clock:
+            heapq.heappop(heap)
 
     @property
     def expire(self) -> bool:
-        return len(self.timers) == 0
+        return len(self._heap) == 0
+
+    def get_state(self) -> tuple[int, int, tuple[tuple[int, int, int], ...]]:
+        return self.clock, self._order, tuple(self._heap)
+
+    def set_state(self, state: tuple[int, int, tuple[tuple[int, int, int], ...]]):
+        self.clock, self._order, heap = state
+        self._heap = list(heap)
 
     def after_affect(self, timing: Timing, baton: dict[str, Any]) -> NoReturn:
-        def find_shortest() -> Timer:
-            shortest = self.timers[0]
-            for timer in self.timers:
-                if timer[0] < shortest[0]:
-                    shortest = timer
-            return shortest
-
-        self.timers.remove(find_shortest())
+        if self._heap:
+            heapq.heappop(self._heap)
         self.on_expire()
 
 
 class RefBuff(Buff, ABC):  # refresh time buff
+    __slots__ = ("duration", "stack")
+
     def __init__(self, duration: int = 3, stack: int = 1):
+        self.owner = None
         self.duration = duration
         self.stack = stack
 
@@ -263,6 +401,12 @@ class RefBuff(Buff, ABC):  # refresh time buff
     def expire(self) -> bool:
         return self.duration <= 0 or self.stack <= 0
 
+    def get_state(self) -> tuple[int, int]:
+        return self.duration, self.stack
+
+    def set_state(self, state: tuple[int, int]):
+        self.duration, self.stack = state
+
     def after_affect(self, timing: Timing, baton: dict[str, Any]) -> NoReturn:
         self.stack -= 1
         self.on_expire()
@@ -273,41 +417,142 @@ class RefBuff(Buff, ABC):  # refresh time buff
             self.on_expire()
 
 
-class Buffs(list[Buff]):
+class Buffs:
+    """
+    buffs of a combatant keyed by name, in the order they were first added.
+    a buff calling on_expire only becomes a candidate, candidates are dropped the next time the buffs are read,
+    and the turn end drops everything expired in a single pass.
+    the combatant owning the buffs is told whenever a buff that may change its speed comes, goes or may expire.
+    """
+
     def __init__(self, *args: Buff):
-        super().__init__(args)
-        for buff in self:
-            buff.on_expire = self.check_expire
+        self._buffs: dict[str, Buff] = {}
+        self._pending: list[Buff] = []
+        self._version = next_version()
+        self.owner: Optional[CombatantMixIn] = None
+        for buff in args:
+            self._insert(buff)
+
+    def _insert(self, buff: Buff):
+        if buff.name in self._buffs:
+            self._buffs[buff.name].add(buff)
+            return
+        self._buffs[buff.name] = buff
+        buff.owner = self
 
-    def add(self, buff: Buff):
-        for b in self:
-            if b.name == buff.name:
-                b.add(buff)
-                return
+    def _expiring(self, buff: Buff):
+        self._pending.append(buff)
+        self._speed_changed((buff,))
+
+    def _speed_changed(self, buffs: Sequence[Buff]):
+        if self.owner is not None and any(buff.timings & Timing.GetSpeed for buff in buffs):
+            self.owner.speed_changed()
 
-        self.append(buff)
-        buff.on_expire = self.check_expire
+    def add(self, buff: Buff):
+        self._version = next_version()
+        self._insert(buff)
+        self._speed_changed((buff,))
 
     def check_expire(self):
-        buffs_to_remove = []
-        for buff in self:
-            if buff.expire:
-                buffs_to_remove.append(buff)
-        for buff in buffs_to_remove:
-            self.remove(buff)
+        """
+        drop the candidates that really expired
+        """
+        pending, self._pending = self._pending, []
+        removed = []
+        for buff in pending:
+            if self._buffs.get(buff.name) is buff and buff.expire:
+                del self._buffs[buff.name]
+                removed.append(buff)
+        if removed:
+            self._version = next_version()
+            self._speed_changed(removed)
 
     def turn_end(self):
-        for buff in self:
+        expired = []
+        for buff in tuple(self._buffs.values()):
             buff.on_turn_end()
-        self.check_expire()
+            if buff.expire and self._buffs.pop(buff.name, None) is buff:
+                expired.append(buff)
+        self._pending.clear()
+        if expired:
+            self._version = next_version()
+            self._speed_changed(expired)
+
+    @property
+    def version(self) -> int:
+        if self._pending:
+            self.check_expire()
+        return self._version
+
+    def get(self, name: str, default: Optional[Buff] = None) -> Optional[Buff]:
+        if self._pending:
+            self.check_expire()
+        return self._buffs.get(name, default)
+
+    def remove(self, buff: Buff):
+        if self._buffs.get(buff.name) is not buff:
+            raise ValueError(f"{buff} not in buffs")
+        del self._buffs[buff.name]
+        self._version = next_version()
+        self._speed_changed((buff,))
+
+    def snapshot(self) -> tuple[tuple[Buff, Any], ...]:
+        return tuple((buff, buff.get_state()) for buff in self)
+
+    def restore(self, state: tuple[tuple[Buff, Any], ...]):
+        self._pending.clear()
+        if len(self._buffs) != len(state) or any(a is not b for a, (b, _) in zip(self._buffs.values(), state)):
+            self._buffs = {}
+            for buff, _ in state:
+                self._insert(buff)
+            self._version = next_version()
+        for buff, buff_state in state:
+            buff.set_state(buff_state)
+
+    def __contains__(self, item: Union[str, Buff]) -> bool:
+        if isinstance(item, str):
+            return self.get(item) is not None
+        return self.get(item.name) is item
+
+    def __getitem__(self, item: Union[int, str]) -> Buff:
+        if isinstance(item, str):
+            buff = self.get(item)
+            if buff is None:
+                raise KeyError(item)
+            return buff
+        return list(self)[item]
+
+    def __iter__(self) -> Iterator[Buff]:
+        if self._pending:
+            self.check_expire()
+        return iter(self._buffs.values())
+
+    def __len__(self):
+        if self._pending:
+            self.check_expire()
+        return len(self._buffs)
+
+    def __eq__(self, other):
+        if isinstance(other, Buffs):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other: Sequence[Buff]) -> list:
+        return list(self) + list(other)
 
     def __repr__(self):
         return ",".join([str(buff) for buff in self])
 
 
 class Attack:
+    __slots__ = ("amount", "mag", "acc", "crit", "missed", "critted", "rand")
+
     def __init__(self, amount: tuple[int, int], mag: float = 1.0, acc: float = 1.0, crit: float = 0,
-                 missed: Optional[bool] = None, critted: Optional[bool] = None):
+                 missed: Optional[bool] = None, critted: Optional[bool] = None, rand: Random = None):
         """
 
         @param amount: min and max damage
@@ -316,6 +561,7 @@ class Attack:
         @param crit: chance to crit, 0 means can't crit, between 0 and 1 means can crit
         @param missed: None means haven't checked yet, True means missed, False means not missed
         @param critted: None means haven't checked yet, True means critted, False means not critted
+        @param rand: where the rolls come from, game_random by default
         """
         self.amount = amount
         self.mag = mag
@@ -323,9 +569,10 @@ class Attack:
         self.crit = crit
         self.missed = missed
         self.critted = critted
+        self.rand = rand if rand is not None else game_random
 
     def miss_check(self) -> bool:
-        self.missed = game_random.random() > self.acc
+        self.missed = self.rand.random() > self.acc
         self.acc = 1.0
         return self.missed
 
@@ -338,6 +585,31 @@ class Attack:
         return self.amount[1]
 
 
+class CacheStats:
+    """
+    hit and miss counters of the derived stat caches
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"hits: {self.hits}, misses: {self.misses}, hit rate: {self.hit_rate:.2%}"
+
+
+stat_cache_stats = CacheStats()
+
+
 class CombatantMixIn(ABC):
     def __init__(self, name: str, cur_hp: int, base_max_hp: int, base_speed: int, buffs: Buffs = None):
         self.name = name
@@ -345,46 +617,82 @@ class CombatantMixIn(ABC):
         self.base_max_hp = base_max_hp
         self.base_speed = base_speed
         self.buffs = buffs or Buffs()
+        self.brain: Optional[Brain] = None
+        self._arena: Optional[Arena] = None
+        self.damage_dealt = 0
+        self._factor_index: Optional[FactorIndex] = None
 
         self.cache_max_hp = None
         self.cache_speed = None
+        self._max_hp_version = None
+        self._speed_version = None
 
     def _set_speed(self):
         self.cache_speed = self.base_speed
-        kwargs = {THIS: self}
-        self.modify(timing=Timing.GetSpeed, **kwargs)
+        self.modify(timing=Timing.GetSpeed, baton=Baton.of(this=self))
 
     def _set_max_hp(self):
         self.cache_max_hp = self.base_max_hp
-        kwargs = {THIS: self}
-        self.modify(timing=Timing.GetMaxHp, baton=kwargs)
+        self.modify(timing=Timing.GetMaxHp, baton=Baton.of(this=self))
 
     @property
     def dead(self) -> bool:
         return self.cur_hp <= 0
 
-    def suffer(self, attack: Attack) -> NoReturn:
+    def suffer(self, attack: Attack) -> int:
+        """
+        @return: the damage actually dealt, 0 if missed
+        """
+        resolver = _resolver.get()
+        if resolver is not None and resolver.arena is self._arena:
+            return resolver.suffer(self, attack)
+        sink = self.sink
         if attack.missed:
-            print(f"{self.name} missed")
-            return
+            if sink.enabled:
+                sink.emit(MissEvent(self))
+            return 0
         if attack.critted is None:
-            attack.critted = game_random.random() < attack.crit
+            attack.critted = attack.rand.random() < attack.crit
         if attack.critted:
             dmg = int(attack.min * attack.mag * 1.5)
         else:
-            dmg = int(game_random.randint(attack.min, attack.max) * attack.mag)
+            dmg = int(attack.rand.randint(attack.min, attack.max) * attack.mag)
+        alive = not self.dead
         self.cur_hp -= dmg
-        critted_str = "critted" if attack.critted else ""
-        print(f"{self.name} suffer {dmg} damage, {self.hp} left {critted_str}")
+        if sink.enabled:
+            if attack.critted:
+                sink.emit(CritEvent(self, dmg))
+            sink.emit(DamageEvent(self, dmg, attack.critted))
+            if alive and self.dead:
+                sink.emit(DeathEvent(self))
+        return dmg
 
     @property
     def max_hp(self) -> int:
-        self._set_max_hp()
+        """
+        cached until the factors or the base value change
+        """
+        version = self.factor_version + (self.base_max_hp,)
+        if self._max_hp_version == version:
+            stat_cache_stats.hits += 1
+        else:
+            stat_cache_stats.misses += 1
+            self._set_max_hp()
+            self._max_hp_version = version
         return self.cache_max_hp
 
     @property
     def speed(self) -> int:
-        self._set_speed()
+        """
+        cached until the factors or the base value change
+        """
+        version = self.factor_version + (self.base_speed,)
+        if self._speed_version == version:
+            stat_cache_stats.hits += 1
+        else:
+            stat_cache_stats.misses += 1
+            self._set_speed()
+            self._speed_version = version
         return self.cache_speed
 
     @property
@@ -395,37 +703,68 @@ class CombatantMixIn(ABC):
     def factors(self, timing: Timing, baton: dict[str, Any]) -> Sequence[FactorMixIn, ...]:
         pass
 
+    def factor_sources(self) -> Sequence[FactorMixIn, ...]:
+        return self.buffs
+
+    @property
+    def factor_version(self) -> tuple[int, ...]:
+        """
+        changes whenever factor_sources may have changed
+        """
+        return (self.buffs.version,)
+
+    def registered_factors(self, timing: Timing) -> tuple[FactorMixIn, ...]:
+        """
+        the factors registered for the timing, the index is rebuilt only when factor_version changes
+        """
+        index = self._factor_index
+        version = self.factor_version
+        if index is None or index.version != version:
+            index = self._factor_index = FactorIndex(self.factor_sources(), version)
+        return index[timing]
+
     def heal(self, amount: tuple[int, int], baton) -> NoReturn:
-        self.cur_hp = min(self.cur_hp + game_random.randint(amount[0], amount[1]), self.max_hp)
+        resolver = _resolver.get()
+        if resolver is not None and resolver.arena is self._arena:
+            return resolver.heal(self, amount, baton)
+        self.cur_hp = min(self.cur_hp + self.arena.rand.randint(amount[0], amount[1]), self.max_hp)
 
-    def attack(self, enemy: CombatantMixIn, amount: tuple[int, int], baton: dict[str, Any], crit=.15) -> None:
+    def attack(self, enemy: CombatantMixIn, amount: tuple[int, int], baton: Baton, crit=.15) -> None:
         """
         Attack the enemy.
         @param crit:
         @param enemy:
         @param amount:
-        @param baton: passed to factors
+        @param baton: passed to factors, a dict is copied into a new Baton
         @return:
         """
         if enemy is None or enemy.dead:
             return
-        attack = Attack(amount, crit=crit)
-        attack.missed = baton.get(MISSED, None)
-        attack.critted = baton.get(CRITTED, None)
-        baton.update({ATTACKER: self, ATTACK: attack, DEFENDER: enemy})
+        if baton.__class__ is not Baton:
+            baton = Baton.of(baton)
+        arena = self.arena
+        attack = Attack(amount, crit=crit, rand=arena.rand)
+        attack.missed = baton.missed
+        attack.critted = baton.critted
+        baton.attacker = self
+        baton.attack = attack
+        baton.defender = enemy
+        sink = arena.sink
+        if sink.enabled:
+            sink.emit(AttackEvent(self, enemy, attack))
         factors = self.modify(Timing.Attack, baton)
         self.after_affect(Timing.Attack, factors, baton)
         if attack.missed is None:
-            baton[MISSED] = attack.miss_check()
+            baton.missed = attack.miss_check()
         if attack.missed is True:
             return
         another = enemy.mislead(attack, self, baton)
         attack = another.defend(attack, self, baton)
         if attack.missed is False:
-            baton[MISSED] = attack.miss_check()
-        another.suffer(attack)
+            baton.missed = attack.miss_check()
+        self.damage_dealt += another.suffer(attack)
 
-    def mislead(self, attack: Attack, attacker: CombatantMixIn, baton: dict[str, Any]) -> CombatantMixIn:
+    def mislead(self, attack: Attack, attacker: CombatantMixIn, baton: Baton) -> CombatantMixIn:
         """
         when a target is going to be attacked by someone else, mislead will try someone else to
         take the attack for me.
@@ -436,35 +775,42 @@ class CombatantMixIn(ABC):
         """
         factors = self.modify(Timing.Mislead, baton)
         self.after_affect(Timing.Mislead, factors, baton)
-        return baton.get(MISLEAD_TARGET, self)
+        target = baton.mislead_target if baton.__class__ is Baton else baton.get(MISLEAD_TARGET)
+        return self if target is None else target
 
-    def defend(self, attack: Attack, enemy: CombatantMixIn, baton: dict[str, Any]) -> Attack:
+    def defend(self, attack: Attack, enemy: CombatantMixIn, baton: Baton) -> Attack:
         factors = self.modify(Timing.Defend, baton)
         self.after_affect(Timing.Defend, factors, baton)
         return attack
 
     def moved(self, target: int):
-        kws = {TARGET_POSITION: target}
-        factors = self.modify(Timing.Move, kws)
-        self.after_affect(Timing.Move, factors, kws)
+        baton = Baton.of(target_position=target)
+        factors = self.modify(Timing.Move, baton)
+        self.after_affect(Timing.Move, factors, baton)
 
-    def move(self, target: int, baton: dict[str, Any] = None):
-        baton = baton.update({TARGET_POSITION: target}) if baton else {TARGET_POSITION: target}
+    def move(self, target: int, baton: Baton = None):
+        baton = Baton.of(baton)
+        baton.target_position = target
         factors = self.modify(Timing.Move, baton)
-        Arena().move(self, target)
+        self.arena.move(self, target)
         self.after_affect(Timing.Move, factors, baton)
 
     def add_buff(self, buff: Buff, baton):
         b = buff.clone()
-        baton.update({BUFF: b})
+        baton[BUFF] = b
         factors = self.modify(Timing.Buffed, baton)
         self.buffs.add(b)
+        sink = self.sink
+        if sink.enabled:
+            sink.emit(BuffAppliedEvent(self, b))
         self.after_affect(Timing.Buffed, factors, baton)
 
     def die(self):
         pass
 
     def modify(self, timing: Timing, baton: dict[str, Any]) -> Sequence[FactorMixIn]:
+        if instruments.enabled:
+            return instruments.modify(self, timing, baton)
         factors = self.factors(timing, baton)
         for factor in factors:
             factor.affect(timing, baton)
@@ -472,22 +818,57 @@ class CombatantMixIn(ABC):
 
     @staticmethod
     def after_affect(timing: Timing, factors: Sequence[FactorMixIn], baton: dict[str, Any]) -> NoReturn:
+        if instruments.enabled:
+            return instruments.after_affect(timing, factors, baton)
         for factor in factors:
             factor.after_affect(timing, baton)
 
     def find_target(self, target: Targeting, filtor: Callable[[CombatantMixIn], bool] = None) -> \
             Sequence[Optional[CombatantMixIn], ...]:
-        return Arena().find_target(self, target, filtor)
+        return self.arena.find_target(self, target, filtor)
+
+    @property
+    def arena(self) -> Arena:
+        """
+        the arena the combatant was placed in, or the current arena if it was never placed
+        """
+        return self._arena if self._arena is not None else Arena()
+
+    @arena.setter
+    def arena(self, arena: Optional[Arena]):
+        self._arena = arena
+
+    @property
+    def buffs(self) -> Buffs:
+        return self._buffs
+
+    @buffs.setter
+    def buffs(self, buffs: Buffs):
+        buffs.owner = self
+        self._buffs = buffs
+
+    def speed_changed(self):
+        """
+        something that may change the speed came or went, a combatant waiting in its arena's order is put back in line
+        """
+        if self._arena is not None:
+            self._arena.rekey(self)
 
     @property
     def index(self) -> int:
-        return Arena().find_index(self)
+        return self.arena.find_index(self)
+
+    @property
+    def sink(self) -> EventSink:
+        return self.arena.sink
 
     @property
     def position(self) -> Position:
-        return Arena().find_position(self)
+        return self.arena.find_position(self)
 
     def take(self, action: Action, target: Optional[Targeting]):
+        if instruments.enabled:
+            return instruments.execute_action(action, self, target)
         action.execute(self, target)
 
     def execute(self, decision: Decision) -> NoReturn:
@@ -509,6 +890,7 @@ class CombatantMixIn(ABC):
     @max_hp.setter
     def max_hp(self, value):
         self.cache_max_hp = value
+        self._max_hp_version = self.factor_version + (self.base_max_hp,)
 
     def on_turn_start(self):
         pass
@@ -516,48 +898,248 @@ class CombatantMixIn(ABC):
     def on_turn_end(self):
         self.buffs.turn_end()
 
+    def snapshot(self) -> tuple:
+        return self.cur_hp, self.damage_dealt, self.buffs.snapshot()
+
+    def restore(self, state: tuple):
+        self.cur_hp, self.damage_dealt, buffs = state[:3]
+        self.buffs.restore(buffs)
+
+
+_current_arena: ContextVar[Optional[Arena]] = ContextVar("current_arena", default=None)
+_resolver: ContextVar[Optional[Resolver]] = ContextVar("resolver", default=None)
+
+
+class Resolver(ABC):
+    """
+    settles the rolls of one arena instead of the arena itself, in the current context only:
+    while it is entered the arena reads rand and sink from it and its combatants suffer and heal through it.
+    the arena and its combatants are not rebound, another thread or task sees the arena as it is.
+    """
+
+    def __init__(self, arena: Arena, rand: Random, sink: EventSink):
+        self.arena = arena
+        self.rand = rand
+        self.sink = sink
+        self._token = None
+
+    @abstractmethod
+    def suffer(self, combatant: CombatantMixIn, attack: Attack) -> int:
+        pass
+
+    @abstractmethod
+    def heal(self, combatant: CombatantMixIn, amount: tuple[int, int], baton) -> None:
+        pass
+
+    def __enter__(self) -> Resolver:
+        self._token = _resolver.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _resolver.reset(self._token)
+        self._token = None
+
+
+class Arena:
+    """
+    combatants placed in an arena are bound to it, so any number of arenas can fight at the same time,
+    in threads or asyncio tasks.
+    Arena() without teams returns the current arena: the one running in this context,
+    else the one created last.
+    the side and slot of every combatant are kept in a map, so position lookups do not scan the teams.
+    a combatant new to the arena goes in with place() or a team setter, a team rearranged in place is
+    picked up on the next lookup of a moved combatant.
+    """
+    _rand: Random = game_random
+    ai_rand: Optional[Random] = None
+    _latest: Optional[Arena] = None
+
+    def __new__(cls, left: list[Optional[CombatantMixIn], ...] = None,
+                right: list[Optional[CombatantMixIn], ...] = None, sink: EventSink = None,
+                seed: Union[int, SeedSequence, None] = None, scheduler: TurnScheduler = None):
+        if left is None and right is None:
+            active = cls.active()
+            if active is not None:
+                return active
+        return super().__new__(cls)
 
-class Arena(SingletonMixIn):
     def __init__(self, left: list[Optional[CombatantMixIn], ...] = None,
-                 right: list[Optional[CombatantMixIn], ...] = None):
+                 right: list[Optional[CombatantMixIn], ...] = None, sink: EventSink = None,
+                 seed: Union[int, SeedSequence, None] = None, scheduler: TurnScheduler = None):
         """
         create a new arena or load from the previous one if left and right are None.
         @param left:
         @param right:
+        @param sink: receives the battle events, prints them to the console by default
+        @param seed: gives the arena its own streams for combat rolls and AI choices,
+        None keeps using game_random and the AI brain's own generator
+        @param scheduler: decides who acts next, everyone once a round by speed by default,
+        ATBScheduler() lets fast combatants act more often
         """
         if left is None and right is None:
-            return
+            if hasattr(self, "left"):
+                return
+            left, right = [], []
         self._current = None
         self._round = 0
-        self.left = left
-        self.right = right
-        self.action_order: list[CombatantMixIn] = []
+        self._positions: dict[CombatantMixIn, Position] = {}
+        self._left = left
+        self._right = right
+        self.reindex()
+        self.scheduler = scheduler if scheduler is not None else TurnScheduler()
+        self.sink = sink if sink is not None else ConsoleSink()
+        if seed is not None:
+            self.rand, self.ai_rand = BattleRandom(seed).spawn(2)
+        for combatant in left + right:
+            if combatant is not None:
+                combatant.arena = self
+        self.activate()
+
+    @property
+    def rand(self) -> Random:
+        """
+        where the combat rolls come from, a Resolver entered for the arena in this context takes over
+        """
+        resolver = _resolver.get()
+        return self._rand if resolver is None or resolver.arena is not self else resolver.rand
+
+    @rand.setter
+    def rand(self, rand: Random):
+        self._rand = rand
+
+    @property
+    def sink(self) -> EventSink:
+        """
+        receives the battle events, a Resolver entered for the arena in this context takes over
+        """
+        resolver = _resolver.get()
+        return self._sink if resolver is None or resolver.arena is not self else resolver.sink
+
+    @sink.setter
+    def sink(self, sink: EventSink):
+        self._sink = sink
+
+    @property
+    def action_order(self) -> list[CombatantMixIn]:
+        """
+        the combatants still to act this round, in acting order
+        """
+        return self.scheduler.order()
+
+    @action_order.setter
+    def action_order(self, order: Sequence[CombatantMixIn]):
+        self.scheduler.load(order)
+
+    def __getnewargs__(self):
+        # copy and pickle must build a new arena instead of getting the active one back
+        return [], []
+
+    @classmethod
+    def active(cls) -> Optional[Arena]:
+        active = _current_arena.get()
+        return active if active is not None else cls._latest
+
+    def activate(self):
+        """
+        make this the arena Arena() returns in the current context
+        """
+        _current_arena.set(self)
+        Arena._latest = self
+
+    @property
+    def left(self) -> list[Optional[CombatantMixIn]]:
+        return self._left
+
+    @left.setter
+    def left(self, team: list[Optional[CombatantMixIn]]):
+        self._left = team
+        self.reindex()
+
+    @property
+    def right(self) -> list[Optional[CombatantMixIn]]:
+        return self._right
+
+    @right.setter
+    def right(self, team: list[Optional[CombatantMixIn]]):
+        self._right = team
+        self.reindex()
+
+    def reindex(self):
+        """
+        rebuild the position map from the teams
+        """
+        positions = {}
+        for left, team in ((True, self._left), (False, self._right)):
+            for i, combatant in enumerate(team):
+                if combatant is not None:
+                    positions[combatant] = Position([left, i])
+        self._positions = positions
+
+    def locate(self, combatant: CombatantMixIn) -> Optional[Position]:
+        """
+        @return: the side and slot of the combatant, None if it is not in the arena
+        """
+        pos = self._positions.get(combatant)
+        if pos is None:
+            return None
+        team = self._left if pos[0] else self._right
+        if pos[1] < len(team) and team[pos[1]] is combatant:
+            return pos
+        # the teams were rearranged in place, bring the map up to date
+        self.reindex()
+        return self._positions.get(combatant)
+
+    @property
+    def width(self) -> int:
+        """
+        the slots a side may be targeted in, ARENA_WIDTH or more for wider teams
+        """
+        return max(ARENA_WIDTH, len(self._left), len(self._right))
+
+    def __contains__(self, combatant: CombatantMixIn) -> bool:
+        return self.locate(combatant) is not None
+
+    def place(self, combatant: Optional[CombatantMixIn], left: bool, index: int):
+        """
+        put the combatant in a slot, replacing whoever was there, the team grows to reach the slot
+        """
+        team = self._left if left else self._right
+        if index >= len(team):
+            team.extend([None] * (index + 1 - len(team)))
+        previous = team[index]
+        if previous is not None and self._positions.get(previous) == (left, index):
+            del self._positions[previous]
+        if combatant is not None:
+            old = self.locate(combatant)
+            if old is not None:
+                (self._left if old[0] else self._right)[old[1]] = None
+            combatant.arena = self
+            self._positions[combatant] = Position([left, index])
+        team[index] = combatant
 
     def move(self, combatant: CombatantMixIn, target: int):
         """
-        Move the combatant to the target position.
+        Move the combatant to the target position, the team grows to reach it as in place.
         and the combatants that changed position will call moved method.
         """
-        if combatant in self.left:
-            previous_position = self.left.index(combatant)  # 3
-            forward = previous_position > target  # True
-            offset = -1 if forward else 1  # -1
-            for i in range(previous_position, target, offset):
-                print(i)
-                self.left[i] = self.left[i + offset]
-                if self.left[i] is not None:
-                    self.left[i].moved(i)
-            self.left[target] = combatant
-        elif combatant in self.right:
-            previous_position = self.right.index(combatant)
-            forward = previous_position > target
-            offset = -1 if forward else 1
-            for i in range(previous_position, target, offset):
-                self.right[i] = self.right[i + offset]
-                if self.right[i] is not None:
-                    self.right[i].moved(i)
-
-            self.right[target] = combatant
+        pos = self.locate(combatant)
+        if pos is None:
+            return
+        left, previous_position = pos
+        team = self._left if left else self._right
+        if target >= len(team):
+            team.extend([None] * (target + 1 - len(team)))
+        forward = previous_position > target
+        offset = -1 if forward else 1
+        for i in range(previous_position, target, offset):
+            team[i] = team[i + offset]
+            if team[i] is not None:
+                self._positions[team[i]] = Position([left, i])
+                team[i].moved(i)
+        team[target] = combatant
+        self._positions[combatant] = Position([left, target])
+        if self.sink.enabled:
+            self.sink.emit(MoveEvent(combatant, previous_position, target))
 
     def get_current_actions(self) -> tuple[Action, ...]:
         return self.current.get_actions()
@@ -579,47 +1161,64 @@ class Arena(SingletonMixIn):
                f"Left : {[get_info(combatant) for combatant in self.left]}\n" \
                f"Right: {[get_info(combatant) for combatant in self.right]}\n"
 
-    async def run(self):
+    async def run(self, max_rounds: Optional[int] = None):
+        """
+        @param max_rounds: stop the battle once this round is reached, None means no limit
+        """
+        _current_arena.set(self)
         while True:
-            if not self.action_order:
-                self.action_order = self.get_action_order()
-                self._round += 1
-            combatant = self.action_order.pop(-1)
-            self._current = combatant
-            print(f"{combatant}".ljust(143, '-'))
-            if combatant.dead or combatant not in self.left and combatant not in self.right:
+            if max_rounds is not None and self._round >= max_rounds and self.round_over:
+                break
+            combatant = self.advance()
+            sink = self.sink
+            if sink.enabled:
+                sink.emit(TurnStartEvent(self._round, combatant, self))
+            if not self.can_act(combatant):
                 continue
-            if combatant in self.left:
-                print(self.get_arena_info())
-                print(self.get_current_actions_description())
 
             decision = await combatant.get_decision()
-            print(f"{combatant} decided to {decision}\n")
-            combatant.execute(decision)
-            combatant.on_turn_end()
-            self.clean_dead_in_order()
-            if self.is_over():
-                print("End")
+            if sink.enabled:
+                sink.emit(DecisionEvent(combatant, decision))
+            if self.take_turn(combatant, decision):
+                if sink.enabled:
+                    sink.emit(BattleEndEvent(self._round))
                 break
 
+    def advance(self) -> CombatantMixIn:
+        """
+        make the next combatant in order the current one, starting a new round when the order runs out
+        """
+        if self.round_over:
+            self.new_round()
+        combatant = self.scheduler.pop()
+        self._current = combatant
+        return combatant
+
+    def can_act(self, combatant: CombatantMixIn) -> bool:
+        return not combatant.dead and self.locate(combatant) is not None
+
+    def take_turn(self, combatant: CombatantMixIn, decision: Optional[Decision]) -> bool:
+        """
+        carry out the decision and end the combatant's turn
+        @return: whether the battle is over
+        """
+        combatant.execute(decision)
+        combatant.on_turn_end()
+        return self.is_over()
+
     def find_position(self, combatant: CombatantMixIn) -> Position:
-        if combatant in self.left:
-            return Position([True, self.left.index(combatant)])
-        if combatant in self.right:
-            return Position([False, self.right.index(combatant)])
-        raise ValueError("Combatant not in arena")
+        pos = self.locate(combatant)
+        if pos is None:
+            raise ValueError("Combatant not in arena")
+        return pos
 
     def find_index(self, combatant: CombatantMixIn) -> int:
-        if combatant in self.left:
-            return self.left.index(combatant)
-        if combatant in self.right:
-            return self.right.index(combatant)
-        raise ValueError("Combatant not in arena")
+        return self.find_position(combatant)[1]
 
     def find_target(self, combatant: CombatantMixIn, target: Targeting,
                     filtor: Callable[[CombatantMixIn], bool] = None) -> Sequence[Optional[CombatantMixIn], ...]:
         def find(li: list[CombatantMixIn], index: int) -> Optional[CombatantMixIn]:
-            return li[index]
+            return li[index] if index < len(li) else None
 
         pos = self.find_position(combatant)
 
@@ -649,18 +1248,24 @@ class Arena(SingletonMixIn):
         def not_none(c: CombatantMixIn) -> bool:
             return c is not None and not c.dead
 
-        return sorted(filter(not_none, self.left + self.right), key=lambda c: c.base_speed, reverse=True)
+        return sorted(filter(not_none, self.left + self.right), key=lambda c: c.speed, reverse=True)
 
     def start(self):
-        self.action_order = self.get_action_order()
+        # the first round is round 0, rounds passed at once before the first turn still count
+        self._round += self.scheduler.start_round(self.left + self.right) - 1
 
     @property
     def round_over(self) -> bool:
-        return len(self.action_order) == 0
+        return self.scheduler.round_over
 
     def new_round(self):
-        self.action_order = self.get_action_order()
-        self._round += 1
+        self._round += self.scheduler.start_round(self.left + self.right)
+
+    def rekey(self, combatant: CombatantMixIn):
+        """
+        the speed of the combatant changed, move it in the order of the current round
+        """
+        self.scheduler.rekey(combatant)
 
     @property
     def current(self) -> CombatantMixIn:
@@ -669,7 +1274,7 @@ class Arena(SingletonMixIn):
     def clean_dead_in_order(self):
         for combatant in self.action_order:
             if combatant.dead:
-                self.action_order.remove(combatant)
+                self.scheduler.remove(combatant)
 
     @property
     def turn(self) -> int:
@@ -681,19 +1286,59 @@ class Arena(SingletonMixIn):
 
         return all(map(is_none_or_dead, self.left)) or all(map(is_none_or_dead, self.right))
 
+    def snapshot(self) -> ArenaSnapshot:
+        """
+        capture the battle state, combatants, buffs and equipment are referenced rather than copied
+        """
+        combatants = tuple((c, c.snapshot()) for c in self.left + self.right if c is not None)
+        return ArenaSnapshot(self._round, self._current, tuple(self.left), tuple(self.right),
+                             self.scheduler.snapshot(), combatants)
+
+    def restore(self, snapshot: ArenaSnapshot):
+        """
+        put the battle back in place to the state of the snapshot
+        """
+        self._round = snapshot.round
+        self._current = snapshot.current
+        self._left[:] = snapshot.left
+        self._right[:] = snapshot.right
+        self.reindex()
+        self.scheduler.restore(snapshot.action_order)
+        for combatant, state in snapshot.combatants:
+            combatant.restore(state)
+
+
+class ArenaSnapshot:
+    __slots__ = ("round", "current", "left", "right", "action_order", "combatants")
+
+    def __init__(self, round: int, current: Optional[CombatantMixIn], left: tuple, right: tuple,
+                 action_order: tuple, combatants: tuple):
+        self.round = round
+        self.current = current
+        self.left = left
+        self.right = right
+        self.action_order = action_order
+        self.combatants = combatants
+
 
 class Requirement(ABC):
+    __slots__ = ()
+
     def __repr__(self):
         return self.__class__.__name__
 
 
 class PreReqm(Requirement, ABC):
+    __slots__ = ()
+
     @abstractmethod
     def check(self, receiver: CombatantMixIn) -> bool:
         pass
 
 
 class PostReqm(Requirement, ABC):
+    __slots__ = ()
+
     @abstractmethod
     def check(self, receiver: CombatantMixIn, targeting: Optional[Targeting]) -> Targeting:
         """
@@ -736,7 +1381,11 @@ class Action:
         @param selected_target: selected target can be None if the action is not selective
         @return:
         """
-        baton = self.baton if self.baton is not None else {}
+        baton = Baton()
+        if self.baton:
+            baton.update(self.baton)
+        if instruments.enabled:
+            return self.execute_instrumented(receiver, selected_target, baton)
         for tar_eff in self.effects:
             tar, eff = tar_eff
             if tar.selective and selected_target is None:
@@ -748,11 +1397,52 @@ class Action:
                 tar = selected_target
             eff.execute(receiver, tar, baton)
 
+    def execute_instrumented(self, receiver: CombatantMixIn, selected_target: Optional[Targeting],
+                             baton: dict[str, Any]):
+        for tar, eff in self.effects:
+            if tar.selective and selected_target is None:
+                raise TargetingError("Selective target required")
+            if not tar.selective:
+                instruments.execute_effect(eff, receiver, tar, baton)
+                return None
+            instruments.execute_effect(eff, receiver, selected_target, baton)
+
     def __repr__(self):
         return f"{self.__class__.__name__}"
 
 
+class ActionRegistry:
+    """
+    actions are immutable definitions, build each one once and share it
+    """
+
+    def __init__(self):
+        self._actions: dict[tuple[type[Action], tuple], Action] = {}
+
+    def get(self, action_type: type[Action], *args) -> Action:
+        key = (action_type, args)
+        action = self._actions.get(key)
+        if action is None:
+            action = self._actions[key] = action_type(*args)
+        return action
+
+    def clear(self):
+        self._actions.clear()
+
+    def __len__(self):
+        return len(self._actions)
+
+
+action_registry = ActionRegistry()
+
+
+def shared_action(action_type: type[Action], *args) -> Action:
+    return action_registry.get(action_type, *args)
+
+
 class Decision(tuple[Optional[Action], Optional[Targeting]]):
+    __slots__ = ()
+
     def __repr__(self):
         if self[1] is None:
             return f"{self[0]}"
@@ -765,6 +1455,8 @@ class Decision(tuple[Optional[Action], Optional[Targeting]]):
 
 # region Equipment
 class Equipment(FactorMixIn, ABC):
+    __slots__ = ()
+
     @property
     @abstractmethod
     def occupation(self) -> tuple[Slot, ...]:
@@ -783,30 +1475,40 @@ class Slot(Enum):
 
 
 class Weapon(Equipment, ABC):
+    __slots__ = ("atk", "band")
+
     def __init__(self, atk: int, band: tuple[int, int]):
         self.atk = atk
         self.band = band
 
 
 class OneHandWeapon(Weapon, ABC):
+    __slots__ = ()
+
     @property
     def occupation(self) -> tuple[Slot, ...]:
         return (Slot.MainHand,)
 
 
 class TwoHandWeapon(Weapon, ABC):
+    __slots__ = ()
+
     @property
     def occupation(self) -> tuple[Slot, ...]:
         return Slot.MainHand, Slot.OffHand
 
 
 class OffHand(Equipment, ABC):
+    __slots__ = ()
+
     @property
     def occupation(self) -> tuple[Slot, ...]:
         return (Slot.OffHand,)
 
 
 class Amulet(Equipment, ABC):
+    __slots__ = ()
+
     @property
     def occupation(self) -> tuple[Slot, ...]:
         return (Slot.Amulet,)
@@ -815,6 +1517,7 @@ class Amulet(Equipment, ABC):
 class Equipage(dict[Slot, Optional[Equipment]]):
     def __init__(self, *equipment: Optional[Equipment]):
         super().__init__()
+        self.version = next_version()
         for slot in Slot:
             self[slot] = None
         for item in equipment:
@@ -822,18 +1525,17 @@ class Equipage(dict[Slot, Optional[Equipment]]):
 
     def get_actions(self) -> tuple[Action, ...]:
         actions = []
-        for item in set(self.values()):
-            if item is not None:
-                actions.extend(item.action())
+        for item in self.factors:
+            actions.extend(item.action())
         return tuple(actions)
 
     @property
     def factors(self) -> Sequence[FactorMixIn, ...]:
         """
-        just get all equipments, not including None, no repeat
+        just get all equipments, not including None, no repeat, in slot order
         @return:
         """
-        return list(set(filter(lambda x: x is not None, self.values())))
+        return list(dict.fromkeys(filter(lambda x: x is not None, self.values())))
 
     def equip(self, equipment: Equipment):
         for slot in equipment.occupation:
@@ -841,6 +1543,7 @@ class Equipage(dict[Slot, Optional[Equipment]]):
                 raise ValueError("Slot already occupied")
             else:
                 self[slot] = equipment
+        self.version = next_version()
 
     @singledispatchmethod
     def unequip(self, slot: [Slot, Equipment]):
@@ -851,6 +1554,15 @@ class Equipage(dict[Slot, Optional[Equipment]]):
         for slot in equipment.occupation:
             self._ueq(slot)
 
+    def snapshot(self) -> tuple[tuple[Slot, Optional[Equipment]], ...]:
+        return tuple(self.items())
+
+    def restore(self, state: tuple[tuple[Slot, Optional[Equipment]], ...]):
+        if tuple(self.items()) != state:
+            self.clear()
+            self.update(state)
+            self.version = next_version()
+
     @unequip.register
     def _ueq(self, slot: Slot):
         if self[slot]:
@@ -858,6 +1570,7 @@ class Equipage(dict[Slot, Optional[Equipment]]):
             for s in slots:
                 self.pop(s)
                 self[s] = None
+            self.version = next_version()
         else:
             raise ValueError("Slot is empty")
 
@@ -868,15 +1581,22 @@ class EquipageMixIn:
 
     def equip(self, equipment: Equipment):
         self.equipage.equip(equipment)
+        self.speed_changed()
 
     def unequip(self, slot: Slot):
         self.equipage.unequip(slot)
+        self.speed_changed()
+
+    def speed_changed(self):
+        pass
 
 
 # endregion
 
 
 class Effect(ABC):
+    __slots__ = ()
+
     def __init__(self):
         pass
 
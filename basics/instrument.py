@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import sys
+import time
+from collections import deque
+from typing import Any, Callable, Optional, Sequence, TextIO, Union
+
+MODIFY = "modify"
+AFTER_AFFECT = "after_affect"
+FACTOR = "factor"
+ACTION = "action"
+EFFECT = "effect"
+DECIDE = "decide"
+
+
+class Stat:
+    """
+    calls, latency and fan-out of one instrumented thing, percentiles come from the latest samples
+    """
+    __slots__ = ("count", "total", "fanout", "samples")
+
+    def __init__(self, samples: int):
+        self.count = 0
+        self.total = 0.0
+        self.fanout = 0
+        self.samples: deque[float] = deque(maxlen=samples)
+
+    def add(self, seconds: float, fanout: int = 0):
+        self.count += 1
+        self.total += seconds
+        self.fanout += fanout
+        self.samples.append(seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def mean_fanout(self) -> float:
+        return self.fanout / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        @param p: between 0 and 100
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "mean_fanout": self.mean_fanout,
+        }
+
+
+class Instruments:
+    """
+    optional counters on the combat hot path.
+    the engine checks enabled before anything else, so a disabled instance costs one attribute read per call.
+    kinds are MODIFY and AFTER_AFFECT by timing, FACTOR, ACTION and EFFECT by class, DECIDE by brain class.
+    """
+
+    def __init__(self, samples: int = 1024):
+        """
+        @param samples: latest latencies kept per key for the percentiles
+        """
+        self.enabled = False
+        self.samples = samples
+        self._stats: dict[str, dict[str, Stat]] = {}
+        self._dump_interval: Optional[float] = None
+        self._dump_to: Union[TextIO, Callable[[dict], Any], None] = None
+        self._next_dump = float("inf")
+
+    def enable(self, dump_interval: Optional[float] = None, dump_to: Union[TextIO, Callable[[dict], Any]] = None):
+        """
+        @param dump_interval: seconds between dumps of the report, None never dumps
+        @param dump_to: stream receiving a JSON line per dump, or a callable receiving the report, stderr by default
+        """
+        self._dump_interval = dump_interval
+        self._dump_to = dump_to
+        self._next_dump = time.perf_counter() + dump_interval if dump_interval is not None else float("inf")
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self._next_dump = float("inf")
+
+    def reset(self):
+        self._stats = {}
+
+    def record(self, kind: str, name: str, seconds: float, fanout: int = 0):
+        stats = self._stats.get(kind)
+        if stats is None:
+            stats = self._stats[kind] = {}
+        stat = stats.get(name)
+        if stat is None:
+            stat = stats[name] = Stat(self.samples)
+        stat.add(seconds, fanout)
+        if time.perf_counter() >= self._next_dump:
+            self.dump()
+
+    # region hot path
+    def modify(self, combatant, timing, baton: dict[str, Any]) -> Sequence:
+        start = time.perf_counter()
+        factors = combatant.factors(timing, baton)
+        for factor in factors:
+            factor_start = time.perf_counter()
+            factor.affect(timing, baton)
+            self.record(FACTOR, factor.__class__.__name__, time.perf_counter() - factor_start)
+        self.record(MODIFY, timing.name, time.perf_counter() - start, len(factors))
+        return factors
+
+    def after_affect(self, timing, factors: Sequence, baton: dict[str, Any]):
+        start = time.perf_counter()
+        for factor in factors:
+            factor.after_affect(timing, baton)
+        self.record(AFTER_AFFECT, timing.name, time.perf_counter() - start, len(factors))
+
+    def execute_action(self, action, receiver, target):
+        start = time.perf_counter()
+        try:
+            action.execute(receiver, target)
+        finally:
+            self.record(ACTION, action.__class__.__name__, time.perf_counter() - start, len(action.effects))
+
+    def execute_effect(self, effect, receiver, target, baton: dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            effect.execute(receiver, target, baton)
+        finally:
+            self.record(EFFECT, effect.__class__.__name__, time.perf_counter() - start)
+
+    # endregion
+
+    def kinds(self) -> list[str]:
+        return list(self._stats)
+
+    def stats(self, kind: str) -> dict[str, Stat]:
+        return dict(self._stats.get(kind, {}))
+
+    def get(self, kind: str, name: str) -> Optional[Stat]:
+        return self._stats.get(kind, {}).get(name)
+
+    def top(self, kind: str, n: int = 10, by: str = "total") -> list[tuple[str, Stat]]:
+        """
+        the n most expensive keys of a kind, by total, mean, count or fanout
+        """
+        return sorted(self._stats.get(kind, {}).items(), key=lambda item: getattr(item[1], by), reverse=True)[:n]
+
+    def report(self) -> dict[str, dict[str, dict[str, float]]]:
+        return {kind: {name: stat.as_dict() for name, stat in stats.items()} for kind, stats in self._stats.items()}
+
+    def dump(self):
+        import json
+
+        report = self.report()
+        if callable(self._dump_to):
+            self._dump_to(report)
+        else:
+            stream = self._dump_to if self._dump_to is not None else sys.stderr
+            stream.write(json.dumps(report) + "\n")
+        if self._dump_interval is not None:
+            self._next_dump = time.perf_counter() + self._dump_interval
+
+
+instruments = Instruments()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import copy
+import math
+import time
+from concurrent.futures import Executor
+from typing import Any, Hashable, Optional
+
+from .character import *
+
+DecisionKey = tuple[type, Optional[tuple[int, ...]]]
+
+
+class _Node:
+    __slots__ = ("children", "visits", "value")
+
+    def __init__(self):
+        self.children: dict[Optional[DecisionKey], _Node] = {}
+        self.visits = 0
+        self.value = 0.0
+
+
+def decision_key(decision: Optional[Decision]) -> Optional[DecisionKey]:
+    """
+    identify a decision across iterations, where the action objects themselves may differ
+    """
+    if decision is None:
+        return None
+    action, targeting = decision
+    return type(action), None if targeting is None else tuple(targeting.positions)
+
+
+class MCTSBrain(Brain):
+    """
+    open loop Monte Carlo tree search.
+    every iteration restores the arena from a snapshot, walks the tree of decisions taken by whoever acts,
+    expands one new decision, then plays random decisions for up to rollout_turns turns.
+    the search runs on its own random stream with events muted, so the real battle is not disturbed.
+    """
+
+    def __init__(self, iterations: Optional[int] = None, time_budget: Optional[float] = 0.05,
+                 exploration: float = 1.4, rollout_turns: int = 20, seed: Optional[int] = None,
+                 workers: int = 1, executor: Optional[Executor] = None):
+        """
+        @param iterations: stop after this many iterations, None means only the time budget counts
+        @param time_budget: seconds a decision may take, None means only the iterations count
+        @param exploration: UCB1 exploration constant
+        @param rollout_turns: turns played randomly after the tree before the state is evaluated
+        @param seed: seed of the search stream
+        @param workers: searches run at once on the executor, their statistics are merged
+        @param executor: thread or process pool to run the searches on, None searches in the calling thread
+        """
+        if iterations is None and time_budget is None:
+            raise ValueError("MCTSBrain needs an iteration or time budget")
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.rand = BattleRandom(seed)
+        self.workers = workers
+        self.executor = executor
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["executor"] = None
+        return state
+
+    def decide(self, caster: CombatantMixIn, arena: Arena) -> Optional[Decision]:
+        decisions = self.legal_decisions(caster)
+        if len(decisions) <= 1:
+            return decisions[0] if decisions else None
+        if self.executor is None or self.workers <= 1:
+            stats = self.search(arena, caster)
+        else:
+            stats = self.parallel_search(arena, caster)
+        best = max(stats, key=lambda k: stats[k][0])
+        for decision in decisions:
+            if decision_key(decision) == best:
+                return decision
+        return decisions[0]
+
+    def parallel_search(self, arena: Arena, caster: CombatantMixIn) -> dict[Hashable, tuple[int, float]]:
+        """
+        root parallel search, every worker searches its own copy of the arena
+        """
+        left, index = caster.position
+        iterations = None if self.iterations is None else max(1, self.iterations // self.workers)
+        futures = []
+        for rand in self.rand.spawn(self.workers):
+            worker = MCTSBrain(iterations, self.time_budget, self.exploration, self.rollout_turns)
+            worker.rand = rand
+            futures.append(self.executor.submit(_search_copy, worker, copy.deepcopy(arena), left, index))
+        merged: dict[Hashable, tuple[int, float]] = {}
+        for future in futures:
+            for key, (visits, value) in future.result().items():
+                total_visits, total_value = merged.get(key, (0, 0.0))
+                merged[key] = (total_visits + visits, total_value + value)
+        return merged
+
+    def search(self, arena: Arena, caster: CombatantMixIn) -> dict[Hashable, tuple[int, float]]:
+        """
+        @return: visits and total reward of every decision tried at the root
+        """
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        root_state = arena.snapshot()
+        side = arena.find_position(caster).left
+        sink, rand, ai_rand = arena.sink, arena.rand, arena.ai_rand
+        arena.sink, arena.rand, arena.ai_rand = NullSink(), self.rand, self.rand
+        tree = _Node()
+        try:
+            count = 0
+            while self.iterations is None or count < self.iterations:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                arena.restore(root_state)
+                self.iterate(arena, caster, side, tree)
+                count += 1
+        finally:
+            arena.restore(root_state)
+            arena.sink, arena.rand, arena.ai_rand = sink, rand, ai_rand
+        return {key: (child.visits, child.value) for key, child in tree.children.items()}
+
+    def iterate(self, arena: Arena, caster: CombatantMixIn, side: bool, tree: _Node):
+        node, actor, path = tree, caster, []
+        while True:
+            legal = {decision_key(d): d for d in self.legal_decisions(actor)} or {None: None}
+            untried = [key for key in legal if key not in node.children]
+            if untried:
+                key = self.rand.choice(untried)
+                node.children[key] = _Node()
+            else:
+                key = max(legal, key=lambda k: self.ucb(node, node.children[k]))
+            node = node.children[key]
+            path.append((node, arena.find_position(actor).left == side))
+            over = arena.take_turn(actor, legal[key])
+            if over or untried:
+                break
+            actor = self.next_actor(arena)
+
+        turns = 0
+        while not over and turns < self.rollout_turns:
+            actor = self.next_actor(arena)
+            over = arena.take_turn(actor, self.default_policy(actor))
+            turns += 1
+
+        reward = self.evaluate(arena, side)
+        tree.visits += 1
+        for child, ours in path:
+            child.visits += 1
+            child.value += reward if ours else 1.0 - reward
+
+    def ucb(self, parent: _Node, child: _Node) -> float:
+        return child.value / child.visits + self.exploration * math.sqrt(math.log(parent.visits) / child.visits)
+
+    @staticmethod
+    def next_actor(arena: Arena) -> CombatantMixIn:
+        while True:
+            combatant = arena.advance()
+            if arena.can_act(combatant):
+                return combatant
+
+    def default_policy(self, actor: CombatantMixIn) -> Optional[Decision]:
+        """
+        cheap random play, the same as AIBrain
+        """
+        actions = self.get_castable_actions(actor)
+        while actions:
+            action = self.rand.choice(actions)
+            if action.post_reqm in (None, ()):
+                return Decision([action, None])
+            try:
+                return Decision([action, action.check_target(actor).random_choose(self.rand)])
+            except TargetingError:
+                actions.remove(action)
+        return None
+
+    @staticmethod
+    def evaluate(arena: Arena, left: bool) -> float:
+        """
+        1 for a won battle, 0 for a lost one, else the share of remaining health
+        """
+
+        def health(team: list[Optional[CombatantMixIn]]) -> float:
+            return sum(max(c.cur_hp, 0) / c.max_hp for c in team if c is not None)
+
+        ours, theirs = (arena.left, arena.right) if left else (arena.right, arena.left)
+        ours, theirs = health(ours), health(theirs)
+        if ours + theirs == 0:
+            return 0.5
+        return ours / (ours + theirs)
+
+
+def _search_copy(brain: MCTSBrain, arena: Arena, left: bool, index: int) -> dict[Hashable, tuple[int, float]]:
+    caster = (arena.left if left else arena.right)[index]
+    return brain.search(arena, caster)
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from .gameplay import *
+from .rand import _numpy
+
+# convolutions with fewer products than this stay in pure Python, where numpy's call overhead would dominate
+NUMPY_CONVOLVE_SIZE = 256
+
+
+class OutcomeError(ValueError):
+    pass
+
+
+def _convolve(a: list[float], b: list[float]) -> list[float]:
+    numpy = _numpy()
+    if numpy is not None and len(a) * len(b) >= NUMPY_CONVOLVE_SIZE:
+        return numpy.convolve(a, b).tolist()
+    out = [0.0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                out[i + j] += x * y
+    return out
+
+
+class Distribution:
+    """
+    probabilities of consecutive integers, starting at offset
+    """
+    __slots__ = ("offset", "probs")
+
+    def __init__(self, offset: int, probs: list[float]):
+        self.offset = offset
+        self.probs = probs
+
+    @classmethod
+    def point(cls, value: int) -> Distribution:
+        return cls(value, [1.0])
+
+    @classmethod
+    def of(cls, weights: dict[int, float]) -> Distribution:
+        low = min(weights)
+        probs = [0.0] * (max(weights) - low + 1)
+        for value, p in weights.items():
+            probs[value - low] += p
+        return cls(low, probs)
+
+    @property
+    def high(self) -> int:
+        return self.offset + len(self.probs) - 1
+
+    def minus(self, other: Distribution) -> Distribution:
+        """
+        the distribution of self - other, the two independent
+        """
+        return Distribution(self.offset - other.high, _convolve(self.probs, other.probs[::-1]))
+
+    def plus(self, other: Distribution, cap: Optional[int] = None) -> Distribution:
+        """
+        the distribution of self + other, the two independent, with the mass above cap put on cap
+        """
+        result = Distribution(self.offset + other.offset, _convolve(self.probs, other.probs))
+        if cap is not None and result.high > cap:
+            if result.offset >= cap:
+                return Distribution.point(cap)
+            kept = cap - result.offset
+            result.probs = result.probs[:kept] + [sum(result.probs[kept:])]
+        return result
+
+    def probability(self, low: Optional[int] = None, high: Optional[int] = None) -> float:
+        """
+        @return: the probability of a value within [low, high], an open end when None
+        """
+        start = 0 if low is None else max(low - self.offset, 0)
+        stop = len(self.probs) if high is None else max(high - self.offset + 1, 0)
+        return sum(self.probs[start:stop])
+
+    def given(self, low: Optional[int] = None, high: Optional[int] = None) -> Distribution:
+        """
+        the distribution conditioned on a value within [low, high], an open end when None
+        """
+        start = 0 if low is None else max(low - self.offset, 0)
+        stop = len(self.probs) if high is None else max(high - self.offset + 1, 0)
+        total = sum(self.probs[start:stop])
+        return Distribution(self.offset + start, [p / total for p in self.probs[start:stop]])
+
+    @property
+    def mean(self) -> float:
+        return sum((self.offset + i) * p for i, p in enumerate(self.probs))
+
+    def as_dict(self) -> dict[int, float]:
+        return {self.offset + i: p for i, p in enumerate(self.probs) if p}
+
+    @staticmethod
+    def mix(weighted: Sequence[tuple[float, Distribution]]) -> Distribution:
+        low = min(d.offset for _, d in weighted)
+        probs = [0.0] * (max(d.high for _, d in weighted) - low + 1)
+        for weight, d in weighted:
+            for i, p in enumerate(d.probs, d.offset - low):
+                probs[i] += weight * p
+        return Distribution(low, probs)
+
+    def __eq__(self, other):
+        return isinstance(other, Distribution) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"Distribution({self.as_dict()})"
+
+
+def damage_distribution(attack: Attack) -> Distribution:
+    """
+    the damage CombatantMixIn.suffer deals with the attack, a hit is assumed
+    """
+    if attack.critted is None:
+        crit = min(max(attack.crit, 0.0), 1.0)
+    else:
+        crit = 1.0 if attack.critted else 0.0
+    weights = {}
+    if crit < 1:
+        each = (1 - crit) / (attack.max - attack.min + 1)
+        for amount in range(attack.min, attack.max + 1):
+            damage = int(amount * attack.mag)
+            weights[damage] = weights.get(damage, 0.0) + each
+    if crit > 0:
+        damage = int(attack.min * attack.mag * 1.5)
+        weights[damage] = weights.get(damage, 0.0) + crit
+    return Distribution.of(weights)
+
+
+class _Draw:
+    """
+    a uniform draw from [0, 1) that is only ever compared: each comparison is a branch of the enumeration
+    """
+    __slots__ = ("branches",)
+
+    def __init__(self, branches: _Branches):
+        self.branches = branches
+
+    def __gt__(self, x: float) -> bool:
+        return self.branches.choose(1 - x)
+
+    def __ge__(self, x: float) -> bool:
+        return self.branches.choose(1 - x)
+
+    def __lt__(self, x: float) -> bool:
+        return self.branches.choose(x)
+
+    def __le__(self, x: float) -> bool:
+        return self.branches.choose(x)
+
+    def __float__(self):
+        raise OutcomeError("a draw used as a number cannot be enumerated")
+
+
+class _Branches:
+    """
+    the random stream of the arena during an enumeration, the rand of its resolver.
+    it replays the choices of a path prefix, takes the first branch of every new choice
+    and leaves the other one for a later run.
+    """
+
+    def __init__(self, prefix: tuple[bool, ...], pending: list[tuple[bool, ...]]):
+        self.prefix = prefix
+        self.pending = pending
+        self.path: list[bool] = []
+        self.weight = 1.0
+
+    def random(self) -> _Draw:
+        return _Draw(self)
+
+    def choose(self, p: float) -> bool:
+        p = min(max(p, 0.0), 1.0)
+        depth = len(self.path)
+        if depth < len(self.prefix):
+            choice = self.prefix[depth]
+        else:
+            choice = p > 0
+            if 0 < p < 1:
+                self.pending.append(tuple(self.path) + (False,))
+        self.path.append(choice)
+        self.weight *= p if choice else 1 - p
+        return choice
+
+    def __getattr__(self, name: str):
+        raise OutcomeError(f"random.{name} cannot be enumerated, only comparisons of random() can")
+
+
+class Outcome:
+    """
+    the exact hp distributions after an action, over every branch of the miss and crit rolls.
+    a path is a sequence of miss checks; given the path the damage rolls of the combatants are independent.
+    """
+    __slots__ = ("start", "paths", "_marginals")
+
+    def __init__(self, start: dict[CombatantMixIn, int],
+                 paths: list[tuple[float, dict[CombatantMixIn, Distribution]]]):
+        self.start = start
+        self.paths = paths
+        self._marginals: dict[CombatantMixIn, Distribution] = {}
+
+    @property
+    def combatants(self) -> list[CombatantMixIn]:
+        """
+        the combatants the action may change the hp of
+        """
+        touched = {}
+        for _, hp in self.paths:
+            touched.update(dict.fromkeys(hp))
+        return list(touched)
+
+    def _path_hp(self, hp: dict[CombatantMixIn, Distribution], combatant: CombatantMixIn) -> Distribution:
+        found = hp.get(combatant)
+        return Distribution.point(self.start[combatant]) if found is None else found
+
+    def distribution(self, combatant: CombatantMixIn) -> Distribution:
+        found = self._marginals.get(combatant)
+        if found is None:
+            found = self._marginals[combatant] = Distribution.mix(
+                [(weight, self._path_hp(hp, combatant)) for weight, hp in self.paths])
+        return found
+
+    def hp(self, combatant: CombatantMixIn) -> dict[int, float]:
+        return self.distribution(combatant).as_dict()
+
+    def expected_hp(self, combatant: CombatantMixIn) -> float:
+        return self.distribution(combatant).mean
+
+    def expected_damage(self, combatant: CombatantMixIn) -> float:
+        return self.start[combatant] - self.expected_hp(combatant)
+
+    def kill_probability(self, combatant: CombatantMixIn) -> float:
+        return self.distribution(combatant).probability(high=0)
+
+    def all_killed(self, *combatants: CombatantMixIn) -> float:
+        """
+        @return: the probability that every one of the combatants ends at 0 hp or below
+        """
+        total = 0.0
+        for weight, hp in self.paths:
+            for combatant in combatants:
+                weight *= self._path_hp(hp, combatant).probability(high=0)
+            total += weight
+        return total
+
+    def __repr__(self):
+        return "Outcome(" + ", ".join(f"{c.name}: {self.hp(c)}" for c in self.combatants) + ")"
+
+
+class _PathResolver(Resolver):
+    """
+    settles the hits and heals of one path of an enumeration into hp distributions instead of rolling them
+    """
+
+    def __init__(self, arena: Arena, start: dict[CombatantMixIn, int]):
+        super().__init__(arena, None, NullSink())
+        self.start = start
+        self.hp: dict[CombatantMixIn, Distribution] = {}
+
+    def settle(self, combatant: CombatantMixIn, dist: Distribution):
+        if dist.high <= 0:
+            dead = True
+        elif dist.offset > 0:
+            dead = False
+        else:
+            below, above = dist.probability(high=0), dist.probability(low=1)
+            dead = self.rand.choose(below / (below + above)) if below and above else not above
+            dist = dist.given(high=0) if dead else dist.given(low=1)
+        self.hp[combatant] = dist
+        combatant.cur_hp = dist.high if dead else dist.offset
+
+    def current(self, combatant: CombatantMixIn) -> Distribution:
+        found = self.hp.get(combatant)
+        return Distribution.point(self.start[combatant]) if found is None else found
+
+    def suffer(self, combatant: CombatantMixIn, attack: Attack) -> int:
+        if not attack.missed:
+            self.settle(combatant, self.current(combatant).minus(damage_distribution(attack)))
+        return 0
+
+    def heal(self, combatant: CombatantMixIn, amount: tuple[int, int], baton) -> None:
+        rolls = Distribution(amount[0], [1 / (amount[1] - amount[0] + 1)] * (amount[1] - amount[0] + 1))
+        self.settle(combatant, self.current(combatant).plus(rolls, combatant.max_hp))
+
+
+def action_paths(caster: CombatantMixIn, action: Action, target: Optional[Targeting] = None,
+                 keep_state: bool = False) -> list[tuple]:
+    """
+    every path of miss checks of the caster executing the action, the arena is left as it was.
+    the real action runs once per path, on a snapshot of the arena, with a Resolver entered for the arena
+    in the current context: it mutes the events, takes the miss checks as branches
+    and convolves the damage and heal rolls into the hp distributions instead of drawing them.
+    whether a combatant hit or healed is dead from then on is a branch of the path, so later checks of dead,
+    as a second hit on a combatant or a protector killed earlier in the action, see the right side of it;
+    while the action runs the hp of such a combatant reads as the lowest value of its branch.
+    the rolls and events of the arena in other contexts are untouched, but the hp and buffs of its combatants
+    do change until each path is restored: do not call this from another thread while the arena's battle runs.
+    @param target: the selected targeting, for selective actions
+    @param keep_state: also keep the arena snapshot at the end of every path, hp set to the lowest of its branch
+    @return: (probability, hp distribution of every combatant hit or healed[, snapshot]) per path
+    """
+    arena = caster.arena
+    state = arena.snapshot()
+    resolver = _PathResolver(arena, {c: c.cur_hp for c in arena.left + arena.right if c is not None})
+    paths = []
+    pending = [()]
+    with resolver:
+        while pending:
+            resolver.rand = branches = _Branches(pending.pop(), pending)
+            resolver.hp = {}
+            try:
+                action.execute(caster, target)
+                after = arena.snapshot() if keep_state else None
+            finally:
+                arena.restore(state)
+            paths.append((branches.weight, resolver.hp, after) if keep_state else (branches.weight, resolver.hp))
+    return paths
+
+
+def action_outcome(caster: CombatantMixIn, action: Action, target: Optional[Targeting] = None) -> Outcome:
+    """
+    the exact outcome of the caster executing the action, the arena is left as it was, see action_paths
+    @param target: the selected targeting, for selective actions
+    """
+    arena = caster.arena
+    start = {c: c.cur_hp for c in arena.left + arena.right if c is not None}
+    return Outcome(start, action_paths(caster, action, target))
+
+
+def decision_outcome(caster: CombatantMixIn, decision: Decision) -> Optional[Outcome]:
+    """
+    the outcome of a brain's decision, None for no decision
+    """
+    if decision is None or decision[0] is None:
+        return None
+    return action_outcome(caster, decision[0], decision[1])
@@ -1,5 +1,27 @@
 from __future__ import annotations
 
+import hashlib
+from random import Random
+from typing import Optional, Sequence, TypeVar, Union
+
+T = TypeVar("T")
+
+_numpy_module = False
+
+
+def _numpy():
+    """
+    @return: the numpy module, or None when not installed; imported on first use since it is slow to load
+    """
+    global _numpy_module
+    if _numpy_module is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
 
 class RandomStub:
     def randint(self, a, b):
@@ -27,7 +49,7 @@ class RandomStub:
         return low
 
     def random(self):
-        if hasattr(self, "seq"):
+        if getattr(self, "seq", None):
             return self.seq.pop(0)
         else:
             return 0.5
@@ -44,3 +66,82 @@ else:
     import random
 
     game_random = random.Random()
+
+
+class SeedSequence:
+    """
+    a seed plus the path of spawns that led to it, every path hashes to an independent state.
+    spawn works like numpy's SeedSequence.spawn: repeated calls keep handing out new children.
+    """
+
+    def __init__(self, entropy: Optional[int] = None, spawn_key: tuple[int, ...] = ()):
+        self.entropy = entropy if entropy is not None else Random().getrandbits(64)
+        self.spawn_key = spawn_key
+        self.spawned = 0
+
+    def spawn(self, n: int) -> list[SeedSequence]:
+        children = [SeedSequence(self.entropy, self.spawn_key + (i,)) for i in range(self.spawned, self.spawned + n)]
+        self.spawned += n
+        return children
+
+    def generate_state(self) -> int:
+        key = ",".join(str(x) for x in (self.entropy,) + self.spawn_key).encode()
+        return int.from_bytes(hashlib.sha256(key).digest()[:8], "little")
+
+    def __repr__(self):
+        return f"SeedSequence({self.entropy}, {self.spawn_key})"
+
+
+class BattleRandom:
+    """
+    a seeded random stream, drawn from in blocks to cut the per-call overhead.
+    NumPy generates the blocks when installed, the random module otherwise;
+    for a given backend the same seed always gives the same stream, however it is consumed.
+    """
+
+    def __init__(self, seed: Union[int, SeedSequence, None] = None, block: int = 256):
+        self.seed_sequence = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        self.block = block
+        state = self.seed_sequence.generate_state()
+        numpy = _numpy()
+        self._numpy = numpy is not None
+        if self._numpy:
+            self._generator = numpy.random.Generator(numpy.random.PCG64(state))
+        else:
+            self._generator = Random(state)
+        self._next = iter(()).__next__
+
+    def _draw(self) -> list[float]:
+        if self._numpy:
+            return self._generator.random(self.block).tolist()
+        rand = self._generator.random
+        return [rand() for _ in range(self.block)]
+
+    def random(self) -> float:
+        try:
+            return self._next()
+        except StopIteration:
+            self._next = iter(self._draw()).__next__
+            return self._next()
+
+    def randint(self, a: int, b: int) -> int:
+        return a + int(self.random() * (b - a + 1))
+
+    def randrange(self, a: int, b: int) -> int:
+        return a + int(self.random() * (b - a))
+
+    def choice(self, seq: Sequence[T]) -> T:
+        if len(seq) == 0:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[int(self.random() * len(seq))]
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def shuffle(self, seq: list):
+        for i in range(len(seq) - 1, 0, -1):
+            j = int(self.random() * (i + 1))
+            seq[i], seq[j] = seq[j], seq[i]
+
+    def spawn(self, n: int) -> list[BattleRandom]:
+        return [BattleRandom(child, self.block) for child in self.seed_sequence.spawn(n)]
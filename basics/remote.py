@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from .character import *
+
+
+class DecisionRequest:
+    """
+    what a player is asked: the legal decisions of the caster, answered by the index of one of them.
+    the id tells the requests of a brain apart, a reply carrying it is only taken for this request
+    """
+    __slots__ = ("id", "caster", "options", "timeout")
+
+    def __init__(self, caster: CombatantMixIn, options: list[Decision], timeout: Optional[float], id: int = 0):
+        self.id = id
+        self.caster = caster
+        self.options = options
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"{self.caster.name}: " + " | ".join(f"{i}) {option!r}" for i, option in enumerate(self.options))
+
+    def __repr__(self):
+        return f"DecisionRequest({self.id}, {self.caster.name}, {len(self.options)} options)"
+
+
+_CLOSED = object()  # put in the inbox when the player is gone
+
+
+class QueueBrain(Brain):
+    """
+    a player behind an asynchronous channel, fed by any transport.
+    each decision puts a DecisionRequest in the outbox and waits for the index of an option in the inbox,
+    without blocking the event loop; notices go to the outbox as plain strings.
+    a reply is the index, or the id of the request and the index separated by a space,
+    replies carrying the id of an earlier request are late and dropped.
+    when no valid reply comes in time, or once the player is gone, the fallback brain decides instead.
+    """
+
+    def __init__(self, timeout: Optional[float] = 30.0, fallback: Optional[Brain] = None,
+                 outbox: Optional[asyncio.Queue] = None):
+        """
+        @param timeout: seconds a decision may take, None waits forever
+        @param fallback: brain deciding on timeouts, None means the AI brain
+        @param outbox: where requests and notices go, None gives the brain its own queue
+        """
+        self.timeout = timeout
+        self.fallback = fallback
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: asyncio.Queue = asyncio.Queue() if outbox is None else outbox
+        self.timeouts = 0
+        self.closed = False
+        self._ids = itertools.count(1)
+
+    def put(self, reply: Union[int, str]):
+        """
+        hand over a reply of the player, from any coroutine or callback on the loop
+        """
+        self.inbox.put_nowait(reply)
+
+    def close(self):
+        """
+        the player is gone: the decision waited for and all later ones go to the fallback without waiting
+        """
+        self.closed = True
+        self.inbox.put_nowait(_CLOSED)
+
+    async def decide(self, caster: CombatantMixIn, arena: Arena) -> Optional[Decision]:
+        options = self.legal_decisions(caster)
+        if not options:
+            return None
+        if not self.closed:
+            while not self.inbox.empty():
+                self.inbox.get_nowait()
+            request = DecisionRequest(caster, options, self.timeout, next(self._ids))
+            await self.outbox.put(request)
+            try:
+                decision = await asyncio.wait_for(self.receive(request), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                await self.outbox.put(f"{caster.name}: timed out")
+            else:
+                if decision is not None:
+                    return decision
+        return await consult(self.fallback or AIBrain(), caster, arena)
+
+    async def receive(self, request: DecisionRequest) -> Optional[Decision]:
+        """
+        wait for a valid reply to the request, invalid ones are answered with a notice
+        @return: the decision chosen, None if the player is gone
+        """
+        options = request.options
+        while True:
+            reply = await self.inbox.get()
+            if reply is _CLOSED:
+                return None
+            try:
+                fields = str(reply).split()
+                if len(fields) == 2:
+                    if int(fields[0]) != request.id:
+                        continue
+                    del fields[0]
+                if len(fields) != 1:
+                    raise ValueError(reply)
+                index = int(fields[0])
+                if not 0 <= index < len(options):
+                    raise IndexError(index)
+            except (ValueError, IndexError):
+                await self.outbox.put(f"invalid choice {reply!r}, expected 0 to {len(options) - 1}")
+                continue
+            return options[index]
+
+
+async def serve_stream(brain: QueueBrain, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       battle: Awaitable[Any]) -> Any:
+    """
+    drive the brain over a line protocol while the battle runs:
+    every request and notice goes out as a line, a request led by its id and "#", every line read is a reply,
+    to be the id echoed and the index. the brain is closed as soon as the player hangs up
+    @return: the result of the battle, also sent as the last line
+    """
+
+    def line(message: Any) -> bytes:
+        if isinstance(message, DecisionRequest):
+            return f"{message.id}# {message}\n".encode()
+        return f"{message}\n".encode()
+
+    async def send():
+        while True:
+            writer.write(line(await brain.outbox.get()))
+            await writer.drain()
+
+    async def read():
+        while text := await reader.readline():
+            brain.put(text.decode().strip())
+        brain.close()
+
+    pumps = [asyncio.ensure_future(send()), asyncio.ensure_future(read())]
+    try:
+        result = await battle
+        while not brain.outbox.empty():
+            writer.write(line(brain.outbox.get_nowait()))
+        writer.write(f"{result}\n".encode())
+        await writer.drain()
+        return result
+    finally:
+        for pump in pumps:
+            pump.cancel()
+        writer.close()
+
+
+async def serve_players(battle: Callable[[QueueBrain], Awaitable[Any]], host: str = "127.0.0.1", port: int = 0,
+                        timeout: Optional[float] = 30.0) -> asyncio.AbstractServer:
+    """
+    host a battle for every connection, all on this event loop
+    @param battle: plays a battle with the connected player deciding through the brain
+    @param timeout: seconds a decision may take before the AI decides
+    @return: the listening server, port 0 picks a free port
+    """
+
+    async def connected(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        brain = QueueBrain(timeout)
+        await serve_stream(brain, reader, writer, battle(brain))
+
+    return await asyncio.start_server(connected, host, port)
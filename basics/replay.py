@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import importlib
+import struct
+import zlib
+
+from .character import *
+
+REPLAY_MAGIC = b"RPL"
+REPLAY_VERSION = 1
+
+_COMPRESSED = 1
+_TURNS, _ATB = 0, 1
+
+CombatantRecord = tuple[type, str, int, int, int, tuple[tuple[type, Any], ...], tuple[type, ...]]
+DecisionRecord = tuple[int, Optional[Targeting]]
+
+
+class ReplayError(ValueError):
+    pass
+
+
+class DesyncError(ReplayError):
+    """
+    the replayed battle went another way than the recorded one
+    """
+
+    def __init__(self, decision: int, round: int):
+        super().__init__(f"state differs from the recording before decision {decision}, round {round}")
+        self.decision = decision
+        self.round = round
+
+
+def state_hash(arena: Arena) -> int:
+    """
+    crc32 of the round and the hp, damage and buffs of every slot, the same state hashes the same in any process
+    """
+    state = (arena.turn, tuple(None if c is None else
+                               (c.name, c.cur_hp, c.damage_dealt, tuple((b.name, b.get_state()) for b in c.buffs))
+                               for c in arena.left + arena.right))
+    return zlib.crc32(repr(state).encode())
+
+
+# region encoding
+class _Writer:
+    def __init__(self):
+        self.data = bytearray()
+
+    def uint(self, value: int):
+        if value < 0:
+            raise ReplayError(f"{value} is negative")
+        while value > 0x7f:
+            self.data.append(value & 0x7f | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def sint(self, value: int):
+        self.uint(value << 1 if value >= 0 else (-value << 1) - 1)
+
+    def text(self, value: str):
+        raw = value.encode()
+        self.uint(len(raw))
+        self.data += raw
+
+    def crc(self, value: int):
+        self.data += struct.pack("<I", value)
+
+    def float(self, value: float):
+        self.data += struct.pack("<d", value)
+
+    def value(self, value: Any):
+        """
+        None, bools, ints, floats, strings and tuples or lists of them, lists come back as tuples
+        """
+        if value is None:
+            self.data.append(0)
+        elif isinstance(value, bool):
+            self.data.append(2 if value else 1)
+        elif isinstance(value, int):
+            self.data.append(3)
+            self.sint(value)
+        elif isinstance(value, float):
+            self.data.append(4)
+            self.float(value)
+        elif isinstance(value, str):
+            self.data.append(5)
+            self.text(value)
+        elif isinstance(value, (tuple, list)):
+            self.data.append(6)
+            self.uint(len(value))
+            for item in value:
+                self.value(item)
+        else:
+            raise ReplayError(f"cannot record {value!r}")
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def byte(self) -> int:
+        try:
+            value = self.data[self.pos]
+        except IndexError:
+            raise ReplayError("replay is truncated") from None
+        self.pos += 1
+        return value
+
+    def uint(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def sint(self) -> int:
+        value = self.uint()
+        return value >> 1 if value & 1 == 0 else -((value + 1) >> 1)
+
+    def raw(self, size: int) -> bytes:
+        if self.pos + size > len(self.data):
+            raise ReplayError("replay is truncated")
+        value = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return value
+
+    def text(self) -> str:
+        return self.raw(self.uint()).decode()
+
+    def crc(self) -> int:
+        return struct.unpack("<I", self.raw(4))[0]
+
+    def float(self) -> float:
+        return struct.unpack("<d", self.raw(8))[0]
+
+    def value(self) -> Any:
+        tag = self.byte()
+        if tag == 0:
+            return None
+        if tag in (1, 2):
+            return tag == 2
+        if tag == 3:
+            return self.sint()
+        if tag == 4:
+            return self.float()
+        if tag == 5:
+            return self.text()
+        if tag == 6:
+            return tuple(self.value() for _ in range(self.uint()))
+        raise ReplayError(f"unknown value tag {tag}")
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+# the only kinds of classes a replay may name, anything else is refused before it can be called
+_CONTENT = (CombatantMixIn, Buff, Equipment)
+
+
+def _resolve(path: str) -> type:
+    module, _, qualname = path.partition(":")
+    try:
+        obj = importlib.import_module(module)
+        for name in qualname.split("."):
+            obj = getattr(obj, name)
+    except (ImportError, AttributeError, ValueError):
+        raise ReplayError(f"cannot find {path}") from None
+    if not isinstance(obj, type) or not issubclass(obj, _CONTENT):
+        raise ReplayError(f"{path} is not a combatant, buff or equipment class")
+    return obj
+
+
+def _check(cls: Any, base: type) -> type:
+    if not isinstance(cls, type) or not issubclass(cls, base):
+        raise ReplayError(f"{cls!r} is not a {base.__name__} class")
+    return cls
+
+
+def _write_decision(writer: _Writer, decision: DecisionRecord):
+    action, targeting = decision
+    writer.uint(action + 1)
+    if action < 0:
+        return
+    if targeting is None:
+        writer.uint(0)
+        return
+    count = len(targeting.positions)
+    writer.uint(1 | targeting.friendly << 1 | targeting.selective << 2 | min(count, 31) << 3)
+    if count >= 31:
+        writer.uint(count)
+    for position in targeting.positions:
+        writer.sint(position)
+
+
+def _read_decision(reader: _Reader) -> DecisionRecord:
+    action = reader.uint() - 1
+    if action < 0:
+        return -1, None
+    flags = reader.uint()
+    if flags == 0:
+        return action, None
+    count = flags >> 3
+    if count == 31:
+        count = reader.uint()
+    positions = [reader.sint() for _ in range(count)]
+    return action, Targeting(bool(flags & 2), bool(flags & 4), *positions)
+
+
+# endregion
+
+
+class Replay:
+    """
+    what it takes to play a battle again: the roster, the seed, the scheduler and the decision of every turn,
+    with state hashes every checkpoint_every decisions and at the end to catch a replay going another way.
+    combatants are rebuilt by calling their class with name, cur_hp, base_max_hp and base_speed,
+    characters also get their buffs and equipment there, other combatants get their buffs afterwards,
+    buffs and equipment are rebuilt by calling their class without arguments.
+    """
+
+    def __init__(self, left: Sequence[Optional[CombatantRecord]], right: Sequence[Optional[CombatantRecord]],
+                 seed: tuple[int, tuple[int, ...], int], max_rounds: Optional[int],
+                 scheduler: tuple[int, tuple[float, ...]], decisions: Sequence[DecisionRecord],
+                 checkpoint_every: int, checkpoints: Sequence[int], final_hash: int):
+        """
+        @param seed: entropy, spawn key and children already spawned of the arena's seed sequence
+        @param scheduler: kind and arguments
+        @param decisions: index of the action in the caster's actions, -1 for no decision, and the targeting
+        @param checkpoint_every: decisions between two checkpoints, 0 only checks the final state
+        @param checkpoints: state hash before decision 0, checkpoint_every, 2 * checkpoint_every...
+        @param final_hash: state hash once the battle ended
+        """
+        self.left = tuple(left)
+        self.right = tuple(right)
+        self.seed = seed
+        self.max_rounds = max_rounds
+        self.scheduler = scheduler
+        self.decisions = list(decisions)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoints = list(checkpoints)
+        self.final_hash = final_hash
+
+    def build_teams(self) -> tuple[list[Optional[CombatantMixIn]], list[Optional[CombatantMixIn]]]:
+        """
+        fresh combatants as they were when the battle started
+        """
+        return [_build(record) for record in self.left], [_build(record) for record in self.right]
+
+    def seed_sequence(self) -> SeedSequence:
+        entropy, spawn_key, spawned = self.seed
+        seed = SeedSequence(entropy, spawn_key)
+        seed.spawned = spawned
+        return seed
+
+    def build_scheduler(self) -> TurnScheduler:
+        kind, args = self.scheduler
+        return ATBScheduler(*args) if kind == _ATB else TurnScheduler()
+
+    def to_bytes(self, compress: bool = True) -> bytes:
+        writer = _Writer()
+        entropy, spawn_key, spawned = self.seed
+        writer.uint(entropy)
+        writer.uint(len(spawn_key))
+        for key in spawn_key:
+            writer.uint(key)
+        writer.uint(spawned)
+        writer.uint(0 if self.max_rounds is None else self.max_rounds + 1)
+        kind, args = self.scheduler
+        writer.uint(kind)
+        for arg in args:
+            writer.float(arg)
+
+        classes: dict[type, int] = {}
+        roster = _Writer()
+        for team in (self.left, self.right):
+            roster.uint(len(team))
+            for record in team:
+                if record is None:
+                    roster.uint(0)
+                    continue
+                cls, name, cur_hp, base_max_hp, base_speed, buffs, equipment = record
+                roster.uint(classes.setdefault(cls, len(classes)) + 1)
+                roster.text(name)
+                roster.sint(cur_hp)
+                roster.sint(base_max_hp)
+                roster.sint(base_speed)
+                roster.uint(len(buffs))
+                for buff_cls, state in buffs:
+                    roster.uint(classes.setdefault(buff_cls, len(classes)))
+                    roster.value(state)
+                roster.uint(len(equipment))
+                for equipment_cls in equipment:
+                    roster.uint(classes.setdefault(equipment_cls, len(classes)))
+        writer.uint(len(classes))
+        for cls in classes:
+            writer.text(_class_path(cls))
+        writer.data += roster.data
+
+        writer.uint(len(self.decisions))
+        for decision in self.decisions:
+            _write_decision(writer, decision)
+        writer.uint(self.checkpoint_every)
+        for checkpoint in self.checkpoints:
+            writer.crc(checkpoint)
+        writer.crc(self.final_hash)
+
+        body, flags = bytes(writer.data), 0
+        if compress:
+            packed = zlib.compress(body, 9)
+            if len(packed) < len(body):
+                body, flags = packed, _COMPRESSED
+        return REPLAY_MAGIC + bytes([REPLAY_VERSION, flags]) + body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Replay:
+        if data[:len(REPLAY_MAGIC)] != REPLAY_MAGIC:
+            raise ReplayError("not a replay")
+        version, flags = data[len(REPLAY_MAGIC):len(REPLAY_MAGIC) + 2]
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"replay version {version} is not supported")
+        body = data[len(REPLAY_MAGIC) + 2:]
+        if flags & _COMPRESSED:
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as e:
+                raise ReplayError(f"replay is corrupted: {e}") from None
+        reader = _Reader(body)
+        entropy = reader.uint()
+        spawn_key = tuple(reader.uint() for _ in range(reader.uint()))
+        seed = entropy, spawn_key, reader.uint()
+        max_rounds = reader.uint() - 1
+        kind = reader.uint()
+        scheduler = (kind, (reader.float(), reader.float()) if kind == _ATB else ())
+
+        classes = [_resolve(reader.text()) for _ in range(reader.uint())]
+        teams = []
+        for _ in range(2):
+            team = []
+            for _ in range(reader.uint()):
+                index = reader.uint()
+                if index == 0:
+                    team.append(None)
+                    continue
+                combatant_cls, name = classes[index - 1], reader.text()
+                cur_hp, base_max_hp, base_speed = reader.sint(), reader.sint(), reader.sint()
+                buffs = tuple((classes[reader.uint()], reader.value()) for _ in range(reader.uint()))
+                equipment = tuple(classes[reader.uint()] for _ in range(reader.uint()))
+                team.append((combatant_cls, name, cur_hp, base_max_hp, base_speed, buffs, equipment))
+            teams.append(team)
+
+        decisions = [_read_decision(reader) for _ in range(reader.uint())]
+        checkpoint_every = reader.uint()
+        count = (len(decisions) + checkpoint_every - 1) // checkpoint_every if checkpoint_every else 0
+        checkpoints = [reader.crc() for _ in range(count)]
+        final_hash = reader.crc()
+        return cls(teams[0], teams[1], seed, None if max_rounds < 0 else max_rounds, scheduler,
+                   decisions, checkpoint_every, checkpoints, final_hash)
+
+    def __len__(self):
+        return len(self.decisions)
+
+    def __repr__(self):
+        return f"Replay({len(self.decisions)} decisions, {len(self.to_bytes())} bytes)"
+
+
+def _record(combatant: Optional[CombatantMixIn]) -> Optional[CombatantRecord]:
+    if combatant is None:
+        return None
+    buffs = tuple((buff.__class__, buff.get_state()) for buff in combatant.buffs)
+    equipment = ()
+    if isinstance(combatant, EquipageMixIn):
+        equipment = tuple(item.__class__ for item in dict.fromkeys(combatant.equipage.values()) if item is not None)
+    return (combatant.__class__, combatant.name, combatant.cur_hp, combatant.base_max_hp, combatant.base_speed,
+            buffs, equipment)
+
+
+def _build(record: Optional[CombatantRecord]) -> Optional[CombatantMixIn]:
+    if record is None:
+        return None
+    cls, name, cur_hp, base_max_hp, base_speed, buff_records, equipment = record
+    _check(cls, CombatantMixIn)
+    for item in equipment:
+        _check(item, Equipment)
+    try:
+        buffs = []
+        for buff_cls, state in buff_records:
+            buff = _check(buff_cls, Buff)()
+            buff.set_state(state)
+            buffs.append(buff)
+        if issubclass(cls, EquipageMixIn):
+            return cls(name, cur_hp, base_max_hp, base_speed, Buffs(*buffs), *(item() for item in equipment))
+        combatant = cls(name, cur_hp, base_max_hp, base_speed)
+    except TypeError as e:
+        raise ReplayError(f"cannot rebuild {name}: {e}") from None
+    combatant.buffs = Buffs(*buffs)
+    return combatant
+
+
+class ReplayRecorder(EventSink):
+    """
+    records a battle from its events, create it before the arena so the seed is captured before any spawn
+    """
+
+    def __init__(self, seed: Union[int, SeedSequence], max_rounds: Optional[int] = None,
+                 checkpoint_every: int = 8, sink: EventSink = None):
+        """
+        @param seed: the seed given to the arena
+        @param max_rounds: the limit the arena runs with
+        @param checkpoint_every: decisions between two state hashes, 0 only hashes the final state
+        @param sink: receives the events as well
+        """
+        seed = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        self.seed = seed.entropy, seed.spawn_key, seed.spawned
+        self.max_rounds = max_rounds
+        self.checkpoint_every = checkpoint_every
+        self.sink = sink
+        self.left: tuple[Optional[CombatantRecord], ...] = ()
+        self.right: tuple[Optional[CombatantRecord], ...] = ()
+        self.scheduler: tuple[int, tuple[float, ...]] = (_TURNS, ())
+        self.decisions: list[DecisionRecord] = []
+        self.checkpoints: list[int] = []
+
+    def begin(self, arena: Arena):
+        """
+        capture the roster, before the first turn
+        """
+        scheduler = arena.scheduler
+        if type(scheduler) is ATBScheduler:
+            self.scheduler = (_ATB, (scheduler.gauge, scheduler.round_time))
+        elif type(scheduler) is not TurnScheduler:
+            raise ReplayError(f"cannot record {scheduler.__class__.__name__}")
+        self.left = tuple(_record(c) for c in arena.left)
+        self.right = tuple(_record(c) for c in arena.right)
+
+    def emit(self, event: Event):
+        if isinstance(event, DecisionEvent):
+            self.record(event.combatant, event.decision)
+        if self.sink is not None and self.sink.enabled:
+            self.sink.emit(event)
+
+    def record(self, caster: CombatantMixIn, decision: Optional[Decision]):
+        every = self.checkpoint_every
+        if every and len(self.decisions) % every == 0:
+            self.checkpoints.append(state_hash(caster.arena))
+        if decision is None or decision[0] is None:
+            self.decisions.append((-1, None))
+            return
+        action, targeting = decision
+        try:
+            index = caster.get_actions().index(action)
+        except ValueError:
+            raise ReplayError(f"{action} is not an action of {caster}") from None
+        self.decisions.append((index, targeting))
+
+    def finish(self, arena: Arena) -> Replay:
+        return Replay(self.left, self.right, self.seed, self.max_rounds, self.scheduler, self.decisions,
+                      self.checkpoint_every, self.checkpoints, state_hash(arena))
+
+
+class ReplayBrain(Brain):
+    """
+    takes the recorded decisions in turn and checks the state hashes on the way
+    """
+
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.index = 0
+
+    def decide(self, caster: CombatantMixIn, arena: Arena) -> Optional[Decision]:
+        replay, index = self.replay, self.index
+        if index >= len(replay.decisions):
+            raise ReplayError("the recording has no more decisions")
+        every = replay.checkpoint_every
+        if every and index % every == 0 and state_hash(arena) != replay.checkpoints[index // every]:
+            raise DesyncError(index, arena.turn)
+        self.index = index + 1
+        action, targeting = replay.decisions[index]
+        if action < 0:
+            return None
+        return Decision([caster.get_actions()[action], targeting])
+
+    def finish(self, arena: Arena):
+        if self.index != len(self.replay.decisions) or state_hash(arena) != self.replay.final_hash:
+            raise DesyncError(self.index, arena.turn)
+
+
+async def record_battle(left: list[Optional[CombatantMixIn]], right: list[Optional[CombatantMixIn]],
+                        seed: Union[int, SeedSequence], max_rounds: Optional[int] = 100, checkpoint_every: int = 8,
+                        scheduler: TurnScheduler = None, sink: EventSink = None) -> Replay:
+    """
+    play a battle with the combatants' own brains and record it, teams shorter than the arena are padded
+    @param sink: receives the events as well, nothing is printed by default
+    """
+    left = left + [None] * (ARENA_WIDTH - len(left))
+    right = right + [None] * (ARENA_WIDTH - len(right))
+    recorder = ReplayRecorder(seed, max_rounds, checkpoint_every, sink)
+    arena = Arena(left, right, recorder, seed, scheduler)
+    recorder.begin(arena)
+    arena.start()
+    await arena.run(max_rounds)
+    return recorder.finish(arena)
+
+
+async def replay_battle(replay: Union[Replay, bytes], sink: EventSink = None) -> Arena:
+    """
+    play a recorded battle again, raise DesyncError if it goes another way
+    @param sink: receives the events, nothing is printed by default
+    @return: the arena once the battle ended
+    """
+    if not isinstance(replay, Replay):
+        replay = Replay.from_bytes(replay)
+    left, right = replay.build_teams()
+    brain = ReplayBrain(replay)
+    for combatant in left + right:
+        if combatant is not None:
+            combatant.brain = brain
+    arena = Arena(left, right, sink if sink is not None else NullSink(), replay.seed_sequence(),
+                  replay.build_scheduler())
+    arena.start()
+    await arena.run(replay.max_rounds)
+    brain.finish(arena)
+    return arena
@@ -2,6 +2,8 @@ from .gameplay import *
 
 
 class SelfPositionalRequirement(PreReqm):
+    __slots__ = ("position",)
+
     def __init__(self, position: Position):
         self.position = position
 
@@ -13,6 +15,8 @@ class SelfPositionalRequirement(PreReqm):
 
 
 class ValidTargetRequirement(PreReqm):
+    __slots__ = ("target",)
+
     def __init__(self, target: Targeting):
         self.target = target
 
@@ -24,12 +28,14 @@ class ValidTargetRequirement(PreReqm):
 
 
 class PosReqm(PostReqm):
+    __slots__ = ("target",)
+
     def __init__(self, target: Targeting):
         self.target = target
 
     def check(self, receiver: CombatantMixIn, targeting: Optional[Targeting]) -> Targeting:
         if targeting is None:
-            return self.target.alt(receiver.position)
+            return self.target.alt(receiver.position, receiver.arena.width)
         else:
             return targeting
 
@@ -38,17 +44,21 @@ class PosReqm(PostReqm):
 
 
 class DistanceLimitReqm(PostReqm):
+    __slots__ = ("distance",)
+
     def __init__(self, distance: int):
         self.distance = distance
 
     def check(self, receiver: CombatantMixIn, targeting: Optional[Targeting]) -> Targeting:
         pos = receiver.position
-        tar = targeting.alt(pos)
+        tar = targeting.alt(pos, receiver.arena.width)
         poss = filter(lambda x: abs(x - pos[1]) <= self.distance, tar.positions)
         return Targeting(tar.friendly, tar.selective, *poss)
 
 
 class TargetAliveReqm(PostReqm):
+    __slots__ = ()
+
     def check(self, receiver: CombatantMixIn, targeting: Optional[Targeting]) -> Targeting:
         def alive(combatant: Optional[CombatantMixIn]) -> bool:
             if combatant is None:
@@ -61,13 +71,17 @@ class TargetAliveReqm(PostReqm):
 
 
 class TargetHasBuffReqm(PreReqm):
+    __slots__ = ("buff",)
+
     def __init__(self, buff: str):
         self.buff = buff
 
     def check(self, receiver: CombatantMixIn) -> bool:
-        return any([x.name == self.buff for x in receiver.buffs])
+        return self.buff in receiver.buffs
 
 
 class TargetHasComboReqm(TargetHasBuffReqm):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("Combo")
\ No newline at end of file
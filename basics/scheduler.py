@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import heapq
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+
+class TurnScheduler:
+    """
+    who acts next in the current round, fastest first.
+    the effective speed is read once when the round starts, entries are a heap of [rank, order, combatant].
+    removed and re-keyed entries are only marked, dead combatants are dropped when they reach the top.
+    """
+
+    def __init__(self):
+        self._heap: list[list] = []
+        self._entries: dict[Any, list] = {}
+        self._order = 0
+
+    def _push(self, rank: float, combatant: Any):
+        entry = [rank, self._order, combatant]
+        self._order += 1
+        self._entries[combatant] = entry
+        heapq.heappush(self._heap, entry)
+
+    def start_round(self, combatants: Iterable[Any]) -> int:
+        """
+        queue the living combatants by their effective speed
+        @return: the rounds started, always 1
+        """
+        self.clear()
+        for combatant in combatants:
+            if combatant is not None and not combatant.dead:
+                entry = [-combatant.speed, self._order, combatant]
+                self._order += 1
+                self._entries[combatant] = entry
+                self._heap.append(entry)
+        heapq.heapify(self._heap)
+        return 1
+
+    def load(self, combatants: Iterable[Any]):
+        """
+        queue the combatants exactly in the given order
+        """
+        self.clear()
+        for rank, combatant in enumerate(combatants):
+            self._push(rank, combatant)
+
+    def clear(self):
+        self._heap = []
+        self._entries = {}
+
+    def _prune(self):
+        heap = self._heap
+        while heap and (heap[0][2] is None or heap[0][2].dead):
+            entry = heapq.heappop(heap)
+            if entry[2] is not None:
+                del self._entries[entry[2]]
+
+    def pop(self) -> Optional[Any]:
+        """
+        @return: the next living combatant to act, None once the round is over
+        """
+        self._prune()
+        if not self._heap:
+            return None
+        combatant = heapq.heappop(self._heap)[2]
+        del self._entries[combatant]
+        return combatant
+
+    def peek(self) -> Optional[Any]:
+        """
+        @return: the next living combatant to act, without taking it out of the queue
+        """
+        self._prune()
+        return self._heap[0][2] if self._heap else None
+
+    def remove(self, combatant: Any):
+        entry = self._entries.pop(combatant, None)
+        if entry is not None:
+            entry[2] = None
+
+    def rekey(self, combatant: Any):
+        """
+        put a combatant still waiting this round back in line by its current speed
+        """
+        entry = self._entries.get(combatant)
+        if entry is None or entry[0] == -combatant.speed:
+            return
+        entry[2] = None
+        self._push(-combatant.speed, combatant)
+
+    @property
+    def round_over(self) -> bool:
+        return self.peek() is None
+
+    def __contains__(self, combatant: Any) -> bool:
+        return combatant in self._entries
+
+    def __bool__(self):
+        return self.peek() is not None
+
+    def order(self) -> list:
+        """
+        the living combatants still to act, in acting order
+        """
+        return [entry[2] for entry in sorted(self._entries.values()) if not entry[2].dead]
+
+    def snapshot(self) -> tuple[tuple[float, int, Any], ...]:
+        return tuple(tuple(entry) for entry in self._entries.values())
+
+    def restore(self, state: tuple[tuple[float, int, Any], ...]):
+        self._heap = [list(entry) for entry in state]
+        self._entries = {entry[2]: entry for entry in self._heap}
+        heapq.heapify(self._heap)
+
+    def canonical(self, state: tuple[tuple[float, int, Any], ...], name: Callable[[Any], Hashable]) -> tuple:
+        """
+        a hashable form of a snapshot keeping only the order to come, the same for snapshots of different rounds
+        @param name: a hashable stand-in of a combatant
+        """
+        return tuple((entry[0], name(entry[2])) for entry in sorted(state, key=lambda entry: entry[:2]))
+
+
+class ATBScheduler(TurnScheduler):
+    """
+    active time battle: every gauge fills at the combatant's effective speed, whoever fills it first acts,
+    so fast combatants may act several times before slow ones act once.
+    the heap holds the time each combatant's gauge will be full, acting moves the clock straight to that time.
+    a round is round_time of the clock, it only counts rounds for buffs and battle limits.
+    """
+
+    def __init__(self, gauge: float = 100.0, round_time: float = 20.0):
+        """
+        @param gauge: how much a gauge holds, a combatant acts every gauge / speed
+        @param round_time: length of a round, with the defaults a combatant of speed 5 acts once a round
+        """
+        super().__init__()
+        self.gauge = gauge
+        self.round_time = round_time
+        self.now = 0.0
+        self.round_end = 0.0
+
+    def _interval(self, combatant: Any) -> float:
+        return self.gauge / max(combatant.speed, 1e-9)
+
+    def start_round(self, combatants: Iterable[Any]) -> int:
+        """
+        gauges carry over, only combatants not waiting yet start filling theirs.
+        rounds in which no gauge fills pass at once, so the round always follows the clock
+        @return: the rounds started, the one of the next gauge to fill and every empty one before it
+        """
+        for combatant in combatants:
+            if combatant is not None and not combatant.dead and combatant not in self._entries:
+                self._push(self.now + self._interval(combatant), combatant)
+        self.round_end += self.round_time
+        rounds = 1
+        if self.peek() is not None:
+            while self._heap[0][0] >= self.round_end:
+                self.round_end += self.round_time
+                rounds += 1
+        return rounds
+
+    def load(self, combatants: Iterable[Any]):
+        self.clear()
+        for i, combatant in enumerate(combatants):
+            self._push(self.now + i * 1e-9, combatant)
+
+    @property
+    def round_over(self) -> bool:
+        top = self.peek()
+        return top is None or self._heap[0][0] >= self.round_end
+
+    def pop(self) -> Optional[Any]:
+        """
+        @return: the combatant whose gauge fills next, its gauge starts filling again right away
+        """
+        self._prune()
+        if not self._heap:
+            return None
+        time, _, combatant, _ = heapq.heappop(self._heap)
+        self.now = time
+        self._push(time + self._interval(combatant), combatant)
+        return combatant
+
+    def rekey(self, combatant: Any):
+        """
+        the speed changed, the rest of the gauge fills at the new speed
+        """
+        entry = self._entries.get(combatant)
+        if entry is None or entry[3] == combatant.speed:
+            return
+        entry[2] = None
+        remaining = (entry[0] - self.now) * entry[3] / max(combatant.speed, 1e-9)
+        self._push(self.now + remaining, combatant)
+
+    def _push(self, time: float, combatant: Any):
+        entry = [time, self._order, combatant, combatant.speed]
+        self._order += 1
+        self._entries[combatant] = entry
+        heapq.heappush(self._heap, entry)
+
+    def snapshot(self) -> tuple:
+        return self.now, self.round_end, super().snapshot()
+
+    def restore(self, state: tuple):
+        self.now, self.round_end, entries = state
+        super().restore(entries)
+
+    def canonical(self, state: tuple, name: Callable[[Any], Hashable]) -> tuple:
+        """
+        the times are taken relative to the clock
+        """
+        now, round_end, entries = state
+        return round_end - now, tuple((entry[0] - now, name(entry[2]), entry[3])
+                                      for entry in sorted(entries, key=lambda entry: entry[:2]))
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Callable, Optional, Sequence
+
+from .character import *
+
+TeamFactory = Callable[[], list[Optional[CombatantMixIn]]]
+
+LEFT = "left"
+RIGHT = "right"
+
+
+class BattleResult:
+    __slots__ = ("seed", "winner", "turns", "left_damage", "right_damage")
+
+    def __init__(self, seed: int, winner: Optional[str], turns: int, left_damage: int, right_damage: int):
+        """
+        @param seed: the seed the battle was played with
+        @param winner: LEFT, RIGHT or None for a draw
+        @param turns: rounds played
+        @param left_damage: damage dealt by the left team
+        @param right_damage: damage dealt by the right team
+        """
+        self.seed = seed
+        self.winner = winner
+        self.turns = turns
+        self.left_damage = left_damage
+        self.right_damage = right_damage
+
+    def __repr__(self):
+        return f"BattleResult({self.seed}, {self.winner}, {self.turns}, {self.left_damage}, {self.right_damage})"
+
+
+class BatchResult:
+    def __init__(self, results: Sequence[BattleResult], elapsed: float, workers: int):
+        self.results = list(results)
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def battles(self) -> int:
+        return len(self.results)
+
+    def wins(self, side: Optional[str]) -> int:
+        return sum(1 for r in self.results if r.winner == side)
+
+    def win_rate(self, side: Optional[str]) -> float:
+        return self.wins(side) / self.battles if self.battles else 0.0
+
+    @property
+    def left_win_rate(self) -> float:
+        return self.win_rate(LEFT)
+
+    @property
+    def right_win_rate(self) -> float:
+        return self.win_rate(RIGHT)
+
+    @property
+    def draw_rate(self) -> float:
+        return self.win_rate(None)
+
+    @property
+    def mean_turns(self) -> float:
+        return sum(r.turns for r in self.results) / self.battles if self.battles else 0.0
+
+    @property
+    def max_turns(self) -> int:
+        return max((r.turns for r in self.results), default=0)
+
+    @property
+    def mean_left_damage(self) -> float:
+        return sum(r.left_damage for r in self.results) / self.battles if self.battles else 0.0
+
+    @property
+    def mean_right_damage(self) -> float:
+        return sum(r.right_damage for r in self.results) / self.battles if self.battles else 0.0
+
+    @property
+    def battles_per_second(self) -> float:
+        return self.battles / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "battles": self.battles,
+            "left_win_rate": self.left_win_rate,
+            "right_win_rate": self.right_win_rate,
+            "draw_rate": self.draw_rate,
+            "mean_turns": self.mean_turns,
+            "max_turns": self.max_turns,
+            "mean_left_damage": self.mean_left_damage,
+            "mean_right_damage": self.mean_right_damage,
+            "elapsed": self.elapsed,
+            "battles_per_second": self.battles_per_second,
+            "workers": self.workers,
+        }
+
+    def __repr__(self):
+        return f"BatchResult({self.summary()})"
+
+
+def _pad(team: list[Optional[CombatantMixIn]]) -> list[Optional[CombatantMixIn]]:
+    return team + [None] * (ARENA_WIDTH - len(team))
+
+
+def _alive(team: Sequence[Optional[CombatantMixIn]]) -> bool:
+    return any(c is not None and not c.dead for c in team)
+
+
+def _damage(team: Sequence[Optional[CombatantMixIn]]) -> int:
+    return sum(c.damage_dealt for c in team if c is not None)
+
+
+async def play(left: TeamFactory, right: TeamFactory, seed: int, max_rounds: int) -> BattleResult:
+    """
+    play a single battle with every combatant driven by the AI brain
+    """
+    brain = AIBrain()
+    left_team, right_team = _pad(left()), _pad(right())
+    for combatant in left_team + right_team:
+        if combatant is not None:
+            combatant.brain = brain
+    arena = Arena(left_team, right_team, NullSink(), seed)
+    arena.start()
+    await arena.run(max_rounds)
+    left_alive, right_alive = _alive(left_team), _alive(right_team)
+    winner = LEFT if left_alive and not right_alive else RIGHT if right_alive and not left_alive else None
+    return BattleResult(seed, winner, arena.turn, _damage(left_team), _damage(right_team))
+
+
+async def _play_all(left: TeamFactory, right: TeamFactory, seeds: Sequence[int],
+                    max_rounds: int) -> list[BattleResult]:
+    return [await play(left, right, seed, max_rounds) for seed in seeds]
+
+
+def run_battles(left: TeamFactory, right: TeamFactory, seeds: Sequence[int],
+                max_rounds: int = 100) -> list[BattleResult]:
+    """
+    play the battles one after another in this process, without printing anything
+    """
+    return asyncio.run(_play_all(left, right, seeds, max_rounds))
+
+
+def battle_seeds(seed: int, battles: int) -> list[int]:
+    """
+    derive one seed per battle, so results do not depend on how battles are spread across workers
+    """
+    return [child.generate_state() for child in SeedSequence(seed).spawn(battles)]
+
+
+def run_batch(left: TeamFactory, right: TeamFactory, battles: int, seed: int = 0, workers: Optional[int] = None,
+              max_rounds: int = 100, chunk_size: Optional[int] = None) -> BatchResult:
+    """
+    play many headless battles between two teams across a process pool.
+    the factories must be picklable (module level functions) and return fresh combatants on each call.
+    @param left: factory of the left team
+    @param right: factory of the right team
+    @param battles: number of battles to play
+    @param seed: master seed, the same seed gives the same results whatever the number of workers
+    @param workers: number of worker processes, None means cpu count, 1 or less runs in this process
+    @param max_rounds: battles still going after this many rounds count as draws
+    @param chunk_size: battles sent to a worker at once
+    @return:
+    """
+    workers = (os.cpu_count() or 1) if workers is None else max(workers, 1)
+    seeds = battle_seeds(seed, battles)
+    start = time.perf_counter()
+    if workers == 1:
+        results = run_battles(left, right, seeds, max_rounds)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunk_size = chunk_size or max(1, battles // (workers * 4))
+        chunks = [seeds[i:i + chunk_size] for i in range(0, battles, chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_battles, left, right, chunk, max_rounds) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+    return BatchResult(results, time.perf_counter() - start, workers)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import itertools
+import weakref
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from .character import *
+from .mcts import MCTSBrain
+from .outcomes import action_paths
+
+# memoized state values kept by a solver, the least recently used are dropped past this
+SOLVER_CACHE_SIZE = 200_000
+
+
+class SolverError(ValueError):
+    pass
+
+
+def _buff_key(buff: Buff, state: Any, name: Callable[[CombatantMixIn], Hashable]) -> tuple:
+    if isinstance(buff, IndBuff):
+        clock, _, heap = state
+        state = tuple((expiry - clock, stack) for expiry, _, stack in sorted(heap))
+    protector = getattr(buff, "protector", None)
+    return buff.name, state, None if protector is None else name(protector)
+
+
+class Solver:
+    """
+    expectiminimax over the turns of a small battle: the side solved for takes its best decision, the other side
+    the worst one for it, and every chance outcome of an action is weighed by its exact probability.
+    the values of the states searched are memoized by their canonical encoding, up to cache_size of them,
+    the least recently used dropped first.
+    combatants are numbered in state keys as the solver first meets them, the numbers are held weakly,
+    so a solver reused over many battles keeps none of their combatants alive.
+    """
+
+    def __init__(self, horizon: int = 6, cache_size: int = SOLVER_CACHE_SIZE, max_nodes: Optional[int] = None,
+                 leaf: Optional[Callable[[Arena, bool], float]] = None):
+        """
+        @param horizon: turns searched ahead, a battle not over by then is scored by leaf
+        @param max_nodes: states a search may expand before it gives up with SolverError, None for no limit
+        @param leaf: the score for the left side or not of a state at the horizon,
+        None scores it 0, so that values are the exact probabilities of winning within the horizon
+        """
+        self.horizon = horizon
+        self.cache_size = cache_size
+        self.max_nodes = max_nodes
+        self.leaf = leaf
+        self.memo: OrderedDict[Hashable, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._nodes = 0
+        self._names: weakref.WeakKeyDictionary[CombatantMixIn, int] = weakref.WeakKeyDictionary()
+        self._numbers = itertools.count()
+
+    def name(self, combatant: CombatantMixIn) -> int:
+        """
+        the number standing for the combatant in state keys
+        """
+        number = self._names.get(combatant)
+        if number is None:
+            number = self._names[combatant] = next(self._numbers)
+        return number
+
+    def state_key(self, arena: Arena, snapshot: Optional[ArenaSnapshot] = None) -> tuple:
+        """
+        the canonical encoding of a battle state: positions, hp, buff stacks and durations and the order to come.
+        the clocks of buffs and schedulers are made relative, so equal states reached on different rounds match
+        @param snapshot: a snapshot of the arena to encode instead of its current state
+        """
+        if snapshot is None:
+            snapshot = arena.snapshot()
+        name = self.name
+        slots = tuple(None if c is None else name(c) for c in snapshot.left + snapshot.right)
+        combatants = tuple((state[0], tuple(_buff_key(buff, s, name) for buff, s in state[2]), state[3:])
+                           for _, state in snapshot.combatants)
+        return slots, combatants, arena.scheduler.canonical(snapshot.action_order, name)
+
+    def clear(self):
+        self.memo.clear()
+        self._names = weakref.WeakKeyDictionary()
+        self._numbers = itertools.count()
+        self.hits = self.misses = 0
+
+    def value(self, arena: Arena, left: bool) -> float:
+        """
+        the value for a side of the arena between two turns, the arena is left as it was
+        @raise SolverError: the search expanded more than max_nodes states
+        """
+        state = arena.snapshot()
+        sink = arena.sink
+        arena.sink = NullSink()
+        self._nodes = 0
+        try:
+            return self._state(arena, state, self.state_key(arena, state), left, self.horizon)
+        finally:
+            arena.restore(state)
+            arena.sink = sink
+
+    def best(self, arena: Arena, caster: CombatantMixIn) -> tuple[Optional[Decision], float]:
+        """
+        the best decision of the caster on its turn, the arena is left as it was
+        @return: the decision and its value for the caster's side
+        @raise SolverError: the search expanded more than max_nodes states
+        """
+        decisions = Brain.legal_decisions(caster) or [None]
+        left = arena.find_position(caster).left
+        state = arena.snapshot()
+        sink = arena.sink
+        arena.sink = NullSink()
+        self._nodes = 0
+        values = []
+        try:
+            for decision in decisions:
+                arena.restore(state)
+                values.append(self._expect(arena, caster, decision, left, self.horizon))
+        finally:
+            arena.restore(state)
+            arena.sink = sink
+        best = max(range(len(decisions)), key=values.__getitem__)
+        return decisions[best], values[best]
+
+    def _state(self, arena: Arena, snapshot: ArenaSnapshot, key: tuple, left: bool, depth: int) -> float:
+        if depth <= 0:
+            if self.leaf is None:
+                return 0.0
+            arena.restore(snapshot)
+            return self.leaf(arena, left)
+        memo_key = (key, left, depth)
+        value = self.memo.get(memo_key)
+        if value is not None:
+            self.memo.move_to_end(memo_key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        self._nodes += 1
+        if self.max_nodes is not None and self._nodes > self.max_nodes:
+            raise SolverError(f"more than {self.max_nodes} states to search")
+        arena.restore(snapshot)
+        actor = MCTSBrain.next_actor(arena)
+        decisions = Brain.legal_decisions(actor) or [None]
+        ours = arena.find_position(actor).left == left
+        start = arena.snapshot()
+        value = None
+        for decision in decisions:
+            arena.restore(start)
+            expected = self._expect(arena, actor, decision, left, depth)
+            if value is None or (expected > value if ours else expected < value):
+                value = expected
+        self.memo[memo_key] = value
+        if len(self.memo) > self.cache_size:
+            self.memo.popitem(last=False)
+        return value
+
+    def _expect(self, arena: Arena, actor: CombatantMixIn, decision: Optional[Decision], left: bool,
+                depth: int) -> float:
+        total = 0.0
+        for key, (p, snapshot, result) in self._successors(arena, actor, decision, left).items():
+            total += p * (self._state(arena, snapshot, key, left, depth - 1) if result is None else result)
+        return total
+
+    def _successors(self, arena: Arena, actor: CombatantMixIn, decision: Optional[Decision],
+                    left: bool) -> dict[tuple, list]:
+        """
+        the states after the actor's turn, by key: their probability, snapshot and value if the battle is over
+        """
+        start = arena.snapshot()
+        if decision is None or decision[0] is None:
+            paths = [(1.0, {}, start)]
+        else:
+            paths = action_paths(actor, decision[0], decision[1], keep_state=True)
+        successors = {}
+        for weight, hp, after in paths:
+            rolls = [[(c, value, p) for value, p in dist.as_dict().items()] for c, dist in hp.items()]
+            for roll in itertools.product(*rolls):
+                arena.restore(after)
+                p = weight
+                for combatant, value, q in roll:
+                    combatant.cur_hp = value
+                    p *= q
+                actor.on_turn_end()
+                snapshot = arena.snapshot()
+                key = self.state_key(arena, snapshot)
+                found = successors.get(key)
+                if found is None:
+                    successors[key] = [p, snapshot, self._result(arena, left)]
+                else:
+                    found[0] += p
+        arena.restore(start)
+        return successors
+
+    @staticmethod
+    def _result(arena: Arena, left: bool) -> Optional[float]:
+        if not arena.is_over():
+            return None
+        ours = arena.left if left else arena.right
+        return 1.0 if any(c is not None and not c.dead for c in ours) else 0.0
+
+
+class SolverBrain(Brain):
+    """
+    plays endgames with a Solver: with at most max_alive combatants alive it takes the best decision found,
+    otherwise, or when the search needs more than max_nodes states, it decides as the fallback brain.
+    the memo is kept between decisions, later turns of the same endgame are mostly looked up.
+    """
+
+    def __init__(self, horizon: int = 4, max_alive: int = 3, max_nodes: Optional[int] = 1000,
+                 cache_size: int = SOLVER_CACHE_SIZE,
+                 leaf: Optional[Callable[[Arena, bool], float]] = MCTSBrain.evaluate,
+                 fallback: Optional[Brain] = None):
+        """
+        @param max_alive: the most combatants alive, on both sides, for the state to be solved
+        @param leaf: the score of a state at the horizon, the remaining health by default
+        @param fallback: the brain deciding the other states, an AIBrain by default
+        """
+        self.solver = Solver(horizon, cache_size, max_nodes, leaf)
+        self.max_alive = max_alive
+        self.fallback = AIBrain() if fallback is None else fallback
+        self.solved = 0
+        self.fallbacks = 0
+
+    def small(self, arena: Arena) -> bool:
+        return sum(c is not None and not c.dead for c in arena.left + arena.right) <= self.max_alive
+
+    def decide(self, caster: CombatantMixIn, arena: Arena) -> Optional[Decision]:
+        decisions = self.legal_decisions(caster)
+        if len(decisions) <= 1:
+            return decisions[0] if decisions else None
+        if self.small(arena):
+            try:
+                decision, _ = self.solver.best(arena, caster)
+            except SolverError:
+                pass
+            else:
+                self.solved += 1
+                return decision
+        self.fallbacks += 1
+        return self.fallback.decide(caster, arena)
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import os
+import time
+from typing import Callable, Optional, Sequence
+
+from .equipments import *
+from .simulation import *
+
+TOURNAMENT_FORMAT = 1
+
+
+class TournamentError(ValueError):
+    pass
+
+
+class Roster:
+    """
+    a picklable team factory, so tournaments can ship it to worker processes.
+    every member is a combatant class and its constructor arguments;
+    classes among the arguments are instantiated on every call, so each battle gets fresh buffs and equipment.
+    """
+    __slots__ = ("name", "members")
+
+    def __init__(self, name: str, members: Sequence[tuple[type, tuple]]):
+        self.name = name
+        self.members = tuple((cls, tuple(args)) for cls, args in members)
+
+    def __call__(self) -> list[Optional[CombatantMixIn]]:
+        team = [cls(*(arg() if isinstance(arg, type) else arg for arg in args)) for cls, args in self.members]
+        return team + [None] * (ARENA_WIDTH - len(team))
+
+    def __repr__(self):
+        return f"Roster({self.name})"
+
+
+def loadouts(items: Sequence[type] = (Sword, Shield, Bow, MagicBook)) -> list[tuple[type, ...]]:
+    """
+    every combination of the items that fits on one character, smallest first
+    """
+    found = []
+    for size in range(1, len(items) + 1):
+        for combination in itertools.combinations(items, size):
+            try:
+                Equipage(*(item() for item in combination))
+            except ValueError:
+                continue
+            found.append(combination)
+    return found
+
+
+def character_rosters(kits: Sequence[tuple[type, ...]], size: int = 3, hp: int = 20,
+                      speed: int = 5) -> list[Roster]:
+    """
+    one team of characters per kit, every member wearing the same kit
+    """
+    return [Roster("+".join(item.__name__ for item in kit),
+                   [(Character, (chr(ord("a") + i), hp, hp, speed, Buffs) + kit) for i in range(size)])
+            for kit in kits]
+
+
+def pack(cls: type, size: int = 2) -> Roster:
+    """
+    a team of monsters of one kind
+    """
+    return Roster(f"{cls.__name__}x{size}", [(cls, (f"{cls.__name__.lower()}{i}",)) for i in range(size)])
+
+
+def wilson_interval(wins: float, battles: int, z: float = 1.96) -> tuple[float, float]:
+    """
+    Wilson score interval of a win rate, 95% by default; it stays inside [0, 1] even for few battles
+    """
+    if battles == 0:
+        return 0.0, 1.0
+    rate = wins / battles
+    denominator = 1 + z * z / battles
+    centre = (rate + z * z / (2 * battles)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / battles + z * z / (4 * battles * battles)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class Cell:
+    """
+    results of the row team against the column team, from the row team's side
+    """
+    __slots__ = ("row", "col", "wins", "losses", "draws", "turns")
+
+    def __init__(self, row: str, col: str):
+        self.row = row
+        self.col = col
+        self.wins = self.losses = self.draws = self.turns = 0
+
+    @property
+    def battles(self) -> int:
+        return self.wins + self.losses + self.draws
+
+    @property
+    def win_rate(self) -> float:
+        """
+        draws count as half a win
+        """
+        return (self.wins + self.draws / 2) / self.battles if self.battles else 0.0
+
+    @property
+    def interval(self) -> tuple[float, float]:
+        return wilson_interval(self.wins + self.draws / 2, self.battles)
+
+    def add(self, wins: int, losses: int, draws: int, turns: int):
+        self.wins += wins
+        self.losses += losses
+        self.draws += draws
+        self.turns += turns
+
+    def summary(self) -> dict[str, float]:
+        low, high = self.interval
+        return {"battles": self.battles, "wins": self.wins, "losses": self.losses, "draws": self.draws,
+                "win_rate": self.win_rate, "low": low, "high": high,
+                "mean_turns": self.turns / self.battles if self.battles else 0.0}
+
+    def __repr__(self):
+        low, high = self.interval
+        return f"Cell({self.row} vs {self.col}: {self.win_rate:.3f} [{low:.3f}, {high:.3f}] of {self.battles})"
+
+
+def _play_task(left: TeamFactory, right: TeamFactory, seeds: Sequence[int], max_rounds: int) -> tuple[int, ...]:
+    """
+    @return: left wins, right wins, draws and turns; only the counts travel back from the worker
+    """
+    results = run_battles(left, right, seeds, max_rounds)
+    return (sum(r.winner == LEFT for r in results), sum(r.winner == RIGHT for r in results),
+            sum(r.winner is None for r in results), sum(r.turns for r in results))
+
+
+class Tournament:
+    """
+    every row team against every column team, or a round robin when there are no column teams.
+    a matchup's battles are cut into chunks; the chunks of all matchups go to a process pool in turn,
+    so idle workers keep taking the remaining work and every cell fills in early.
+    results stream into the matrix as chunks finish, and a checkpoint file lets a run resume where it stopped.
+    """
+
+    def __init__(self, rows: Sequence[Roster], cols: Optional[Sequence[Roster]] = None, battles: int = 100,
+                 seed: int = 0, max_rounds: int = 100, chunk_size: int = 25, checkpoint: Optional[str] = None,
+                 checkpoint_every: float = 5.0):
+        """
+        @param rows: teams playing on the left
+        @param cols: teams playing on the right, None plays every row team once against every other
+        @param battles: battles per matchup
+        @param seed: master seed, the same seed gives the same matrix whatever the workers and interruptions
+        @param max_rounds: battles still going after this many rounds count as draws
+        @param chunk_size: battles sent to a worker at once
+        @param checkpoint: json file progress is saved to and resumed from, None keeps nothing
+        @param checkpoint_every: seconds between checkpoint writes
+        """
+        self.rows = list(rows)
+        self.round_robin = cols is None
+        self.cols = self.rows if cols is None else list(cols)
+        names = [r.name for r in self.rows] + ([] if self.round_robin else [c.name for c in self.cols])
+        if len(set(names)) != len(names):
+            raise TournamentError("roster names must be unique")
+        self.battles = battles
+        self.seed = seed
+        self.max_rounds = max_rounds
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        if self.round_robin:
+            self.matchups = list(itertools.combinations(range(len(self.rows)), 2))
+        else:
+            self.matchups = list(itertools.product(range(len(self.rows)), range(len(self.cols))))
+        self.cells = [[Cell(row.name, col.name) for col in self.cols] for row in self.rows]
+        self.done: set[tuple[int, int]] = set()
+        self._results: list[list[int]] = []
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load(checkpoint)
+
+    @property
+    def chunks(self) -> int:
+        return -(-self.battles // self.chunk_size)
+
+    def tasks(self) -> list[tuple[int, int]]:
+        """
+        (matchup, chunk) pairs still to play, chunk by chunk across the matchups
+        """
+        return [(m, c) for c in range(self.chunks) for m in range(len(self.matchups)) if (m, c) not in self.done]
+
+    def seeds(self, matchup: int, chunk: int) -> list[int]:
+        """
+        the seeds of a chunk, the same as spawning one child per battle from the matchup's sequence
+        """
+        battles = range(chunk * self.chunk_size, min((chunk + 1) * self.chunk_size, self.battles))
+        return [SeedSequence(self.seed, (matchup, i)).generate_state() for i in battles]
+
+    def record(self, matchup: int, chunk: int, counts: Sequence[int]):
+        row, col = self.matchups[matchup]
+        wins, losses, draws, turns = counts
+        self.cells[row][col].add(wins, losses, draws, turns)
+        if self.round_robin:
+            self.cells[col][row].add(losses, wins, draws, turns)
+        self.done.add((matchup, chunk))
+        self._results.append([matchup, chunk, *counts])
+
+    def run(self, workers: Optional[int] = None,
+            progress: Optional[Callable[[Cell], None]] = None) -> list[list[Cell]]:
+        """
+        play whatever is left
+        @param workers: number of worker processes, None means cpu count, 1 or less runs in this process
+        @param progress: called with the updated cell every time a chunk finishes
+        @return: the matrix, cells[row][col]
+        """
+        workers = (os.cpu_count() or 1) if workers is None else max(workers, 1)
+        pending = self.tasks()
+        last_save = time.monotonic()
+
+        def finished(matchup: int, chunk: int, counts: Sequence[int]):
+            nonlocal last_save
+            self.record(matchup, chunk, counts)
+            if progress is not None:
+                progress(self.cells[self.matchups[matchup][0]][self.matchups[matchup][1]])
+            if self.checkpoint is not None and time.monotonic() - last_save >= self.checkpoint_every:
+                self.save(self.checkpoint)
+                last_save = time.monotonic()
+
+        try:
+            if workers == 1:
+                for matchup, chunk in pending:
+                    finished(matchup, chunk, _play_task(*self._arguments(matchup, chunk)))
+            else:
+                self._run_pool(pending, workers, finished)
+        finally:
+            if self.checkpoint is not None:
+                self.save(self.checkpoint)
+        return self.cells
+
+    def _arguments(self, matchup: int, chunk: int) -> tuple:
+        row, col = self.matchups[matchup]
+        return self.rows[row], self.cols[col], self.seeds(matchup, chunk), self.max_rounds
+
+    def _run_pool(self, pending: list[tuple[int, int]], workers: int, finished: Callable):
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        pending = iter(pending)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            running = {}
+            while True:
+                # a few chunks queued per worker keep them busy without submitting the whole tournament at once
+                for matchup, chunk in itertools.islice(pending, workers * 2 - len(running)):
+                    running[executor.submit(_play_task, *self._arguments(matchup, chunk))] = matchup, chunk
+                if not running:
+                    return
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished(*running.pop(future), future.result())
+
+    def matrix(self) -> list[list[float]]:
+        """
+        win rates, rows against columns
+        """
+        return [[cell.win_rate for cell in row] for row in self.cells]
+
+    @property
+    def complete(self) -> bool:
+        return len(self.done) == len(self.matchups) * self.chunks
+
+    def summary(self) -> dict[str, object]:
+        return {
+            "rows": [r.name for r in self.rows],
+            "cols": [c.name for c in self.cols],
+            "battles": self.battles,
+            "complete": self.complete,
+            "cells": [[cell.summary() for cell in row] for row in self.cells],
+        }
+
+    def _settings(self) -> dict[str, object]:
+        return {"format": TOURNAMENT_FORMAT, "rows": [r.name for r in self.rows],
+                "cols": None if self.round_robin else [c.name for c in self.cols], "battles": self.battles,
+                "seed": self.seed, "max_rounds": self.max_rounds, "chunk_size": self.chunk_size}
+
+    def save(self, path: str):
+        """
+        write the finished chunks; the file is replaced atomically, so a crash mid write keeps the last one
+        """
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as file:
+            json.dump({**self._settings(), "results": self._results}, file)
+        os.replace(temp, path)
+
+    def load(self, path: str):
+        """
+        take over the finished chunks of a checkpoint written with the same settings
+        """
+        try:
+            with open(path) as file:
+                data = json.load(file)
+            results = data.pop("results")
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            raise TournamentError(f"unreadable checkpoint {path}: {e}") from e
+        if data != self._settings():
+            raise TournamentError(f"checkpoint {path} was written by a different tournament")
+        for matchup, chunk, *counts in results:
+            if (matchup, chunk) not in self.done:
+                self.record(matchup, chunk, counts)
+
+    def table(self) -> str:
+        """
+        the matrix as text, win rates with their intervals
+        """
+        head = max(len(r.name) for r in self.rows)
+        width = max(19, *(len(c.name) for c in self.cols))
+        lines = [" " * head + "".join(f" {c.name:>{width}}" for c in self.cols)]
+        for roster, row in zip(self.rows, self.cells):
+            cells = []
+            for cell in row:
+                if cell.battles:
+                    low, high = cell.interval
+                    cells.append(f" {f'{cell.win_rate:.2f} [{low:.2f},{high:.2f}]':>{width}}")
+                else:
+                    cells.append(f" {'-':>{width}}")
+            lines.append(f"{roster.name:<{head}}" + "".join(cells))
+        return "\n".join(lines)
@@ -0,0 +1,64 @@
+"""
+memory blocks allocated when combatants list their actions
+
+    python -m benchmarks.bench_actions
+"""
+from __future__ import annotations
+
+import json
+import tracemalloc
+
+from basics import *
+from game import heroes, wild_dogs
+
+
+def blocks_per_call(calls: int = 100) -> float:
+    """
+    blocks still allocated after get_actions, with every result kept alive
+    """
+    combatants = heroes() + wild_dogs()
+    for combatant in combatants:
+        combatant.get_actions()
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(calls):
+        for combatant in combatants:
+            kept.append(combatant.get_actions())
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return blocks / (calls * len(combatants))
+
+
+def blocks_per_turn(turns: int = 200) -> float:
+    """
+    blocks still allocated after a turn of a headless battle, with every decision kept alive
+    """
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    played = 0
+    while played < turns:
+        arena = Arena(heroes(), wild_dogs(), NullSink(), seed=played)
+        for combatant in arena.left + arena.right:
+            combatant.brain = AIBrain()
+        arena.start()
+        over = False
+        while not over and played < turns:
+            combatant = arena.advance()
+            if not arena.can_act(combatant):
+                continue
+            decision = combatant.brain.decide(combatant, arena)
+            kept.append(decision)
+            played += 1
+            over = arena.take_turn(combatant, decision)
+        del arena
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return blocks / played
+
+
+if __name__ == "__main__":
+    print(json.dumps({"blocks_per_get_actions": blocks_per_call(), "blocks_per_turn": blocks_per_turn()}, indent=2))
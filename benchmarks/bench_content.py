@@ -0,0 +1,92 @@
+"""
+load time of content tables with thousands of rows, parsed and from the compiled cache
+
+    python -m benchmarks.bench_content
+    python -m benchmarks.bench_content --rows 5000
+
+the cold start figures run a fresh interpreter that imports basics and loads the tables.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+from basics import *
+
+
+def write_tables(directory: str, rows: int):
+    """
+    rows of every table, two effects per action
+    """
+    tables = {
+        "buffs": ["name,kind,timing,mag,acc,crit,evadable,combo_only,duration,stack,stackable"] +
+                 [f"Buff{i},{'ind' if i % 2 else 'ref'},Defend,0.{i % 9},0.5,,1,,3,1,1" for i in range(rows)],
+        "actions": ["name,self_positions,target,alive,valid_target,distance,ignore_evade"] +
+                   [f"Action{i},0 1 2,enemy single 0 1 2,1,,,{i % 2}" for i in range(rows)],
+        "effects": ["action,target,kind,amount,alt_amount,buff,duration,stack,ignore_evade"] +
+                   [f"Action{i},enemy single 0 1 2,damage,{i % 5}-{i % 5 + 3},,,,," for i in range(rows)] +
+                   [f"Action{i},enemy single 0 1 2,buff,,,Buff{i},,," for i in range(rows)],
+        "equipment": ["name,slot,atk,band,actions,crit_taken,max_hp_bonus"] +
+                     [f"Item{i},one_hand,{i % 20},1-2,Action{i} Action{(i + 1) % rows},0.5,0.1" for i in range(rows)],
+        "combatants": ["name,kind,hp,max_hp,speed,buffs,equipment,actions"] +
+                      [f"Unit{i},character,20,20,{i % 10},Buff{i},Item{i}," for i in range(rows)],
+    }
+    for table, lines in tables.items():
+        with open(os.path.join(directory, f"{table}.csv"), "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+def cold_start(code: str, repeat: int = 5) -> float:
+    """
+    @return: best wall time of a fresh interpreter running the code
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(rows: int = 2000) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory, \
+            patch.dict(os.environ, {"XDG_CACHE_HOME": os.path.join(directory, "cache")}):
+        # the compiled cache goes with the tables instead of into the user's cache directory, the runs below inherit it
+        write_tables(directory, rows)
+        start = time.perf_counter()
+        content = load_content(directory, cache=False)
+        parsed = time.perf_counter() - start
+        load_content(directory)
+        start = time.perf_counter()
+        load_content(directory)
+        cached = time.perf_counter() - start
+        start = time.perf_counter()
+        content.team(*list(content.combatants)[:100])
+        hundred = time.perf_counter() - start
+        load = f"from basics import load_content; load_content({directory!r})"
+        return {
+            "rows_per_table": rows,
+            "parse_seconds": parsed,
+            "cached_seconds": cached,
+            "build_100_combatants_seconds": hundred,
+            "interpreter_seconds": cold_start("pass"),
+            "import_seconds": cold_start("import basics"),
+            "cold_start_cached_seconds": cold_start(load),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="rows of every table")
+    args = parser.parse_args(argv)
+    print(json.dumps(measure(args.rows), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+import time of the package, read from `python -X importtime` in fresh interpreters
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 20
+
+every statement is timed in its own interpreter; the figures are the best cumulative
+microseconds of the basics modules, the stdlib they pull in included, and the best wall time.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = {
+    "import": "import basics",
+    "arena": "from basics import Arena",
+    "run_batch": "from basics import run_batch",
+    "star": "from basics import *",
+}
+
+
+def import_time(code: str) -> tuple[int, int]:
+    """
+    @return: cumulative microseconds of the basics imports the code triggers, and the number of basics modules
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], check=True, cwd=ROOT,
+                            capture_output=True, text=True).stderr
+    total = modules = 0
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.strip().startswith("basics"):
+            continue
+        modules += 1
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total, modules
+
+
+def wall_time(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
+    return time.perf_counter() - start
+
+
+def measure(repeat: int = 10) -> dict[str, dict[str, float]]:
+    baseline = min(wall_time("pass") for _ in range(repeat))
+    results = {}
+    for name, code in STATEMENTS.items():
+        timings = [import_time(code) for _ in range(repeat)]
+        results[name] = {
+            "statement": code,
+            "import_us": min(total for total, _ in timings),
+            "basics_modules": timings[0][1],
+            "wall_seconds": min(wall_time(code) for _ in range(repeat)) - baseline,
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters per statement")
+    args = parser.parse_args(argv)
+    print(json.dumps(measure(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+memory taken by the hot value types, by a combatant and by a batch of battles
+
+    python -m benchmarks.bench_memory
+    python -m benchmarks.bench_memory --battles 1000
+
+everything is traced by tracemalloc after a collection, so the batch runs a few times slower than usual.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+from basics import *
+from game import heroes, wild_dogs
+
+
+def traced(build: Callable[[], list]) -> tuple[int, list]:
+    """
+    @return: bytes still allocated once build returned, after a collection, and what it built
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return used, kept
+
+
+def factories() -> dict[str, Callable[[], object]]:
+    return {
+        "Attack": lambda: Attack((1, 2)),
+        "Targeting": lambda: Targeting(False, True, 0, 1, 2),
+        "Position": lambda: Position((True, 0)),
+        "Decision": lambda: Decision([None, None]),
+        "Timer": lambda: Timer(3),
+        "Dodge": lambda: Dodge(),
+        "Combo": lambda: Combo(),
+        "Damage": lambda: Damage((1, 2)),
+        "PosReqm": lambda: PosReqm(Targeting.all_enemy()),
+        "BattleResult": lambda: BattleResult(0, LEFT, 1, 0, 0),
+    }
+
+
+def per_instance(factory: Callable[[], object], number: int = 1000) -> float:
+    """
+    @return: bytes an instance takes, interned values cost only the reference kept to them
+    """
+    used, _ = traced(lambda: [factory() for _ in range(number)])
+    return used / number
+
+
+def per_combatant(teams: int = 1000) -> float:
+    """
+    @return: bytes allocated per combatant of the game.py roster, buffs and equipment included
+    """
+    used, kept = traced(lambda: [heroes() + wild_dogs() for _ in range(teams)])
+    return used / sum(len(team) for team in kept)
+
+
+def per_batch(battles: int = 10000) -> dict[str, float]:
+    """
+    play a batch in this process and trace it
+    @return: peak bytes while playing and bytes the results keep
+    """
+    seeds = battle_seeds(0, battles)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        began = time.perf_counter()
+        results = run_battles(heroes, wild_dogs, seeds)
+        elapsed = time.perf_counter() - began
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "battles": len(results),
+        "peak_bytes": peak - start,
+        "retained_bytes": current - start,
+        "traced_seconds": elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=10000, help="battles in the traced batch")
+    parser.add_argument("--teams", type=int, default=1000, help="rosters built to measure a combatant")
+    args = parser.parse_args(argv)
+    report = {
+        "instance_bytes": {name: per_instance(factory) for name, factory in factories().items()},
+        "bytes_per_combatant": per_combatant(args.teams),
+        "batch": per_batch(args.battles),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
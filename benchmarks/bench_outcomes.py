@@ -0,0 +1,74 @@
+"""
+exact outcome distributions against sampling the same actions, on the game.py roster
+
+    python -m benchmarks.bench_outcomes
+    python -m benchmarks.bench_outcomes --samples 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections import Counter
+from random import Random
+
+from basics import *
+from game import heroes, wild_dogs
+
+
+def sample(arena: Arena, caster: CombatantMixIn, action: Action, target, samples: int) -> dict:
+    state = arena.snapshot()
+    sink, rand = arena.sink, arena.rand
+    arena.sink = NullSink()
+    counts = {c: Counter() for c in arena.left + arena.right if c is not None}
+    try:
+        for i in range(samples):
+            arena.rand = Random(i)
+            action.execute(caster, target)
+            for combatant, count in counts.items():
+                count[combatant.cur_hp] += 1
+            arena.restore(state)
+    finally:
+        arena.sink, arena.rand = sink, rand
+    return {c: {hp: k / samples for hp, k in count.items()} for c, count in counts.items()}
+
+
+def measure(samples: int = 10000, repeat: int = 1000) -> dict[str, dict[str, float]]:
+    arena = Arena(heroes(), wild_dogs(), NullSink(), seed=0)
+    arena.start()
+    a, d = arena.left[0], arena.left[3]
+    cases = {
+        "slash": (a, shared_action(Slash), Targeting(False, True, 1)),
+        "bash_aoe": (a, shared_action(Bash), None),
+        "shot": (d, shared_action(Shot), Targeting(False, True, 1)),
+    }
+    results = {}
+    for name, (caster, action, target) in cases.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outcome = action_outcome(caster, action, target)
+        exact = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        sampled = sample(arena, caster, action, target, samples)
+        sampling = time.perf_counter() - start
+        error = max(abs(outcome.hp(c).get(hp, 0.0) - sampled[c].get(hp, 0.0))
+                    for c in outcome.combatants for hp in set(outcome.hp(c)) | set(sampled[c]))
+        results[name] = {
+            "paths": len(outcome.paths),
+            "exact_microseconds": exact * 1e6,
+            "sampled_milliseconds": sampling * 1e3,
+            "samples": samples,
+            "max_sampling_error": error,
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=10000, help="sampled executions per action")
+    args = parser.parse_args(argv)
+    print(json.dumps(measure(args.samples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+replay size and speed against headless simulation, on the game.py roster
+
+    python -m benchmarks.bench_replay
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from basics import *
+from game import heroes, wild_dogs
+
+
+def ai_heroes() -> list[CombatantMixIn]:
+    team = heroes()
+    for combatant in team:
+        combatant.brain = AIBrain()
+    return team
+
+
+async def record_all(seeds: list[int]) -> list[bytes]:
+    return [(await record_battle(ai_heroes(), wild_dogs(), seed)).to_bytes() for seed in seeds]
+
+
+async def replay_all(replays: list[bytes]):
+    for data in replays:
+        await replay_battle(data)
+
+
+def measure(battles: int = 500) -> dict[str, float]:
+    seeds = battle_seeds(0, battles)
+    replays = asyncio.run(record_all(seeds))
+    start = time.perf_counter()
+    run_battles(heroes, wild_dogs, seeds)
+    headless = time.perf_counter() - start
+    start = time.perf_counter()
+    asyncio.run(replay_all(replays))
+    replayed = time.perf_counter() - start
+    sizes = sorted(len(data) for data in replays)
+    return {
+        "battles": battles,
+        "mean_bytes": sum(sizes) / battles,
+        "max_bytes": sizes[-1],
+        "headless_battles_per_second": battles / headless,
+        "replay_battles_per_second": battles / replayed,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure(), indent=2))
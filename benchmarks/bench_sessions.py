@@ -0,0 +1,80 @@
+"""
+concurrent player battles on one event loop, every player an in-memory client behind a QueueBrain
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --sessions 1000 --think 0.05
+
+a ticker measures the lag of the loop while the battles run; a player thinking never blocks it.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from random import Random
+
+from basics import *
+from game import heroes, wild_dogs
+
+
+async def player(brain: QueueBrain, think: float, seed: int):
+    rand = Random(seed)
+    while True:
+        request = await brain.outbox.get()
+        if isinstance(request, DecisionRequest):
+            await asyncio.sleep(think)
+            brain.put(f"{request.id} {rand.randrange(len(request.options))}")
+
+
+async def session(seed: int, think: float, timeout: float) -> tuple[int, int]:
+    brain = QueueBrain(timeout)
+    left = heroes()
+    for combatant in left:
+        combatant.brain = brain
+    client = asyncio.ensure_future(player(brain, think, seed))
+    arena = Arena(left, wild_dogs() + [None, None], NullSink(), seed)
+    arena.start()
+    await arena.run(100)
+    client.cancel()
+    return arena.turn, brain.timeouts
+
+
+async def measure(sessions: int = 500, think: float = 0.01, timeout: float = 1.0) -> dict[str, float]:
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - start - 0.001)
+
+    tick = asyncio.ensure_future(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(session(seed, think, timeout) for seed in range(sessions)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return {
+        "sessions": sessions,
+        "think_seconds": think,
+        "elapsed_seconds": elapsed,
+        "turns": sum(turns for turns, _ in results),
+        "timeouts": sum(timeouts for _, timeouts in results),
+        "max_loop_lag_seconds": lag,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=500, help="battles played at once")
+    parser.add_argument("--think", type=float, default=0.01, help="seconds a player takes to answer")
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds before the AI decides instead")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(measure(args.sessions, args.think, args.timeout)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
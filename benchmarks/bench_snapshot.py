@@ -0,0 +1,35 @@
+"""
+compare Arena.snapshot/restore with copy.deepcopy on the game.py roster
+
+    python -m benchmarks.bench_snapshot
+"""
+from __future__ import annotations
+
+import copy
+import json
+import timeit
+
+from basics import *
+from game import heroes, wild_dogs
+
+
+def arena() -> Arena:
+    battle = Arena(heroes(), wild_dogs(), NullSink())
+    battle.start()
+    return battle
+
+
+def measure(number: int = 2000) -> dict[str, float]:
+    battle = arena()
+    snapshot = battle.snapshot()
+    results = {
+        "snapshot": timeit.timeit(battle.snapshot, number=number) / number,
+        "restore": timeit.timeit(lambda: battle.restore(snapshot), number=number) / number,
+        "deepcopy": timeit.timeit(lambda: copy.deepcopy(battle), number=number) / number,
+    }
+    results["deepcopy_vs_snapshot_restore"] = results["deepcopy"] / (results["snapshot"] + results["restore"])
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure(), indent=2))
@@ -0,0 +1,68 @@
+"""
+exact endgame values by search horizon, and the solver brain against AIBrain on the same endgame
+
+    python -m benchmarks.bench_solver
+    python -m benchmarks.bench_solver --horizon 8 --battles 100
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from basics import *
+
+
+def endgame(brain: Brain, seed: int = 0) -> Arena:
+    """
+    a wounded fighter against a wounded wild dog
+    """
+    a = Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword())
+    a.cur_hp = 9
+    a.brain = brain
+    e = WildDog("e")
+    e.cur_hp = 12
+    arena = Arena([a, None, None, None], [e, None, None, None], NullSink(), seed=seed)
+    arena.start()
+    return arena
+
+
+def values(horizon: int) -> dict[int, dict[str, float]]:
+    results = {}
+    for h in range(1, horizon + 1):
+        solver = Solver(horizon=h)
+        start = time.perf_counter()
+        value = solver.value(endgame(AIBrain()), True)
+        results[h] = {
+            "win_probability": value,
+            "milliseconds": (time.perf_counter() - start) * 1e3,
+            "states": solver.misses,
+            "memo_hits": solver.hits,
+        }
+    return results
+
+
+def win_rates(battles: int, horizon: int) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, brain in (("ai", AIBrain()), ("solver", SolverBrain(horizon, max_nodes=None))):
+        wins = 0
+        start = time.perf_counter()
+        for seed in range(battles):
+            arena = endgame(brain, seed)
+            asyncio.run(arena.run(50))
+            wins += arena.is_over() and any(c is not None and not c.dead for c in arena.left)
+        results[name] = {"win_rate": wins / battles, "seconds": time.perf_counter() - start}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--horizon", type=int, default=6, help="longest horizon to solve the endgame for")
+    parser.add_argument("--battles", type=int, default=30, help="battles played by each brain")
+    args = parser.parse_args(argv)
+    print(json.dumps({"values": values(args.horizon), "win_rates": win_rates(args.battles, 4)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+every Sword/Shield/Bow/MagicBook loadout of a character team against WildDog and Robber packs
+
+    python -m benchmarks.bench_tournament
+    python -m benchmarks.bench_tournament --battles 1000 --workers 8 --checkpoint tournament.json
+
+the matrix is printed with 95% Wilson intervals; with a checkpoint an interrupted run picks up where it stopped.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from basics import *
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=200, help="battles per matchup")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, cpu count by default")
+    parser.add_argument("--chunk-size", type=int, default=25, help="battles sent to a worker at once")
+    parser.add_argument("--checkpoint", default=None, help="json file to save progress to and resume from")
+    args = parser.parse_args(argv)
+    tournament = Tournament(character_rosters(loadouts()), [pack(WildDog), pack(Robber)], args.battles,
+                            chunk_size=args.chunk_size, checkpoint=args.checkpoint)
+    before = sum(cell.battles for row in tournament.cells for cell in row)
+    start = time.perf_counter()
+    tournament.run(args.workers)
+    elapsed = time.perf_counter() - start
+    print(tournament.table())
+    played = sum(cell.battles for row in tournament.cells for cell in row) - before
+    print(json.dumps({"matchups": len(tournament.matchups), "elapsed_seconds": elapsed,
+                      "battles_per_second": played / elapsed if elapsed > 0 else float("inf")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+micro and macro benchmarks of the combat engine, printed as JSON
+
+    python -m benchmarks
+    python -m benchmarks --filter battle --output results.json
+
+every benchmark reports operations per second, the blocks an operation leaves allocated
+and the peak memory an operation takes while it runs, as traced by tracemalloc.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Optional
+
+from basics import *
+from game import heroes, wild_dogs
+
+Op = Callable[[], object]
+
+BENCHMARKS: dict[str, Callable[[], Op]] = {}
+
+
+def benchmark(name: str):
+    """
+    register a setup function, it prepares the state and returns the operation to time
+    """
+
+    def register(setup: Callable[[], Op]) -> Callable[[], Op]:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def duel_arena() -> Arena:
+    arena = Arena(heroes(), wild_dogs(), NullSink(), seed=0)
+    arena.start()
+    for combatant in arena.left + arena.right:
+        combatant.cur_hp = combatant.base_max_hp = 10 ** 9
+    return arena
+
+
+# region micro
+@benchmark("attack")
+def bench_attack() -> Op:
+    arena = duel_arena()
+    attacker, defender = arena.left[0], arena.right[0]
+    return lambda: attacker.attack(defender, (1, 2), Baton())
+
+
+@benchmark("modify")
+def bench_modify() -> Op:
+    arena = duel_arena()
+    attacker, defender = arena.left[0], arena.right[0]
+
+    def modify():
+        baton = Baton.of(attacker=attacker, defender=defender, attack=Attack((1, 2), rand=arena.rand))
+        attacker.after_affect(Timing.Attack, attacker.modify(Timing.Attack, baton), baton)
+
+    return modify
+
+
+@benchmark("find_target")
+def bench_find_target() -> Op:
+    arena = duel_arena()
+    caster, targeting = arena.left[1], Targeting(False, True, 0, 1, 2)
+    return lambda: arena.find_target(caster, targeting)
+
+
+@benchmark("check_target")
+def bench_check_target() -> Op:
+    arena = duel_arena()
+    caster = arena.left[1]
+    action = caster.get_actions()[1]
+    return lambda: action.check_target(caster)
+
+
+@benchmark("buffs_add")
+def bench_buffs_add() -> Op:
+    def add():
+        buffs = Buffs()
+        buffs.add(Dodge())
+        buffs.add(Strength())
+        buffs.add(Dodge(2))
+        buffs.add(Combo())
+
+    return add
+
+
+@benchmark("buffs_turn_end")
+def bench_buffs_turn_end() -> Op:
+    buffs = Buffs(Combo(10 ** 9), Block(10 ** 9))
+    for _ in range(16):
+        buffs.add(Dodge(10 ** 9))
+        buffs.add(Strength(10 ** 9))
+    return buffs.turn_end
+
+
+@benchmark("buff_clone")
+def bench_buff_clone() -> Op:
+    buff = Dodge()
+    for duration in range(1, 8):
+        buff.add(Dodge(duration))
+    return buff.clone
+
+
+# endregion
+
+
+# region macro
+def battles(left: TeamFactory, right: TeamFactory, squads: int) -> Op:
+    """
+    one operation plays a battle per squad, all in the same event loop, the way a wave of fights would run
+    """
+    seeds = iter(range(10 ** 9))
+
+    async def play_all():
+        return await asyncio.gather(*(play(left, right, next(seeds), 100) for _ in range(squads)))
+
+    return lambda: asyncio.run(play_all())
+
+
+def wide(factory: TeamFactory, width: int) -> TeamFactory:
+    """
+    a team of width combatants, the factory's team repeated
+    """
+
+    def team() -> list[Optional[CombatantMixIn]]:
+        combatants = []
+        while len(combatants) < width:
+            for combatant in factory():
+                if combatant is not None:
+                    combatant.name = f"{combatant.name}{len(combatants)}"
+                    combatants.append(combatant)
+        return combatants[:width]
+
+    return team
+
+
+@benchmark("battle")
+def bench_battle() -> Op:
+    return battles(heroes, wild_dogs, 1)
+
+
+@benchmark("battle_x4")
+def bench_battle_x4() -> Op:
+    return battles(heroes, wild_dogs, 4)
+
+
+@benchmark("battle_x16")
+def bench_battle_x16() -> Op:
+    return battles(heroes, wild_dogs, 16)
+
+
+@benchmark("battle_16v16")
+def bench_battle_16v16() -> Op:
+    return battles(wide(heroes, 16), wide(wild_dogs, 16), 1)
+
+
+@benchmark("battle_wave")
+def bench_battle_wave() -> Op:
+    """
+    a single battle of 60 combatants, the wave size the turn scheduler is built for
+    """
+    return battles(wide(heroes, 30), wide(wild_dogs, 30), 1)
+
+
+# endregion
+
+
+def allocations(op: Op, number: int) -> tuple[float, float]:
+    """
+    @return: blocks left allocated and peak bytes, per operation
+    """
+    kept = []
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        peak = 0
+        for _ in range(number):
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            kept.append(op())
+            peak += tracemalloc.get_traced_memory()[1] - start
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return blocks / number, peak / number
+
+
+def measure(setup: Callable[[], Op], min_time: float = 0.2, repeat: int = 3,
+            alloc_number: int = 20) -> dict[str, float]:
+    """
+    @param setup: builds the state and returns the operation
+    @param min_time: a timing run lasts at least this many seconds
+    @param repeat: timing runs, the fastest one counts
+    @param alloc_number: operations traced for allocations, on a fresh state
+    """
+    op = setup()
+    timer = timeit.Timer(op)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat, number)) / number
+    blocks, peak = allocations(setup(), alloc_number)
+    return {
+        "ops_per_sec": 1 / best if best > 0 else float("inf"),
+        "seconds_per_op": best,
+        "retained_blocks_per_op": blocks,
+        "peak_bytes_per_op": peak,
+    }
+
+
+def run(names: Optional[list[str]] = None, min_time: float = 0.2, repeat: int = 3) -> dict[str, object]:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and not any(part in name for part in names):
+            continue
+        results[name] = measure(setup, min_time, repeat)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "time": time.time(),
+        "results": results,
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", nargs="*", help="only run benchmarks whose name contains one of these")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds a timing run lasts at least")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per benchmark")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    report = json.dumps(run(args.filter, args.min_time, args.repeat), indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
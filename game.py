@@ -4,20 +4,28 @@ import asyncio
 
 from basics import *
 
-a = Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword())
-b = Character("b", 13, 20, 7, Buffs(Strength(), ), Sword(), Shield())
-c = Character("c", 12, 20, 9, Buffs(), Sword(), MagicBook())
-d = Character("d", 18, 20, 2, Buffs(), Bow())
 
-e = WildDog("e")
-f = WildDog("f")
-g = WildDog("g")
-h = WildDog("h")
+def heroes() -> list[CombatantMixIn]:
+    a = Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword())
+    b = Character("b", 13, 20, 7, Buffs(Strength(), ), Sword(), Shield())
+    c = Character("c", 12, 20, 9, Buffs(), Sword(), MagicBook())
+    d = Character("d", 18, 20, 2, Buffs(), Bow())
+    return [a, b, c, d]
 
-Arena([a, b, c, d], [e, f, h, g])
 
-Arena().start()
+def wild_dogs() -> list[CombatantMixIn]:
+    e = WildDog("e")
+    f = WildDog("f")
+    g = WildDog("g")
+    h = WildDog("h")
+    return [e, f, h, g]
 
-loop = asyncio.get_event_loop()
-loop.run_until_complete(Arena().run())
-loop.close()
+
+if __name__ == "__main__":
+    Arena(heroes(), wild_dogs())
+
+    Arena().start()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(Arena().run())
+    loop.close()
@@ -0,0 +1,39 @@
+import unittest
+
+from basics import *
+
+
+class TestBaton(unittest.TestCase):
+    def setUp(self):
+        self.baton = Baton.of({ATTACK: 1, "custom": 2})
+
+    def test_attributes(self):
+        self.assertEqual(self.baton.attack, 1)
+        self.baton[DEFENDER] = 3
+        self.assertEqual(self.baton.defender, 3)
+        self.assertIsNone(self.baton.attacker)
+
+    def test_dict_shim(self):
+        self.assertEqual(self.baton[ATTACK], 1)
+        self.assertEqual(self.baton["custom"], 2)
+        self.assertEqual(self.baton.get(MISSED, False), False)
+        self.assertIn(ATTACK, self.baton)
+        self.assertNotIn(COMBO, self.baton)
+        self.assertEqual(self.baton.keys(), [ATTACK, "custom"])
+        self.assertEqual(dict(self.baton), {ATTACK: 1, "custom": 2})
+        with self.assertRaises(KeyError):
+            self.baton[COMBO]
+        self.assertEqual(self.baton.pop(ATTACK), 1)
+        self.assertNotIn(ATTACK, self.baton)
+
+    def test_of(self):
+        self.assertIs(Baton.of(self.baton), self.baton)
+        self.assertEqual(Baton.of(this=4).this, 4)
+
+    def test_attack_converts_dict(self):
+        a = Character("a", 13, 20, 3, Buffs(), Sword())
+        e = Character("e", 20, 20, 3, Buffs(), Sword())
+        Arena([a], [e], NullSink())
+        a.attack(e, (30, 30), {MISSED: False}, crit=0)
+        self.assertTrue(e.dead)
+
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from basics import *
+
+
+class TestContent(unittest.TestCase):
+    def setUp(self):
+        self.content = load_content(cache=False)
+
+    def test_monster(self):
+        dog = self.content.combatant("WildDog", "e")
+        self.assertEqual((dog.name, dog.cur_hp, dog.base_speed), ("e", 24, 9))
+        self.assertEqual([repr(action) for action in dog.get_actions()], ["Bite"])
+        self.assertIn("Dodge", dog.buffs)
+
+    def test_character(self):
+        guardian = self.content.combatant("Guardian")
+        self.assertEqual(guardian.max_hp, 24)
+        self.assertEqual([repr(action) for action in guardian.get_actions()],
+                         ["Bash", "Slash", "Defend", "Protect", "Move", "Skip"])
+
+    def test_actions_shared(self):
+        first, second = self.content.team("Duelist", "Duelist")
+        self.assertIs(first.get_actions()[0], second.get_actions()[0])
+
+    def test_same_as_classes(self):
+        def heroes():
+            team = self.content.team("Duelist", "Guardian", "Cleric", "Archer")
+            for combatant, name in zip(team, "abcd"):
+                combatant.name = name
+            return team
+
+        def class_heroes():
+            return [Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword()),
+                    Character("b", 13, 20, 7, Buffs(Strength(), ), Sword(), Shield()),
+                    Character("c", 12, 20, 9, Buffs(), Sword(), MagicBook()),
+                    Character("d", 18, 20, 2, Buffs(), Bow())]
+
+        def dogs():
+            return [self.content.combatant("WildDog", name) for name in "efgh"]
+
+        def class_dogs():
+            return [WildDog(name) for name in "efgh"]
+
+        tables = run_battles(heroes, dogs, range(20))
+        classes = run_battles(class_heroes, class_dogs, range(20))
+        self.assertEqual([repr(r) for r in tables], [repr(r) for r in classes])
+
+
+class TestContentCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for table in CONTENT_TABLES:
+            shutil.copy(os.path.join(CONTENT_DIR, f"{table}.csv"), self.directory)
+        self.cache_home = tempfile.mkdtemp()
+        environ = patch.dict(os.environ, {"XDG_CACHE_HOME": self.cache_home})
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        shutil.rmtree(self.cache_home)
+
+    def cached(self) -> list[str]:
+        cache_dir = os.path.join(self.cache_home, "basics")
+        return [os.path.join(root, name) for root, _, names in os.walk(cache_dir) for name in names]
+
+    def test_cached(self):
+        load_content(self.directory)
+        with patch("basics.csv_reader.compile_tables", side_effect=AssertionError("parsed again")):
+            content = load_content(self.directory)
+        self.assertIn("WildDog", content.combatants)
+
+    def test_changed_files(self):
+        load_content(self.directory)
+        with open(os.path.join(self.directory, "combatants.csv"), "a") as file:
+            file.write("Wolf,monster,30,30,11,Dodge,,Bite\n")
+        content = load_content(self.directory)
+        self.assertEqual(content.combatant("Wolf").base_speed, 11)
+        self.assertEqual(len(self.cached()), 1)
+
+    def test_not_in_directory(self):
+        load_content(self.directory)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "__pycache__")))
+        self.assertEqual(len(self.cached()), 1)
+
+    def test_stale_cache(self):
+        load_content(self.directory)
+        for error in (ImportError, AttributeError, ValueError):
+            with self.subTest(error=error.__name__):
+                with patch("basics.csv_reader.pickle.load", side_effect=error("stale")):
+                    content = load_content(self.directory)
+                self.assertIn("WildDog", content.combatants)
+
+    def test_unwritable_cache(self):
+        with patch("basics.csv_reader.os.makedirs", side_effect=PermissionError("read-only")):
+            content = load_content(self.directory)
+        self.assertIn("WildDog", content.combatants)
+        self.assertEqual(self.cached(), [])
+
+    def test_errors(self):
+        with open(os.path.join(self.directory, "effects.csv"), "a") as file:
+            file.write("Bite,enemy single 0,buff,,,Haste,,,\n")
+        with self.assertRaisesRegex(ContentError, "effects.csv line 14: unknown buff Haste"):
+            load_content(self.directory)
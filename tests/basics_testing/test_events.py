@@ -0,0 +1,37 @@
+import io
+import unittest
+
+from basics import *
+
+
+class TestSinks(unittest.TestCase):
+    def setUp(self):
+        self.a = Character("a", 13, 20, 3, Buffs(), Sword())
+        self.e = Character("e", 2, 20, 2, Buffs(), Sword())
+
+    def test_ring_buffer(self):
+        sink = RingBufferSink(3)
+        Arena([self.a], [self.e], sink)
+        self.a.attack(self.e, (10, 10), {}, crit=0)
+        self.assertEqual([event.kind for event in sink], ["AttackEvent", "DamageEvent", "DeathEvent"])
+        self.assertEqual(sink.of_type(DamageEvent)[0].damage, 10)
+        self.a.add_buff(Strength(), {})
+        self.assertEqual(len(sink), 3)
+        self.assertIsInstance(sink.events[-1], BuffAppliedEvent)
+
+    def test_console(self):
+        stream = io.StringIO()
+        Arena([self.a], [self.e], ConsoleSink(stream))
+        self.a.attack(self.e, (10, 10), {}, crit=0)
+        self.assertEqual(stream.getvalue(), "e suffer 10 damage, -8/20 left \n")
+
+    def test_null(self):
+        sink = NullSink()
+        Arena([self.a], [self.e], sink)
+        self.a.attack(self.e, (10, 10), {}, crit=0)
+        self.assertFalse(sink.enabled)
+        self.assertEqual(self.e.cur_hp, -8)
+
+    def test_as_dict(self):
+        event = MoveEvent(self.a, 0, 1)
+        self.assertEqual(event.as_dict(), {"kind": "MoveEvent", "combatant": self.a, "source": 0, "target": 1})
@@ -1,3 +1,6 @@
+import asyncio
+import random
+import threading
 import unittest
 from unittest.mock import *
 
@@ -95,7 +98,7 @@ class TestTargeting(unittest.TestCase):
                          str(self.target1.alt(position1)))
 
     def test_random_choose(self):
-        rand = Random(0)
+        rand = random.Random(0)
         self.assertEqual(self.target4.random_choose(rand), (self.target4))
         self.assertEqual(str(self.target1.random_choose(rand)),
                          str((Targeting(self.target1.friendly, self.target1.selective, rand.choice(self.target1)))))
@@ -107,6 +110,18 @@ class TestTargeting(unittest.TestCase):
         self.assertEqual(str(self.target1.choose(0)),
                          str((Targeting(self.target1.friendly, self.target1.selective, 0))))
 
+    def test_interned(self):
+        self.assertIs(Targeting(True, True, 0, 1, 2), self.target1)
+        self.assertIs(self.target1.choose(1), Targeting.selective_ally(1))
+        self.assertEqual(self.target1.set_positions(0, 1), Targeting(True, True, 0, 1))
+        self.assertEqual(len({self.target1, Targeting(True, True, 0, 1, 2)}), 1)
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.target1.friendly = False
+        self.assertFalse(self.target1.set_friendliness(False).friendly)
+        self.assertTrue(self.target1.friendly)
+
 
 """
 class testbuff(testFactorMixIn,Buff):
@@ -153,6 +168,46 @@ class TestTimer(unittest.TestCase):
         self.assertEqual(self.timer[1], 1)
 
 
+class TestIndBuff(unittest.TestCase):
+    def setUp(self):
+        self.dodge = Dodge(3)
+        self.dodge.add(Dodge(1))
+        self.dodge.add(Dodge(2, 2))
+
+    def test_timers(self):
+        self.assertEqual(self.dodge.timers, [[1, 1], [2, 2], [3, 1]])
+        self.dodge.on_turn_end()
+        self.assertEqual(self.dodge.timers, [[1, 2], [2, 1]])
+
+    def test_consume_shortest(self):
+        self.dodge.owner = Mock()
+        self.dodge.after_affect(Timing.Defend, {})
+        self.assertEqual(self.dodge.timers, [[2, 2], [3, 1]])
+        self.dodge.owner._expiring.assert_called_once_with(self.dodge)
+
+    def test_expire(self):
+        for _ in range(3):
+            self.assertFalse(self.dodge.expire)
+            self.dodge.on_turn_end()
+        self.assertTrue(self.dodge.expire)
+
+    def test_clone_leaves_owner(self):
+        buffs = Buffs(self.dodge)
+        clone = self.dodge.clone()
+        self.assertIs(self.dodge.owner, buffs)
+        self.assertIsNone(clone.owner)
+        self.assertEqual(clone.timers, self.dodge.timers)
+
+    def test_no_dict(self):
+        self.assertFalse(hasattr(self.dodge, "__dict__"))
+        self.assertFalse(hasattr(Attack((1, 2)), "__dict__"))
+
+    def test_add_after_ticks(self):
+        self.dodge.on_turn_end()
+        self.dodge.add(Dodge(1))
+        self.assertEqual(self.dodge.timers, [[1, 2], [1, 1], [2, 1]])
+
+
 class TestBuffs(unittest.TestCase):
     def setUp(self):
         self.Buff1 = Mock(spec=Buff)
@@ -173,6 +228,33 @@ class TestBuffs(unittest.TestCase):
         self.buffs.add(self.Buff2)
         self.assertEqual(len(self.buffs), 2)
 
+    def test_lookup(self):
+        self.buffs.add(self.Buff2)
+        self.assertIs(self.buffs["buff2"], self.Buff2)
+        self.assertIsNone(self.buffs.get("buff3"))
+        self.assertIn("buff1", self.buffs)
+        self.assertNotIn(self.Buff3, self.buffs)
+        self.assertEqual(self.buffs, [self.Buff1, self.Buff2])
+
+    def test_expire(self):
+        buffs = Buffs(Dodge(1), Combo(2))
+        dodge = buffs["Dodge"]
+        version = buffs.version
+        dodge.after_affect(Timing.Defend, {})
+        self.assertEqual(repr(buffs), "C")
+        self.assertNotEqual(buffs.version, version)
+        buffs.turn_end()
+        self.assertEqual(repr(buffs), "C")
+        buffs.turn_end()
+        buffs.turn_end()
+        self.assertEqual(len(buffs), 0)
+
+    def test_expire_only_candidates(self):
+        buffs = Buffs(Combo(), Dodge())
+        buffs["Combo"].duration = 0
+        buffs["Dodge"].after_affect(Timing.Defend, {})
+        self.assertEqual(repr(buffs), "C")
+
 
 class TestAttack(unittest.TestCase):
     def setUp(self):
@@ -439,3 +521,251 @@ class TestEquipage(unittest.TestCase):
         my_list = list(self.equipage.values())
 
         self.assertEqual(my_list[1], None)
+
+
+class TestFactorIndex(unittest.TestCase):
+    def setUp(self):
+        self.character = Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword(), Shield())
+
+    def test_registered_factors(self):
+        self.assertEqual([b.name for b in self.character.registered_factors(Timing.Attack)], ["Strength"])
+        self.assertEqual(len(self.character.registered_factors(Timing.Defend)), 2)
+        self.assertEqual(self.character.registered_factors(Timing.Move), ())
+
+    def test_buff_added(self):
+        self.character.registered_factors(Timing.Defend)
+        self.character.add_buff(Block(), {})
+        self.assertEqual([f.name for f in self.character.registered_factors(Timing.Defend)[:2]], ["Dodge", "Block"])
+
+    def test_buff_expired(self):
+        self.character.attack(WildDog("e"), (1, 1), {})
+        self.assertEqual(self.character.registered_factors(Timing.Attack), ())
+
+    def test_unequip(self):
+        self.assertEqual(len(self.character.registered_factors(Timing.GetMaxHp)), 1)
+        self.character.unequip(Slot.OffHand)
+        self.assertEqual(self.character.registered_factors(Timing.GetMaxHp), ())
+        self.character.equip(Shield())
+        self.assertEqual(len(self.character.registered_factors(Timing.GetMaxHp)), 1)
+
+
+class TestStatCache(unittest.TestCase):
+    def setUp(self):
+        self.character = Character("a", 13, 20, 3, Buffs(), Sword(), Shield())
+        stat_cache_stats.reset()
+
+    def test_max_hp(self):
+        self.assertEqual(self.character.max_hp, 24)
+        self.assertEqual(self.character.max_hp, 24)
+        self.assertEqual(stat_cache_stats.misses, 1)
+        self.assertEqual(stat_cache_stats.hits, 1)
+
+    def test_unequip_invalidates(self):
+        self.assertEqual(self.character.max_hp, 24)
+        self.character.unequip(Slot.OffHand)
+        self.assertEqual(self.character.max_hp, 20)
+        self.assertEqual(stat_cache_stats.misses, 2)
+
+    def test_buff_invalidates(self):
+        self.assertEqual(self.character.speed, 3)
+        self.character.add_buff(Strength(), {})
+        self.assertEqual(self.character.speed, 3)
+        self.assertEqual(stat_cache_stats.misses, 2)
+
+    def test_base_change_invalidates(self):
+        self.assertEqual(self.character.speed, 3)
+        self.character.base_speed = 5
+        self.assertEqual(self.character.speed, 5)
+
+    def test_setter(self):
+        self.character.max_hp = 30
+        self.assertEqual(self.character.max_hp, 30)
+        self.assertEqual(stat_cache_stats.hits, 1)
+
+
+class FirstChoiceBrain(Brain):
+    async def decide(self, caster, arena):
+        await asyncio.sleep(0)
+        for action in self.get_castable_actions(caster):
+            if action.post_reqm in (None, ()):
+                continue
+            try:
+                targets = self.get_castable_targets(caster, action, None)
+                return Decision([action, targets.random_choose(random.Random(0))])
+            except TargetingError:
+                continue
+
+
+def duel() -> Arena:
+    left = [Character("a", 13, 20, 3, Buffs(), Sword()), None, None, None]
+    right = [WildDog("e"), None, None, None]
+    for combatant in left + right:
+        if combatant is not None:
+            combatant.brain = FirstChoiceBrain()
+    arena = Arena(left, right, NullSink())
+    arena.start()
+    return arena
+
+
+class TestArenaInstances(unittest.TestCase):
+    def test_bound(self):
+        first, second = duel(), duel()
+        self.assertIsNot(first, second)
+        self.assertIs(Arena(), second)
+        self.assertIs(first.left[0].arena, first)
+        self.assertEqual(first.left[0].position, (True, 0))
+
+    def test_concurrent_tasks(self):
+        async def battles():
+            arenas = [duel() for _ in range(3)]
+            await asyncio.gather(*(arena.run(20) for arena in arenas))
+            return [(arena.turn, arena.left[0].cur_hp, arena.right[0].cur_hp) for arena in arenas]
+
+        solo = duel()
+        asyncio.run(solo.run(20))
+        expected = (solo.turn, solo.left[0].cur_hp, solo.right[0].cur_hp)
+        self.assertEqual(asyncio.run(battles()), [expected] * 3)
+
+    def test_threads(self):
+        results = []
+
+        def battle():
+            arena = duel()
+            asyncio.run(arena.run(20))
+            results.append((arena.turn, arena.left[0].cur_hp, arena.right[0].cur_hp))
+
+        threads = [threading.Thread(target=battle) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(results)), 1)
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.a = Character("a", 13, 20, 3, Buffs(Strength()), Sword(), Shield())
+        self.b = Character("b", 13, 20, 4, Buffs(), Sword())
+        self.e = WildDog("e")
+        self.f = WildDog("f")
+        self.arena = Arena([self.a, self.b, None, None], [self.e, self.f, None, None], NullSink())
+        self.arena.start()
+
+    def state(self):
+        return (self.arena.turn, list(self.arena.left), list(self.arena.right), list(self.arena.action_order),
+                [(c.cur_hp, repr(c.buffs), [b.get_state() for b in c.buffs]) for c in (self.a, self.b, self.e, self.f)],
+                list(self.a.equipage.values()))
+
+    def test_restore(self):
+        before = self.state()
+        snapshot = self.arena.snapshot()
+        self.a.attack(self.e, (5, 5), {}, crit=0)
+        self.b.add_buff(Dodge(), {})
+        self.e.add_buff(Dodge(), {})
+        self.arena.move(self.b, 0)
+        self.a.unequip(Slot.OffHand)
+        self.arena.scheduler.pop()
+        self.arena.new_round()
+        self.assertNotEqual(self.state(), before)
+        self.arena.restore(snapshot)
+        self.assertEqual(self.state(), before)
+        self.assertEqual(self.a.max_hp, 24)
+        self.assertEqual([f.name for f in self.a.registered_factors(Timing.Attack)], ["Strength"])
+
+    def test_restore_twice(self):
+        snapshot = self.arena.snapshot()
+        self.a.attack(self.e, (5, 5), {}, crit=0)
+        self.arena.restore(snapshot)
+        self.a.attack(self.e, (5, 5), {}, crit=0)
+        self.arena.restore(snapshot)
+        self.assertEqual(self.e.cur_hp, 24)
+        self.assertEqual(repr(self.a.buffs), "S")
+
+
+class TestActionRegistry(unittest.TestCase):
+    def test_shared(self):
+        registry = ActionRegistry()
+        self.assertIs(registry.get(Move, 2), registry.get(Move, 2))
+        self.assertIsNot(registry.get(Move, 2), registry.get(Move, 1))
+        self.assertEqual(len(registry), 2)
+        registry.clear()
+        self.assertEqual(len(registry), 0)
+
+    def test_equipment(self):
+        self.assertIs(Sword().action()[0], Sword().action()[0])
+        self.assertIs(MagicBook().action()[0], MagicBook().action()[0])
+
+    def test_cached_until_equipment_changes(self):
+        a = Character("a", 20, 20, 3, Buffs(), Sword(), Shield())
+        actions = a.get_actions()
+        self.assertIs(a.get_actions(), actions)
+        a.unequip(Slot.OffHand)
+        self.assertNotIn(Defend, [type(action) for action in a.get_actions()])
+        a.equip(Shield())
+        self.assertIn(Defend, [type(action) for action in a.get_actions()])
+        self.assertEqual(a.get_actions(), actions)
+
+
+class TestPositionIndex(unittest.TestCase):
+    def setUp(self):
+        self.left = [WildDog(f"l{i}") for i in range(64)]
+        self.right = [WildDog(f"r{i}") for i in range(64)]
+        self.arena = Arena(self.left, self.right, NullSink())
+
+    def test_wide(self):
+        self.assertEqual(self.arena.find_position(self.left[63]), (True, 63))
+        self.assertEqual(self.right[40].index, 40)
+        self.assertIn(self.right[0], self.arena)
+        self.assertNotIn(WildDog("x"), self.arena)
+
+    def test_move(self):
+        a, b, c = self.left[5], self.left[1], self.left[4]
+        self.arena.move(a, 1)
+        self.assertEqual(a.position, (True, 1))
+        self.assertEqual(b.index, 2)
+        self.assertEqual(c.index, 5)
+
+    def test_place(self):
+        x, first = WildDog("x"), self.left[0]
+        self.arena.place(x, False, 70)
+        self.assertEqual(x.position, (False, 70))
+        self.assertIs(x.arena, self.arena)
+        self.arena.place(x, True, 0)
+        self.assertIsNone(self.right[70])
+        self.assertNotIn(first, self.arena)
+
+    def test_changed_in_place(self):
+        a, b = self.left[0], self.left[1]
+        self.left[0], self.left[1] = b, a
+        self.assertEqual(a.index, 1)
+        self.assertEqual(b.index, 0)
+
+    def test_absent_without_reindex(self):
+        with patch.object(self.arena, "reindex", side_effect=AssertionError):
+            self.assertNotIn(WildDog("x"), self.arena)
+            self.assertIsNone(self.arena.locate(None))
+
+    def test_wide_targeting(self):
+        self.assertEqual(self.arena.width, 64)
+        a = Character("a", 13, 20, 3, Buffs(), Sword())
+        self.arena.place(a, True, 10)
+        moves = [d[1].positions for d in Brain.legal_decisions(a) if isinstance(d[0], Move)]
+        self.assertEqual(moves, [(8,), (9,), (11,), (12,)])
+        self.assertEqual(len(Targeting.all_enemy(self.arena.width)), 64)
+        self.assertEqual(Targeting.selective_enemy(62, 63).choose(63, self.arena.width).positions, (63,))
+        with self.assertRaises(TargetingError):
+            Targeting.selective_enemy(0).choose(64, self.arena.width)
+
+    def test_move_past_team(self):
+        e = WildDog("e")
+        arena = Arena([e, None], self.right, NullSink())
+        e.move(5)
+        self.assertEqual(arena.left, [None] * 5 + [e])
+        self.assertEqual(e.position, (True, 5))
+
+    def test_move_effect_wide(self):
+        a = self.left[10]
+        MoveTo(2).execute(a, Targeting.selective_ally(12), {})
+        self.assertEqual(a.position, (True, 12))
+        with self.assertRaises(ValueError):
+            MoveTo(100).execute(a, Targeting.selective_ally(64), {})
@@ -0,0 +1,54 @@
+import io
+import json
+import unittest
+
+from basics import *
+from game import heroes, wild_dogs
+
+
+class TestInstruments(unittest.TestCase):
+    def setUp(self):
+        instruments.reset()
+        instruments.enable()
+
+    def tearDown(self):
+        instruments.disable()
+        instruments.reset()
+
+    def test_battle(self):
+        run_battles(heroes, wild_dogs, [1])
+        self.assertIn("Attack", instruments.stats(MODIFY))
+        self.assertIn("Defend", instruments.stats(AFTER_AFFECT))
+        self.assertIn("AIBrain", instruments.stats(DECIDE))
+        self.assertTrue(instruments.stats(ACTION))
+        self.assertTrue(instruments.stats(EFFECT))
+        self.assertEqual(set(instruments.kinds()), {MODIFY, AFTER_AFFECT, FACTOR, ACTION, EFFECT, DECIDE})
+
+    def test_fanout(self):
+        a = Character("a", 13, 20, 3, Buffs(Strength(), Dodge()), Sword())
+        e = WildDog("e")
+        Arena([a], [e], NullSink(), seed=1)
+        a.modify(Timing.Attack, {ATTACK: Attack((1, 1))})
+        stat = instruments.get(MODIFY, "Attack")
+        self.assertEqual(stat.count, 1)
+        self.assertEqual(stat.mean_fanout, 1)
+        self.assertEqual(instruments.get(FACTOR, "Strength").count, 1)
+
+    def test_percentile(self):
+        stat = Stat(100)
+        for i in range(1, 101):
+            stat.add(i)
+        self.assertEqual(stat.percentile(50), 51)
+        self.assertEqual(stat.percentile(100), 100)
+        self.assertEqual(stat.mean, 50.5)
+
+    def test_dump(self):
+        stream = io.StringIO()
+        instruments.enable(dump_interval=0, dump_to=stream)
+        instruments.record(ACTION, "Slash", 0.5)
+        self.assertEqual(json.loads(stream.getvalue().splitlines()[-1])[ACTION]["Slash"]["count"], 1)
+
+    def test_disabled(self):
+        instruments.disable()
+        run_battles(heroes, wild_dogs, [1])
+        self.assertEqual(instruments.report(), {})
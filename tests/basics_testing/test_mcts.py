@@ -0,0 +1,55 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from basics import *
+
+
+class TestMCTSBrain(unittest.TestCase):
+    def setUp(self):
+        self.a = Character("a", 13, 20, 3, Buffs(Strength()), Sword())
+        self.b = Character("b", 13, 20, 4, Buffs(), Bow())
+        self.e = WildDog("e")
+        self.f = WildDog("f", 3)
+        self.sink = RingBufferSink()
+        self.arena = Arena([self.a, self.b, None, None], [self.e, self.f, None, None], self.sink, seed=1)
+        self.arena.start()
+        self.arena.scheduler.remove(self.a)
+        self.arena._current = self.a
+
+    def keys(self):
+        return [decision_key(d) for d in Brain.legal_decisions(self.a)]
+
+    def test_decide(self):
+        brain = MCTSBrain(iterations=40, time_budget=None, seed=2)
+        decision = brain.decide(self.a, self.arena)
+        self.assertIn(decision_key(decision), self.keys())
+
+    def test_iterations(self):
+        brain = MCTSBrain(iterations=25, time_budget=None, seed=2)
+        stats = brain.search(self.arena, self.a)
+        self.assertEqual(sum(visits for visits, _ in stats.values()), 25)
+
+    def test_leaves_arena_untouched(self):
+        hp = [c.cur_hp for c in (self.a, self.b, self.e, self.f)]
+        order = list(self.arena.action_order)
+        rand = self.arena.rand
+        MCTSBrain(iterations=30, time_budget=None, seed=2).decide(self.a, self.arena)
+        self.assertEqual([c.cur_hp for c in (self.a, self.b, self.e, self.f)], hp)
+        self.assertEqual(self.arena.action_order, order)
+        self.assertIs(self.arena.rand, rand)
+        self.assertEqual(len(self.sink), 0)
+
+    def test_time_budget(self):
+        brain = MCTSBrain(time_budget=0.02, seed=2)
+        self.assertIsNotNone(brain.decide(self.a, self.arena))
+
+    def test_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            brain = MCTSBrain(iterations=20, time_budget=None, seed=2, workers=2, executor=executor)
+            stats = brain.parallel_search(self.arena, self.a)
+            self.assertEqual(sum(visits for visits, _ in stats.values()), 20)
+            self.assertIn(decision_key(brain.decide(self.a, self.arena)), self.keys())
+
+    def test_needs_budget(self):
+        with self.assertRaises(ValueError):
+            MCTSBrain(iterations=None, time_budget=None)
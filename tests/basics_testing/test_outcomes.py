@@ -0,0 +1,153 @@
+import threading
+import unittest
+from collections import Counter
+from random import Random
+
+from basics import *
+
+
+class RollEffect(Effect):
+    def execute(self, receiver, target, baton):
+        receiver.arena.rand.randint(1, 2)
+
+
+class PeekEffect(Effect):
+    """
+    records the rand and sink of the arena as another thread sees them
+    """
+    seen = []
+
+    def execute(self, receiver, target, baton):
+        arena = receiver.arena
+        thread = threading.Thread(target=lambda: self.seen.append((arena.rand, arena.sink)))
+        thread.start()
+        thread.join()
+
+
+class Peek(Action):
+    def __init__(self):
+        super().__init__((), (), ((Targeting(True, False, ONLY_SELF), PeekEffect()),))
+
+
+class Roll(Action):
+    def __init__(self):
+        super().__init__((), (), ((Targeting(True, False, ONLY_SELF), RollEffect()),))
+
+
+class TestDistribution(unittest.TestCase):
+    def test_minus(self):
+        hp = Distribution.point(10).minus(Distribution.of({1: 0.5, 3: 0.5}))
+        self.assertEqual(hp.as_dict(), {7: 0.5, 9: 0.5})
+
+    def test_plus_cap(self):
+        hp = Distribution.of({8: 0.5, 9: 0.5}).plus(Distribution.of({1: 0.5, 2: 0.5}), 10)
+        self.assertEqual(hp.as_dict(), {9: 0.25, 10: 0.75})
+
+    def test_probability(self):
+        hp = Distribution.of({-1: 0.25, 0: 0.25, 3: 0.5})
+        self.assertEqual(hp.probability(high=0), 0.5)
+        self.assertEqual(hp.probability(low=1), 0.5)
+        self.assertEqual(hp.mean, 1.25)
+
+    def test_damage(self):
+        damage = damage_distribution(Attack((4, 6), mag=1.5, crit=0.2))
+        self.assertEqual(set(damage.as_dict()), {6, 7, 9})
+        self.assertAlmostEqual(damage.as_dict()[6], 0.8 / 3)
+        self.assertAlmostEqual(damage.as_dict()[9], 0.8 / 3 + 0.2)
+        self.assertEqual(damage_distribution(Attack((4, 6), critted=True)).as_dict(), {6: 1.0})
+
+
+class TestActionOutcome(unittest.TestCase):
+    def setUp(self):
+        self.a = Character("a", 13, 20, 3, Buffs(Strength()), Sword())
+        self.d = Character("d", 18, 20, 2, Buffs(), Bow())
+        self.e = WildDog("e", 5)
+        self.f = WildDog("f")
+        self.f.buffs.add(Block())
+        self.g = Robber("g")
+        self.sink = RingBufferSink()
+        self.arena = Arena([self.a, self.d, None, None], [self.e, self.f, self.g, None], self.sink, seed=1)
+        self.arena.start()
+
+    def sample(self, caster, action, target, n: int = 4000) -> dict:
+        state = self.arena.snapshot()
+        rand = self.arena.rand
+        counts = {c: Counter() for c in (self.e, self.f, self.g)}
+        for i in range(n):
+            self.arena.rand = Random(i)
+            action.execute(caster, target)
+            for c, count in counts.items():
+                count[c.cur_hp] += 1
+            self.arena.restore(state)
+        self.arena.rand = rand
+        self.sink.clear()
+        return {c: {hp: k / n for hp, k in count.items()} for c, count in counts.items()}
+
+    def assertMatches(self, caster, action, target=None):
+        outcome = action_outcome(caster, action, target)
+        sampled = self.sample(caster, action, target)
+        for combatant in (self.e, self.f, self.g):
+            exact = outcome.distribution(combatant).as_dict()
+            self.assertAlmostEqual(sum(exact.values()), 1.0)
+            for hp in set(exact) | set(sampled[combatant]):
+                self.assertAlmostEqual(exact.get(hp, 0.0), sampled[combatant].get(hp, 0.0), delta=0.03)
+        return outcome
+
+    def test_single(self):
+        outcome = self.assertMatches(self.a, shared_action(Slash), Targeting(False, True, 1))
+        self.assertEqual(len(outcome.paths), 2)
+        self.assertAlmostEqual(outcome.hp(self.f)[24], 0.5)
+
+    def test_aoe(self):
+        outcome = self.assertMatches(self.a, shared_action(Bash))
+        self.assertEqual(set(outcome.combatants), {self.e, self.f, self.g})
+
+    def test_combo_condition(self):
+        self.assertMatches(self.d, shared_action(Shot), Targeting(False, True, 2))
+        self.g.buffs.add(Combo())
+        self.assertMatches(self.d, shared_action(Shot), Targeting(False, True, 2))
+
+    def test_protector_killed(self):
+        self.e.buffs.add(Protected(self.f))
+        self.f.cur_hp = 4
+        outcome = self.assertMatches(self.a, shared_action(Bash))
+        self.assertGreater(outcome.kill_probability(self.f), 0.0)
+
+    def test_kill_probability(self):
+        outcome = action_outcome(self.a, shared_action(Slash), Targeting(False, True, 0))
+        self.assertAlmostEqual(outcome.kill_probability(self.e), 0.5)
+        self.assertEqual(outcome.kill_probability(self.g), 0.0)
+        self.assertAlmostEqual(outcome.all_killed(self.e, self.f), 0.0)
+        self.assertAlmostEqual(outcome.expected_damage(self.g), 0.0)
+
+    def test_heal(self):
+        self.d.cur_hp = 18
+        outcome = action_outcome(self.a, Heal((1, 4)), Targeting(True, True, 1))
+        self.assertEqual(outcome.hp(self.d), {19: 0.25, 20: 0.75})
+
+    def test_leaves_arena(self):
+        hp = [c.cur_hp for c in (self.a, self.e, self.f, self.g)]
+        strength = self.a.buffs["Strength"].get_state()
+        rand = self.arena.rand
+        action_outcome(self.a, shared_action(Bash))
+        self.assertEqual([c.cur_hp for c in (self.a, self.e, self.f, self.g)], hp)
+        self.assertEqual(self.a.buffs["Strength"].get_state(), strength)
+        self.assertIs(self.arena.rand, rand)
+        self.assertEqual(len(self.sink), 0)
+        self.assertNotIn("suffer", vars(self.e))
+
+    def test_other_threads_unaffected(self):
+        PeekEffect.seen.clear()
+        action_outcome(self.a, Peek())
+        self.assertEqual(PeekEffect.seen, [(self.arena.rand, self.sink)])
+
+    def test_decision(self):
+        self.assertIsNone(decision_outcome(self.a, None))
+        decision = Decision([shared_action(Slash), Targeting(False, True, 1)])
+        self.assertEqual(decision_outcome(self.a, decision).hp(self.f),
+                         action_outcome(self.a, *decision).hp(self.f))
+
+    def test_not_enumerable(self):
+        with self.assertRaises(OutcomeError):
+            action_outcome(self.a, Roll())
+        self.assertNotIn("suffer", vars(self.a))
@@ -0,0 +1,73 @@
+import ast
+import os
+import random
+import subprocess
+import sys
+import types
+import unittest
+from typing import TypeVar
+
+import basics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestLazyPackage(unittest.TestCase):
+    def loaded(self, code: str) -> list[str]:
+        code += "; import sys; print(' '.join(sorted(m for m in sys.modules if m.startswith('basics.'))))"
+        output = subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT, capture_output=True, text=True)
+        return output.stdout.split()
+
+    def test_import_loads_nothing(self):
+        self.assertEqual(self.loaded("import basics"), [])
+
+    def test_name_loads_its_module(self):
+        loaded = self.loaded("from basics import Targeting")
+        self.assertIn("basics.gameplay", loaded)
+        self.assertNotIn("basics.simulation", loaded)
+        self.assertNotIn("basics.csv_reader", loaded)
+
+    def test_exports_complete(self):
+        for submodule in basics._SUBMODULES:
+            module = getattr(basics, submodule)
+            for name, value in vars(module).items():
+                if (name.startswith("_") or getattr(value, "__module__", None) != module.__name__
+                        or isinstance(value, TypeVar)):
+                    continue
+                with self.subTest(name=name):
+                    self.assertIn(name, basics.__all__)
+                    self.assertIs(getattr(basics, name), value)
+
+    def test_exports_match_submodules(self):
+        for submodule in basics._SUBMODULES:
+            module = getattr(basics, submodule)
+            with open(module.__file__, encoding="utf-8") as file:
+                tree = ast.parse(file.read())
+            defined = set()
+            for node in ast.walk(tree):
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    defined.add(node.name)
+                elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                    defined.add(node.id)
+            # names bound at module level by the module itself, less type variables and names shadowed by a submodule
+            public = {name for name, value in vars(module).items()
+                      if not name.startswith("_") and name in defined and name not in basics._SUBMODULES
+                      and not isinstance(value, (TypeVar, types.ModuleType))}
+            with self.subTest(submodule=submodule):
+                self.assertEqual(set(basics._EXPORTS.get(submodule, ())), public)
+
+    def test_no_stdlib_exports(self):
+        for name in ("Any", "Optional", "TypeVar", "T", "os", "sys", "time", "pickle", "zlib", "heapq", "Random"):
+            with self.subTest(name=name):
+                self.assertNotIn(name, basics.__all__)
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            basics.NoSuchThing
+        self.assertFalse(hasattr(basics, "NoSuchThing"))
+
+    def test_dir(self):
+        self.assertIn("run_batch", dir(basics))
+
+    def test_brain_rand_on_first_use(self):
+        self.assertIsInstance(basics.AIBrain().rand, random.Random)
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from basics import *
+
+
+class TestSeedSequence(unittest.TestCase):
+    def test_spawn(self):
+        root = SeedSequence(7)
+        first, second = root.spawn(2)
+        self.assertEqual(first.spawn_key, (0,))
+        self.assertEqual(root.spawn(1)[0].spawn_key, (2,))
+        self.assertNotEqual(first.generate_state(), second.generate_state())
+        self.assertEqual(first.generate_state(), SeedSequence(7, (0,)).generate_state())
+
+
+class TestBattleRandom(unittest.TestCase):
+    def test_reproducible(self):
+        self.assertEqual([BattleRandom(3).random() for _ in range(5)], [BattleRandom(3).random() for _ in range(5)])
+        a, b = BattleRandom(3), BattleRandom(3)
+        self.assertEqual([a.random() for _ in range(600)], [b.random() for _ in range(600)])
+
+    def test_block_boundaries(self):
+        small, large = BattleRandom(5, block=7), BattleRandom(5, block=256)
+        first = [small.random() for _ in range(600)]
+        self.assertEqual(first, [large.random() for _ in range(600)])
+        self.assertEqual([small.randint(1, 6) for _ in range(30)], [large.randint(1, 6) for _ in range(30)])
+
+    def test_ranges(self):
+        rand = BattleRandom(1)
+        values = [rand.randint(2, 4) for _ in range(500)]
+        self.assertEqual(set(values), {2, 3, 4})
+        self.assertIn(rand.choice("abc"), "abc")
+        with self.assertRaises(IndexError):
+            rand.choice([])
+
+    def test_spawn(self):
+        a, b = BattleRandom(9).spawn(2)
+        self.assertNotEqual(a.random(), b.random())
+
+
+class TestSeededArena(unittest.TestCase):
+    def battle(self, seed):
+        left = [Character("a", 13, 20, 3, Buffs(Dodge()), Sword()), Character("b", 13, 20, 4, Buffs(), Bow()),
+                None, None]
+        right = [WildDog("e"), WildDog("f"), None, None]
+        combatants = left[:2] + right[:2]
+        for combatant in combatants:
+            combatant.brain = AIBrain()
+        arena = Arena(left, right, NullSink(), seed)
+        arena.start()
+        asyncio.run(arena.run(30))
+        return arena.turn, [c.cur_hp for c in combatants]
+
+    def test_same_seed_same_battle(self):
+        self.assertEqual(self.battle(11), self.battle(11))
+
+    def test_unseeded_uses_game_random(self):
+        arena = Arena([WildDog("e")], [WildDog("f")])
+        self.assertIs(arena.rand, game_random)
+        self.assertIsNone(arena.ai_rand)
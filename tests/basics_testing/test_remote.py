@@ -0,0 +1,210 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from basics import *
+
+
+def heroes(brain: Brain):
+    team = [Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword()),
+            Character("b", 13, 20, 7, Buffs(Strength(), ), Sword(), Shield()),
+            Character("d", 18, 20, 2, Buffs(), Bow()), None]
+    for combatant in team[:3]:
+        combatant.brain = brain
+    return team
+
+
+async def battle(brain: Brain, seed: int = 1) -> Arena:
+    arena = Arena(heroes(brain), [WildDog("e"), WildDog("f"), None, None], NullSink(), seed)
+    arena.start()
+    await arena.run(30)
+    return arena
+
+
+async def client(brain: QueueBrain, first: list = (), delay: float = 0.0):
+    """
+    an in-memory player, sending the first replies to the first request and 0 to the others
+    """
+    replies = list(first) or [0]
+    while True:
+        message = await brain.outbox.get()
+        if isinstance(message, DecisionRequest):
+            await asyncio.sleep(delay)
+            for reply in replies:
+                brain.put(reply)
+            replies = [0]
+
+
+class FirstBrain(Brain):
+    def decide(self, caster, arena):
+        return self.legal_decisions(caster)[0]
+
+
+class TestQueueBrain(unittest.TestCase):
+    def setUp(self):
+        self.arena = Arena(heroes(AIBrain()), [WildDog("e"), WildDog("f"), None, None], NullSink(), seed=1)
+        self.arena.start()
+        self.caster = self.arena.left[0]
+        self.options = Brain.legal_decisions(self.caster)
+
+    def decide(self, brain: QueueBrain, replies: list) -> Decision:
+        async def run():
+            for reply in replies:
+                brain.put(reply)
+            return await brain.decide(self.caster, self.arena)
+
+        return asyncio.run(run())
+
+    def answered(self, brain: QueueBrain, replies: list) -> Decision:
+        async def run():
+            player = asyncio.ensure_future(client(brain, replies))
+            decision = await brain.decide(self.caster, self.arena)
+            player.cancel()
+            return decision
+
+        return asyncio.run(run())
+
+    def test_reply(self):
+        self.assertEqual(self.answered(QueueBrain(timeout=1), ["1"]), self.options[1])
+
+    def test_invalid_reply(self):
+        brain = QueueBrain(timeout=1)
+
+        async def run():
+            decision = asyncio.ensure_future(brain.decide(self.caster, self.arena))
+            self.assertIsInstance(await brain.outbox.get(), DecisionRequest)
+            for reply in ("x", 99, 2):
+                brain.put(reply)
+            return await decision
+
+        self.assertEqual(asyncio.run(run()), self.options[2])
+        notices = [brain.outbox.get_nowait() for _ in range(brain.outbox.qsize())]
+        last = len(self.options) - 1
+        self.assertEqual(notices, [f"invalid choice 'x', expected 0 to {last}",
+                                   f"invalid choice 99, expected 0 to {last}"])
+
+    def test_timeout_falls_back(self):
+        brain = QueueBrain(timeout=0.01)
+        decision = self.decide(brain, [])
+        self.assertIn(decision, self.options)
+        self.assertEqual(brain.timeouts, 1)
+
+    def test_stale_reply_dropped(self):
+        brain = QueueBrain(timeout=0.01, fallback=FirstBrain())
+        self.assertEqual(self.decide(brain, [3]), self.options[0])
+
+    def test_late_reply(self):
+        brain = QueueBrain(timeout=0.05, fallback=FirstBrain())
+
+        async def run():
+            first = await brain.decide(self.caster, self.arena)
+            while not brain.outbox.empty():
+                brain.outbox.get_nowait()
+            second = asyncio.ensure_future(brain.decide(self.caster, self.arena))
+            request = await brain.outbox.get()
+            brain.put("1 2")
+            brain.put(f"{request.id} 1")
+            return first, request.id, await second
+
+        first, second_id, second = asyncio.run(run())
+        self.assertEqual((first, second_id, second), (self.options[0], 2, self.options[1]))
+        self.assertEqual(brain.timeouts, 1)
+
+    def test_closed(self):
+        brain = QueueBrain(timeout=30, fallback=FirstBrain())
+
+        async def run():
+            waiting = asyncio.ensure_future(brain.decide(self.caster, self.arena))
+            await brain.outbox.get()
+            brain.close()
+            return await waiting, await brain.decide(self.caster, self.arena)
+
+        decisions = asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertEqual(decisions, (self.options[0], self.options[0]))
+        self.assertEqual(brain.timeouts, 0)
+        self.assertTrue(brain.outbox.empty())
+
+    def test_request(self):
+        request = DecisionRequest(self.caster, self.options, 1.0)
+        self.assertTrue(str(request).startswith("a: 0) "))
+        self.assertIn(f"{len(self.options) - 1}) Skip", str(request))
+
+
+class TestSessions(unittest.TestCase):
+    def test_concurrent_battles(self):
+        async def session(seed: int):
+            brain = QueueBrain(timeout=5)
+            player = asyncio.ensure_future(client(brain, delay=0.001))
+            arena = await battle(brain, seed)
+            player.cancel()
+            return brain.timeouts, arena.turn
+
+        async def run():
+            return await asyncio.wait_for(asyncio.gather(*(session(seed) for seed in range(200))), 30)
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 200)
+        self.assertEqual(sum(timeouts for timeouts, _ in results), 0)
+        self.assertTrue(all(turns > 0 for _, turns in results))
+
+    def test_socket(self):
+        async def run():
+            server = await serve_players(lambda brain: battle(brain), timeout=5)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            requests = 0
+            while line := (await reader.readline()).decode():
+                if ") " in line:
+                    requests += 1
+                    writer.write(f"{line.split('#')[0]} 0\n".encode())
+                    await writer.drain()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return requests
+
+        self.assertGreater(asyncio.run(asyncio.wait_for(run(), 30)), 0)
+
+    def test_hang_up(self):
+        async def run():
+            server = await serve_players(lambda brain: battle(brain), timeout=30)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await reader.readline()
+            writer.close()
+            await writer.wait_closed()
+            server.close()
+            await server.wait_closed()
+
+        start = time.perf_counter()
+        asyncio.run(asyncio.wait_for(run(), 10))
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+class TestPlayerBrain(unittest.TestCase):
+    def test_input_off_loop(self):
+        arena = Arena(heroes(AIBrain()), [WildDog("e"), WildDog("f"), None, None], NullSink(), seed=1)
+        arena.start()
+        caster = arena.left[0]
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        def slow_input(prompt):
+            time.sleep(0.05)
+            return "0"
+
+        async def run():
+            tick = asyncio.ensure_future(ticker())
+            decision = await PlayerBrain().decide(caster, arena)
+            tick.cancel()
+            return decision
+
+        with patch("builtins.input", slow_input), patch("builtins.print"):
+            decision = asyncio.run(run())
+        self.assertIs(decision[0], caster.get_actions()[0])
+        self.assertGreater(len(ticks), 1)
@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+
+from basics import *
+
+
+def heroes():
+    team = [Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword()),
+            Character("b", 13, 20, 7, Buffs(Strength(), ), Sword(), Shield()),
+            Character("d", 18, 20, 2, Buffs(), Bow())]
+    for combatant in team:
+        combatant.brain = AIBrain()
+    return team
+
+
+def dogs():
+    return [WildDog("e"), WildDog("f")]
+
+
+def record(seed: int = 1, **kwargs) -> Replay:
+    return asyncio.run(record_battle(heroes(), dogs(), seed, **kwargs))
+
+
+class TestReplay(unittest.TestCase):
+    def test_round_trip(self):
+        replay = record()
+        loaded = Replay.from_bytes(replay.to_bytes())
+        self.assertEqual(loaded.decisions, replay.decisions)
+        self.assertEqual(loaded.left, replay.left)
+        self.assertEqual(loaded.checkpoints, replay.checkpoints)
+        self.assertEqual(loaded.to_bytes(False), replay.to_bytes(False))
+
+    def test_compact(self):
+        self.assertLess(len(record().to_bytes()), 1024)
+
+    def test_same_battle(self):
+        left, right = heroes(), dogs()
+        replay = asyncio.run(record_battle(left, right, 3))
+        arena = asyncio.run(replay_battle(replay.to_bytes()))
+        replayed = {c.name: c.cur_hp for c in arena.left + arena.right if c is not None}
+        self.assertEqual(replayed, {c.name: c.cur_hp for c in left + right})
+        self.assertEqual(state_hash(arena), replay.final_hash)
+
+    def test_desync(self):
+        replay = record(checkpoint_every=1)
+        replay.seed = (replay.seed[0] + 1,) + replay.seed[1:]
+        with self.assertRaises(DesyncError):
+            asyncio.run(replay_battle(replay))
+
+    def test_atb(self):
+        replay = record(scheduler=ATBScheduler(round_time=40.0))
+        loaded = Replay.from_bytes(replay.to_bytes())
+        self.assertEqual(loaded.build_scheduler().round_time, 40.0)
+        asyncio.run(replay_battle(loaded))
+
+    def test_not_a_replay(self):
+        with self.assertRaises(ReplayError):
+            Replay.from_bytes(b"nothing")
+        with self.assertRaises(ReplayError):
+            Replay.from_bytes(record().to_bytes(False)[:40])
+
+    def test_hostile_class(self):
+        data = record().to_bytes(False)
+        path = b"basics.character:Character"
+        self.assertIn(bytes([len(path)]) + path, data)
+        for hostile in (b"os:abort", b"builtins:dict", b"basics.gameplay:Arena"):
+            with self.assertRaises(ReplayError):
+                Replay.from_bytes(data.replace(bytes([len(path)]) + path, bytes([len(hostile)]) + hostile))
+        replay = record()
+        replay.left = ((Dodge,) + replay.left[0][1:],) + replay.left[1:]
+        with self.assertRaises(ReplayError):
+            replay.build_teams()
@@ -0,0 +1,127 @@
+import unittest
+
+from basics import *
+
+
+class Haste(RefBuff):
+    timings = Timing.GetSpeed
+
+    def may_affect(self, timing: Timing, baton) -> bool:
+        return timing == Timing.GetSpeed
+
+    def affect(self, timing: Timing, baton):
+        baton[THIS].cache_speed += 10
+
+    @property
+    def name(self) -> str:
+        return "Haste"
+
+
+class TestTurnScheduler(unittest.TestCase):
+    def setUp(self):
+        self.a = Character("a", 13, 20, 3, Buffs(), Sword())
+        self.b = Character("b", 13, 20, 4, Buffs(), Sword())
+        self.e = WildDog("e")
+        self.f = WildDog("f")
+        self.e.base_speed, self.f.base_speed = 6, 1
+        self.arena = Arena([self.a, self.b], [self.e, self.f], NullSink())
+        self.arena.start()
+
+    def test_fastest_first(self):
+        self.assertEqual(self.arena.action_order, [self.e, self.b, self.a, self.f])
+        self.assertIs(self.arena.advance(), self.e)
+        self.assertIs(self.arena.advance(), self.b)
+
+    def test_effective_speed(self):
+        self.a.buffs = Buffs(Haste())
+        self.arena.start()
+        self.assertIs(self.arena.advance(), self.a)
+
+    def test_dead_dropped(self):
+        self.b.cur_hp = 0
+        self.assertEqual(self.arena.action_order, [self.e, self.a, self.f])
+        self.arena.advance()
+        self.assertIs(self.arena.advance(), self.a)
+
+    def test_rekey(self):
+        self.assertIs(self.arena.advance(), self.e)
+        self.f.add_buff(Haste(), {})
+        self.assertEqual(self.arena.action_order, [self.f, self.b, self.a])
+        self.assertIs(self.arena.advance(), self.f)
+
+    def test_rekey_on_expire(self):
+        self.f.add_buff(Haste(duration=3), {})
+        self.assertIs(self.arena.advance(), self.f)
+        self.b.add_buff(Haste(duration=3), {})
+        self.assertEqual(self.arena.action_order, [self.b, self.e, self.a])
+        self.b.buffs["Haste"].after_affect(Timing.GetSpeed, {})
+        self.assertEqual(self.arena.action_order, [self.e, self.b, self.a])
+        self.a.add_buff(Haste(), {})
+        self.a.buffs.remove(self.a.buffs["Haste"])
+        self.assertEqual(self.arena.action_order, [self.e, self.b, self.a])
+        self.assertIs(self.arena.advance(), self.e)
+
+    def test_new_round(self):
+        for _ in range(4):
+            self.arena.advance()
+        self.assertTrue(self.arena.round_over)
+        self.arena.advance()
+        self.assertEqual(self.arena.turn, 1)
+        self.assertEqual(len(self.arena.action_order), 3)
+
+    def test_wave(self):
+        left = [WildDog(f"l{i}") for i in range(60)]
+        right = [WildDog(f"r{i}") for i in range(60)]
+        for i, dog in enumerate(left + right):
+            dog.base_speed = i % 7
+        arena = Arena(left, right, NullSink())
+        arena.start()
+        speeds = [arena.advance().speed for _ in range(120)]
+        self.assertEqual(speeds, sorted(speeds, reverse=True))
+
+
+class TestATBScheduler(unittest.TestCase):
+    def setUp(self):
+        self.fast = WildDog("fast")
+        self.slow = WildDog("slow")
+        self.fast.base_speed, self.slow.base_speed = 10, 5
+        self.arena = Arena([self.fast], [self.slow], NullSink(), scheduler=ATBScheduler())
+        self.arena.start()
+
+    def test_fast_acts_more(self):
+        actors = [self.arena.advance() for _ in range(6)]
+        self.assertEqual(actors.count(self.fast), 4)
+        self.assertEqual(actors.count(self.slow), 2)
+
+    def test_rounds(self):
+        for _ in range(6):
+            self.arena.advance()
+        self.assertEqual(self.arena.turn, 2)
+
+    def test_rounds_follow_clock(self):
+        a, b = WildDog("a"), WildDog("b")
+        a.base_speed = b.base_speed = 1
+        scheduler = ATBScheduler()
+        arena = Arena([a], [b], NullSink(), scheduler=scheduler)
+        arena.start()
+        for _ in range(6):
+            arena.advance()
+            self.assertEqual(arena.turn, int(scheduler.now // scheduler.round_time))
+        self.assertEqual((scheduler.now, arena.turn), (300.0, 15))
+
+    def test_rekey(self):
+        self.assertIs(self.arena.advance(), self.fast)
+        self.slow.base_speed = 40
+        self.arena.rekey(self.slow)
+        self.assertIs(self.arena.advance(), self.slow)
+        self.assertAlmostEqual(self.arena.scheduler.now, 11.25)
+
+    def test_dead(self):
+        self.slow.cur_hp = 0
+        self.assertEqual({self.arena.advance() for _ in range(5)}, {self.fast})
+
+    def test_snapshot(self):
+        snapshot = self.arena.snapshot()
+        first = [self.arena.advance() for _ in range(5)]
+        self.arena.restore(snapshot)
+        self.assertEqual([self.arena.advance() for _ in range(5)], first)
@@ -0,0 +1,42 @@
+import unittest
+
+from basics import *
+
+
+def heroes():
+    return [Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword()),
+            Character("b", 13, 20, 7, Buffs(Strength(), ), Sword(), Shield())]
+
+
+def dogs():
+    return [WildDog("e"), WildDog("f")]
+
+
+class TestSimulation(unittest.TestCase):
+    def test_play(self):
+        result = run_battles(heroes, dogs, [1])[0]
+        self.assertEqual(result.seed, 1)
+        self.assertIn(result.winner, (LEFT, RIGHT, None))
+        self.assertGreater(result.left_damage + result.right_damage, 0)
+
+    def test_max_rounds(self):
+        result = run_battles(heroes, dogs, [1], max_rounds=1)[0]
+        self.assertLessEqual(result.turns, 1)
+
+    def test_reproducible(self):
+        first = run_batch(heroes, dogs, 20, seed=3, workers=1)
+        second = run_batch(heroes, dogs, 20, seed=3, workers=1)
+        self.assertEqual([repr(r) for r in first.results], [repr(r) for r in second.results])
+
+    def test_parallel_matches_serial(self):
+        serial = run_batch(heroes, dogs, 12, seed=5, workers=1)
+        parallel = run_batch(heroes, dogs, 12, seed=5, workers=2, chunk_size=5)
+        self.assertEqual([repr(r) for r in serial.results], [repr(r) for r in parallel.results])
+        self.assertEqual(parallel.workers, 2)
+
+    def test_summary(self):
+        batch = run_batch(heroes, dogs, 10, seed=7, workers=1)
+        summary = batch.summary()
+        self.assertEqual(summary["battles"], 10)
+        self.assertAlmostEqual(batch.left_win_rate + batch.right_win_rate + batch.draw_rate, 1.0)
+        self.assertGreater(batch.battles_per_second, 0)
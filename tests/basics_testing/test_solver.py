@@ -0,0 +1,147 @@
+import asyncio
+import gc
+import unittest
+import weakref
+
+from basics import *
+
+
+class Recording(Brain):
+    def __init__(self):
+        self.calls = 0
+
+    def decide(self, caster, arena):
+        self.calls += 1
+        return None
+
+
+class TestSolver(unittest.TestCase):
+    def setUp(self):
+        self.a = Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword())
+        self.e = WildDog("e")
+        self.e.cur_hp = 8
+        self.sink = RingBufferSink()
+        self.arena = Arena([self.a, None, None, None], [self.e, None, None, None], self.sink, seed=1)
+        self.arena.start()
+
+    def turn_of(self, combatant):
+        while self.arena.advance() is not combatant:
+            pass
+
+    def test_state_key(self):
+        solver = Solver()
+        key = solver.state_key(self.arena)
+        self.assertEqual(hash(key), hash(solver.state_key(self.arena)))
+        state = self.arena.snapshot()
+        self.e.cur_hp -= 1
+        self.assertNotEqual(solver.state_key(self.arena), key)
+        self.arena.restore(state)
+        self.assertEqual(solver.state_key(self.arena), key)
+
+    def test_state_key_relative(self):
+        solver = Solver()
+        key = solver.state_key(self.arena)
+        strength = self.a.buffs["Strength"]
+        clock, order, heap = strength.get_state()
+        strength.set_state((clock + 5, order + 2, tuple((expiry + 5, o + 2, stack) for expiry, o, stack in heap)))
+        self.arena.new_round()
+        self.assertEqual(solver.state_key(self.arena), key)
+        strength.set_state((clock + 5, order, heap))
+        self.assertNotEqual(solver.state_key(self.arena), key)
+
+    def test_one_turn(self):
+        self.turn_of(self.a)
+        decision, value = Solver(horizon=1).best(self.arena, self.a)
+        kills = [decision_outcome(self.a, d).kill_probability(self.e) for d in Brain.legal_decisions(self.a)]
+        self.assertAlmostEqual(value, max(kills))
+        self.assertAlmostEqual(decision_outcome(self.a, decision).kill_probability(self.e), max(kills))
+
+    def test_value(self):
+        solver = Solver(horizon=1)
+        self.assertEqual(solver.value(self.arena, True), 0.0)
+        values = [Solver(horizon=h).value(self.arena, True) for h in range(1, 6)]
+        self.assertEqual(values, sorted(values))
+        self.assertGreater(values[-1], 0.0)
+        self.assertLessEqual(values[-1] + Solver(horizon=5).value(self.arena, False), 1.0)
+
+    def test_leaves_arena(self):
+        self.turn_of(self.a)
+        state = self.arena.snapshot()
+        solver = Solver(horizon=3)
+        key = solver.state_key(self.arena, state)
+        solver.best(self.arena, self.a)
+        self.assertEqual(solver.state_key(self.arena), key)
+        self.assertIs(self.arena.current, self.a)
+        self.assertEqual(len(self.sink), 0)
+        self.assertNotIn("suffer", vars(self.e))
+
+    def test_memo(self):
+        solver = Solver(horizon=4)
+        value = solver.value(self.arena, True)
+        misses = solver.misses
+        self.assertEqual(solver.value(self.arena, True), value)
+        self.assertEqual(solver.misses, misses)
+        bounded = Solver(horizon=4, cache_size=5)
+        self.assertAlmostEqual(bounded.value(self.arena, True), value)
+        self.assertEqual(len(bounded.memo), 5)
+        self.assertGreater(bounded.misses, misses)
+
+    def test_names(self):
+        solver = Solver(horizon=2)
+        a = Character("b", 13, 20, 3, Buffs(), Sword())
+        arena = Arena([a, None, None, None], [WildDog("f"), None, None, None], NullSink(), seed=1)
+        arena.start()
+        solver.value(arena, True)
+        solver.value(self.arena, True)
+        self.assertEqual(solver.name(a), 0)
+        self.assertEqual(solver.name(self.a), 2)
+        gone = weakref.ref(a)
+        del a, arena
+        Arena([WildDog("g")], [WildDog("h")], NullSink())
+        gc.collect()
+        self.assertIsNone(gone())
+        self.assertEqual(len(solver._names), 2)
+        solver.clear()
+        self.assertEqual(solver.name(self.e), 0)
+
+    def test_budget(self):
+        with self.assertRaises(SolverError):
+            Solver(horizon=4, max_nodes=3).value(self.arena, True)
+        self.assertEqual(self.e.cur_hp, 8)
+
+
+class TestSolverBrain(unittest.TestCase):
+    def test_solves_small(self):
+        a = Character("a", 13, 20, 3, Buffs(), Sword())
+        e, f = WildDog("e"), WildDog("f")
+        f.cur_hp = 0
+        arena = Arena([a, None, None, None], [e, f, None, None], NullSink(), seed=1)
+        arena.start()
+        brain = SolverBrain(horizon=2, fallback=Recording())
+        while arena.advance() is not a:
+            pass
+        decision = brain.decide(a, arena)
+        self.assertIn(decision_key(decision), [decision_key(d) for d in Brain.legal_decisions(a)])
+        self.assertEqual((brain.solved, brain.fallback.calls), (1, 0))
+
+    def test_falls_back(self):
+        a = Character("a", 13, 20, 3, Buffs(), Sword())
+        arena = Arena([a, None, None, None], [WildDog("e"), WildDog("f"), WildDog("g"), None], NullSink(), seed=1)
+        arena.start()
+        brain = SolverBrain(fallback=Recording())
+        self.assertIsNone(brain.decide(a, arena))
+        self.assertEqual(brain.fallback.calls, 1)
+        brain = SolverBrain(max_alive=4, max_nodes=2, fallback=Recording())
+        self.assertIsNone(brain.decide(a, arena))
+        self.assertEqual((brain.solved, brain.fallbacks), (0, 1))
+
+    def test_battle(self):
+        a = Character("a", 13, 20, 3, Buffs(Dodge(), Strength()), Sword())
+        a.brain = SolverBrain(horizon=2)
+        e = WildDog("e")
+        e.cur_hp = 6
+        arena = Arena([a, None, None, None], [e, None, None, None], NullSink(), seed=3)
+        arena.start()
+        asyncio.run(arena.run(20))
+        self.assertTrue(arena.is_over())
+        self.assertGreater(a.brain.solved, 0)
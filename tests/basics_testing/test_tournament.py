@@ -0,0 +1,122 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from basics import *
+
+
+class Interrupted(Exception):
+    pass
+
+
+def small(**kwargs) -> Tournament:
+    kits = [(Sword,), (Sword, Shield), (Bow,)]
+    return Tournament(character_rosters(kits, size=2), [pack(WildDog), pack(Robber)], battles=6, chunk_size=3,
+                      seed=2, max_rounds=30, **kwargs)
+
+
+class TestRoster(unittest.TestCase):
+    def test_loadouts(self):
+        kits = loadouts()
+        self.assertIn((Sword, Shield), kits)
+        self.assertIn((Bow,), kits)
+        self.assertNotIn((Shield, Bow), kits)
+        self.assertNotIn((Shield, MagicBook), kits)
+
+    def test_fresh_team(self):
+        roster = character_rosters([(Sword, Shield)])[0]
+        first, second = roster(), roster()
+        self.assertEqual(len(first), ARENA_WIDTH)
+        self.assertIsNot(first[0], second[0])
+        self.assertIsNot(first[0].buffs, first[1].buffs)
+        self.assertEqual(roster.name, "Sword+Shield")
+        self.assertEqual([c.name for c in pickle.loads(pickle.dumps(roster))() if c], ["a", "b", "c"])
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+        self.assertEqual(wilson_interval(0, 10)[0], 0.0)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+
+class TestTournament(unittest.TestCase):
+    def test_matrix(self):
+        tournament = small()
+        cells = tournament.run(workers=1)
+        self.assertTrue(tournament.complete)
+        self.assertEqual(len(cells), 3)
+        self.assertTrue(all(cell.battles == 6 for row in cells for cell in row))
+        self.assertTrue(all(0 <= cell.interval[0] <= cell.win_rate <= cell.interval[1] <= 1
+                            for row in cells for cell in row))
+
+    def test_reproducible(self):
+        first, second = small(), small()
+        first.run(workers=1)
+        second.run(workers=1)
+        self.assertEqual(first.matrix(), second.matrix())
+
+    def test_parallel_matches_serial(self):
+        serial, parallel = small(), small()
+        serial.run(workers=1)
+        parallel.run(workers=2)
+        self.assertEqual(serial.matrix(), parallel.matrix())
+
+    def test_round_robin(self):
+        tournament = Tournament(character_rosters([(Sword,), (Bow,), (Sword, Shield)]), battles=4, chunk_size=2,
+                                max_rounds=30)
+        cells = tournament.run(workers=1)
+        self.assertEqual(len(tournament.matchups), 3)
+        self.assertEqual(cells[0][0].battles, 0)
+        self.assertEqual(cells[0][1].wins, cells[1][0].losses)
+        self.assertEqual(cells[2][1].draws, cells[1][2].draws)
+
+    def test_progress(self):
+        seen = []
+        small().run(workers=1, progress=seen.append)
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(seen[-1].battles, 6)
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tournament.json")
+            calls = []
+
+            def crash(cell):
+                calls.append(cell)
+                if len(calls) == 5:
+                    raise Interrupted()
+
+            with self.assertRaises(Interrupted):
+                small(checkpoint=path, checkpoint_every=0).run(workers=1, progress=crash)
+            resumed = small(checkpoint=path)
+            self.assertEqual(len(resumed.done), 5)
+            self.assertEqual(len(resumed.tasks()), 7)
+            resumed.run(workers=1)
+            full = small()
+            full.run(workers=1)
+            self.assertEqual(resumed.summary(), full.summary())
+
+    def test_other_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tournament.json")
+            small(checkpoint=path).run(workers=1)
+            with self.assertRaises(TournamentError):
+                Tournament(character_rosters([(Sword,)]), [pack(WildDog)], checkpoint=path)
+            with open(path, "w") as file:
+                file.write("{")
+            with self.assertRaises(TournamentError):
+                small(checkpoint=path)
+
+    def test_unique_names(self):
+        with self.assertRaises(TournamentError):
+            Tournament([pack(WildDog), pack(WildDog)])
+
+    def test_table(self):
+        tournament = small()
+        tournament.run(workers=1)
+        lines = tournament.table().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn("WildDogx2", lines[0])
+        self.assertTrue(lines[2].startswith("Sword+Shield"))